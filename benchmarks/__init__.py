@@ -0,0 +1 @@
+"""Benchmark harness: fake Bot API, synthetic member data and scenario runner."""
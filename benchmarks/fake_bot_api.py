@@ -0,0 +1,128 @@
+from collections import Counter
+from urllib.parse import parse_qs
+import asyncio
+import json
+import random
+import time
+from src.utils import TokenBucket
+from src.utils.http_server import HttpServer, Request, Response
+
+BOT_USER = {"id": 1000000001, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+METHODS = (
+    "getMe",
+    "sendMessage",
+    "banChatMember",
+    "unbanChatMember",
+    "getChatMember",
+    "createChatInviteLink",
+    "revokeChatInviteLink",
+    "approveChatJoinRequest",
+    "declineChatJoinRequest",
+    "deleteWebhook",
+    "setWebhook",
+)
+
+
+class FakeBotApi:
+    """Local stand-in for the Bot API used by the benchmarks.
+
+    Every call sleeps for ``latency`` seconds (± ``jitter``). Calls beyond
+    ``rate`` per second, plus a random ``flood_ratio`` share of all calls, are
+    answered with 429 and ``retry_after`` like Telegram's flood control.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        latency: float = 0.03,
+        jitter: float = 0.5,
+        rate: float = 0.0,
+        flood_ratio: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 42,
+    ):
+        self.token = token
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_ratio = flood_ratio
+        self.retry_after = retry_after
+        self.limiter = TokenBucket(rate=rate, burst=max(1, int(rate)), min_rate=rate) if rate > 0 else None
+        self.random = random.Random(seed)
+        self.server = HttpServer("127.0.0.1", 0)
+        self.calls: Counter[str] = Counter()
+        self.flooded: Counter[str] = Counter()
+        self.latencies: list[float] = []
+        self._next_id = 0
+        for method in METHODS:
+            self.server.route("POST", f"/bot{token}/{method}", self._handler(method))
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.port}/bot"
+
+    async def start(self) -> None:
+        await self.server.start()
+
+    async def stop(self) -> None:
+        await self.server.stop()
+
+    def _handler(self, method: str):
+        async def handle(request: Request) -> Response:
+            started = time.perf_counter()
+            self.calls[method] += 1
+            delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))
+            await asyncio.sleep(max(delay, 0.0))
+            if self._flooded():
+                self.flooded[method] += 1
+                payload = {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }
+                return self._json(payload, status=429)
+            params = {key: values[-1] for key, values in parse_qs(request.body.decode()).items()}
+            response = self._json({"ok": True, "result": self._result(method, params)})
+            self.latencies.append(time.perf_counter() - started)
+            return response
+        return handle
+
+    def _flooded(self) -> bool:
+        if self.flood_ratio and self.random.random() < self.flood_ratio:
+            return True
+        # No token in the bucket means Telegram would refuse the call
+        return self.limiter is not None and not self.limiter.try_acquire()
+
+    def _result(self, method: str, params: dict[str, str]):
+        self._next_id += 1
+        if method == "getMe":
+            return BOT_USER
+        if method == "sendMessage":
+            return {
+                "message_id": self._next_id,
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text", ""),
+            }
+        if method == "getChatMember":
+            # Every third user has already left, so plans have something to diff
+            user_id = int(params.get("user_id", 0))
+            user = {"id": user_id, "is_bot": False, "first_name": "Bench"}
+            return {"status": "left" if user_id % 3 == 0 else "member", "user": user}
+        if method in ("createChatInviteLink", "revokeChatInviteLink"):
+            return {
+                "invite_link": f"https://t.me/+bench{self._next_id:08d}",
+                "creator": BOT_USER,
+                "creates_join_request": False,
+                "is_primary": False,
+                "is_revoked": method == "revokeChatInviteLink",
+                "member_limit": int(params.get("member_limit", 1)),
+                **({"expire_date": int(params["expire_date"])} if params.get("expire_date") else {}),
+            }
+        return True
+
+    @staticmethod
+    def _json(payload: dict, status: int = 200) -> Response:
+        return Response(status, json.dumps(payload).encode(), content_type="application/json")
@@ -0,0 +1,245 @@
+"""Benchmark the bot against a local fake Bot API and a seeded SQLite ``Tbl_Member``.
+
+    python -m benchmarks.run --members 100000 --updates 5000 --clients 64
+
+Scenarios:
+  handlers  text updates (registered phones, unknown phones, chatter) pushed
+            through the real application, update processor and handlers
+  kick      ``MemberService.kick_non_members`` over every expired, linked member
+"""
+from typing import Iterator
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from telegram import Bot, Update
+from config import Config
+from src.db.mssql import Database
+from src.repository import MemberRepository
+from src.services import MemberService
+from src.handlers import TelegramBotHandler
+from logs.logger import LOGGER as logger
+from benchmarks.fake_bot_api import FakeBotApi
+from benchmarks.seed import seed_members, member_phone, is_expired, is_linked
+
+TOKEN = "123456:BENCHMARK"
+GROUP_ID = -1001234567890
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def latency_summary(values: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "max_ms": round(max(values, default=0.0) * 1000, 2),
+    }
+
+
+def make_config(args: argparse.Namespace, api: FakeBotApi) -> Config:
+    config = Config()
+    config.telegram_bot_token = TOKEN
+    config.telegram_group_id = GROUP_ID
+    config.telegram_api_base_url = api.base_url
+    config.database_url = args.database_url
+    config.metrics_enabled = False
+    config.bot_concurrent_updates = args.concurrent_updates
+    config.invite_pool_size = args.invite_pool_size
+    config.kick_rate = args.kick_rate
+    config.kick_burst = max(1, int(args.kick_rate))
+    config.kick_concurrency = args.kick_concurrency
+    config.kick_batch_size = args.kick_batch_size
+    config.outbound_rate = args.outbound_rate
+    config.outbound_burst = max(1, int(args.outbound_rate))
+    return config
+
+
+def make_updates(count: int, members: int, users: int, bot: Bot, seed: int) -> Iterator[Update]:
+    """60% phones of members who may join, 20% unknown phones, 20% chatter."""
+    rng = random.Random(seed)
+    for i in range(count):
+        kind = i % 10
+        if kind < 6:
+            member_id = rng.randrange(1, members + 1)
+            while is_expired(member_id) or is_linked(member_id):
+                member_id = rng.randrange(1, members + 1)
+            text = member_phone(member_id)
+        elif kind < 8:
+            text = f"0899{rng.randrange(10 ** 8):08d}"
+        else:
+            text = "hello, how do I join?"
+
+        user_id = 7000000000 + i % users
+        data = {
+            "update_id": i + 1,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+                "text": text,
+            },
+        }
+        yield Update.de_json(data, bot)
+
+
+async def bench_handlers(args: argparse.Namespace, config: Config) -> dict:
+    db = Database(config)
+    db.connect()
+    handler = TelegramBotHandler(config, MemberService(config, MemberRepository(db)))
+    app = handler.build_application()
+    await app.initialize()
+    await handler._post_init(app)
+
+    updates = make_updates(args.updates, args.members, args.users or args.updates, app.bot, args.seed)
+    latencies: list[float] = []
+
+    async def client():
+        for update in updates:
+            started = time.perf_counter()
+            await app.update_processor.process_update(update, app.process_update(update))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await handler._post_shutdown(app)
+        await app.shutdown()
+        db.close()
+
+    return {
+        "updates": len(latencies),
+        "clients": args.clients,
+        "elapsed_s": round(elapsed, 3),
+        "updates_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        **latency_summary(latencies),
+        "handlers": handler.stats()["handlers"],
+    }
+
+
+async def bench_kick(args: argparse.Namespace, config: Config) -> dict:
+    db = Database(config)
+    db.connect()
+    service = MemberService(config, MemberRepository(db))
+    try:
+        async with service.bot:
+            report = await service.kick_non_members(until_id=args.kick_max_id)
+    finally:
+        db.close()
+    return report.as_dict()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    api = FakeBotApi(
+        TOKEN,
+        latency=args.latency_ms / 1000,
+        rate=args.api_rate,
+        flood_ratio=args.flood_ratio,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    await api.start()
+    config = make_config(args, api)
+    results: dict = {"members": args.members}
+    try:
+        if args.scenario in ("all", "handlers"):
+            results["handlers"] = await bench_handlers(args, config)
+        if args.scenario in ("all", "kick"):
+            results["kick"] = await bench_kick(args, config)
+    finally:
+        await api.stop()
+
+    results["api"] = {
+        "calls": dict(api.calls),
+        "flooded": dict(api.flooded),
+        **latency_summary(api.latencies),
+    }
+    return results
+
+
+def seed(args: argparse.Namespace) -> float:
+    config = Config()
+    config.database_url = args.database_url
+    db = Database(config)
+    db.connect()
+    started = time.perf_counter()
+    try:
+        seed_members(db.engine, args.members)
+    finally:
+        db.close()
+    return time.perf_counter() - started
+
+
+def print_results(results: dict) -> None:
+    print(f"members: {results['members']} (seeded in {results['seed_s']:.1f}s)")
+    if "handlers" in results:
+        h = results["handlers"]
+        print(
+            f"handlers: {h['updates']} updates in {h['elapsed_s']}s = {h['updates_per_s']} updates/s, "
+            f"p50 {h['p50_ms']}ms, p99 {h['p99_ms']}ms, max {h['max_ms']}ms"
+        )
+        for name, stats in h["handlers"].items():
+            print(f"  {name}: {stats['count']} calls, avg {stats['avg_seconds'] * 1000:.2f}ms, max {stats['max_seconds'] * 1000:.2f}ms")
+    if "kick" in results:
+        k = results["kick"]
+        print(
+            f"kick: {k['kicked']} kicked, {k['failed']} failed, {k['throttled']} throttled in {k['duration']}s "
+            f"= {k['throughput']} members/s"
+        )
+    a = results["api"]
+    print(f"api: {sum(a['calls'].values())} calls, {sum(a['flooded'].values())} answered 429, p50 {a['p50_ms']}ms, p99 {a['p99_ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot benchmarks against a local fake Bot API")
+    parser.add_argument("--scenario", choices=["all", "handlers", "kick"], default="all")
+    parser.add_argument("--members", type=int, default=10000, help="Synthetic members to seed")
+    parser.add_argument("--database-url", help="SQLAlchemy URL to seed and use (default: a temporary SQLite file)")
+    parser.add_argument("--updates", type=int, default=2000, help="Text updates to process")
+    parser.add_argument("--clients", type=int, default=64, help="Updates in flight at once")
+    parser.add_argument("--users", type=int, default=0, help="Distinct senders (default: one per update)")
+    parser.add_argument("--concurrent-updates", type=int, default=16, help="BOT_CONCURRENT_UPDATES")
+    parser.add_argument("--invite-pool-size", type=int, default=20, help="INVITE_POOL_SIZE")
+    parser.add_argument("--kick-rate", type=float, default=1000.0, help="KICK_RATE")
+    parser.add_argument("--kick-concurrency", type=int, default=32, help="KICK_CONCURRENCY")
+    parser.add_argument("--kick-batch-size", type=int, default=500, help="KICK_BATCH_SIZE")
+    parser.add_argument("--kick-max-id", type=int, help="Only kick members up to this Id")
+    parser.add_argument("--outbound-rate", type=float, default=30.0, help="OUTBOUND_RATE; raise it to measure the bot beyond Telegram's limit")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Fake Bot API latency")
+    parser.add_argument("--api-rate", type=float, default=0.0, help="Calls/s the fake API accepts before answering 429 (0 = unlimited)")
+    parser.add_argument("--flood-ratio", type=float, default=0.0, help="Share of calls randomly answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after sent with 429 answers")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Keep per-update log lines")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.setLevel(logging.ERROR)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}"
+        seed_s = seed(args)
+        results = asyncio.run(run(args))
+        results["seed_s"] = round(seed_s, 3)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from sqlalchemy import Engine, insert
+from src.models.member import MemberORM
+
+# Synthetic population, decided by Id so scenarios can pick members without querying:
+#   Id % 10 < 3  -> membership ended 1..90 days ago (kick candidates)
+#   Id % 2 == 0  -> already linked to Telegram and in the group
+EXPIRED_SHARE = 3
+CHUNK_SIZE = 10000
+
+
+def member_phone(member_id: int) -> str:
+    return f"0812{member_id:08d}"
+
+
+def is_expired(member_id: int) -> bool:
+    return member_id % 10 < EXPIRED_SHARE
+
+
+def is_linked(member_id: int) -> bool:
+    return member_id % 2 == 0
+
+
+def telegram_id(member_id: int) -> int:
+    return 5000000000 + member_id
+
+
+def seed_members(engine: Engine, count: int) -> None:
+    """(Re)create ``Tbl_Member`` and fill it with ``count`` synthetic members."""
+    table = MemberORM.__table__
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+
+    now = datetime.now()
+    with engine.begin() as connection:
+        for start in range(1, count + 1, CHUNK_SIZE):
+            rows = []
+            for member_id in range(start, min(start + CHUNK_SIZE, count + 1)):
+                if is_expired(member_id):
+                    membership_time = now - timedelta(days=1 + member_id % 90)
+                else:
+                    membership_time = now + timedelta(days=1 + member_id % 365)
+                linked = is_linked(member_id)
+                rows.append({
+                    "Id": member_id,
+                    "FirstName": f"Member{member_id}",
+                    "LastName": "Bench",
+                    "Phone": member_phone(member_id),
+                    "IsMembership": True,
+                    "IsActived": True,
+                    "CreatedTime": now - timedelta(days=400),
+                    "MembershipTime": membership_time,
+                    "HasJoinedTelegramGroup": linked,
+                    "UserTelegramId": telegram_id(member_id) if linked else None,
+                })
+            connection.execute(insert(table), rows)
@@ -11,8 +11,65 @@ class Config:
         self.database_name: str = None
         self.database_user: str = None
         self.database_password: str = None
+        self.database_url: str = None
         self.environment: str = None
         self.telegram_group_id: int = None
+        self.telegram_mode: str = "polling"
+        self.telegram_api_base_url: str = "https://api.telegram.org/bot"
+        self.telegram_webhook_url: str = None
+        self.telegram_webhook_secret: str = None
+        self.telegram_webhook_path: str = "/telegram/webhook"
+        self.telegram_webhook_drop_pending: bool = False
+        self.telegram_pool_size: int = 256
+        self.telegram_http2: bool = False
+        self.telegram_keepalive_expiry: float = 60.0
+        self.telegram_connect_timeout: float = 5.0
+        self.telegram_read_timeout: float = 10.0
+        self.telegram_write_timeout: float = 10.0
+        self.telegram_pool_timeout: float = 10.0
+        self.telegram_media_write_timeout: float = 20.0
+        self.webhook_listen: str = "0.0.0.0"
+        self.webhook_port: int = 8000
+        self.metrics_enabled: bool = True
+        self.bot_concurrent_updates: int = 16
+        self.invite_pool_size: int = 20
+        self.invite_link_ttl: int = 7200
+        self.invite_link_min_remaining: int = 3600
+        self.membership_sync_window: float = 2.0
+        self.membership_sync_max_batch: int = 500
+        self.member_index_enabled: bool = True
+        self.member_index_refresh_interval: float = 10.0
+        self.member_index_reload_interval: float = 300.0
+        self.outbound_rate: float = 30.0
+        self.outbound_burst: int = 30
+        self.outbound_chat_rate: float = 1.0
+        self.outbound_concurrency: int = 32
+        self.outbound_max_retries: int = 3
+        self.database_async: bool = False
+        self.database_async_driver: str = "aioodbc"
+        self.telegram_cleaning_schedule: str = "00:01"
+        self.job_store_url: str = "sqlite:///logs/jobs.sqlite3"
+        self.job_lease_seconds: int = 300
+        self.job_max_attempts: int = 3
+        self.scheduler_poll_interval: float = 30.0
+        self.payment_reminder_enabled: bool = False
+        self.payment_reminder_schedule: str = "09:00"
+        self.payment_reminder_days: list[int] = [3]
+        self.payment_reminder_template: str = "⏰ Your membership ends on {expires_on} ({days_left} days left). Please renew to stay in the group."
+        self.payment_reminder_rate: float = 20.0
+        self.payment_reminder_concurrency: int = 16
+        self.payment_reminder_batch_size: int = 500
+        self.kick_concurrency: int = 8
+        self.kick_burst: int = 20
+        self.kick_rate: float = 20.0
+        self.kick_batch_size: int = 100
+        self.kick_stream_results: bool = False
+        self.kick_pipeline_depth: int = 2
+        self.kick_shards: int = 1
+        self.kick_mode: str = "full"
+        self.phone_cache_size: int = 10000
+        self.phone_cache_ttl: float = 300.0
+        self.phone_cache_negative_ttl: float = 30.0
 
     def load_from_env(self) -> None:
         '''Load configuration from environment dictionary.'''
@@ -24,5 +81,64 @@ class Config:
         self.database_name = os.getenv("DATABASE_NAME")
         self.database_user = os.getenv("DATABASE_USER")
         self.database_password = os.getenv("DATABASE_PASSWORD")
+        self.database_url = os.getenv("DATABASE_URL")
         self.environment = os.getenv("ENVIRONMENT")
-        self.telegram_group_id = int(os.getenv("TELEGRAM_GROUP_ID"))
\ No newline at end of file
+        self.telegram_group_id = int(os.getenv("TELEGRAM_GROUP_ID"))
+        self.telegram_mode = os.getenv("TELEGRAM_MODE", self.telegram_mode).lower()
+        self.telegram_api_base_url = os.getenv("TELEGRAM_API_BASE_URL", self.telegram_api_base_url)
+        self.telegram_webhook_url = os.getenv("TELEGRAM_WEBHOOK_URL")
+        self.telegram_webhook_secret = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+        self.telegram_webhook_path = os.getenv("TELEGRAM_WEBHOOK_PATH", self.telegram_webhook_path)
+        self.telegram_webhook_drop_pending = os.getenv("TELEGRAM_WEBHOOK_DROP_PENDING", "false").lower() == "true"
+        self.telegram_pool_size = int(os.getenv("TELEGRAM_POOL_SIZE", self.telegram_pool_size))
+        self.telegram_http2 = os.getenv("TELEGRAM_HTTP2", "false").lower() == "true"
+        self.telegram_keepalive_expiry = float(os.getenv("TELEGRAM_KEEPALIVE_EXPIRY", self.telegram_keepalive_expiry))
+        self.telegram_connect_timeout = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", self.telegram_connect_timeout))
+        self.telegram_read_timeout = float(os.getenv("TELEGRAM_READ_TIMEOUT", self.telegram_read_timeout))
+        self.telegram_write_timeout = float(os.getenv("TELEGRAM_WRITE_TIMEOUT", self.telegram_write_timeout))
+        self.telegram_pool_timeout = float(os.getenv("TELEGRAM_POOL_TIMEOUT", self.telegram_pool_timeout))
+        self.telegram_media_write_timeout = float(os.getenv("TELEGRAM_MEDIA_WRITE_TIMEOUT", self.telegram_media_write_timeout))
+        self.webhook_listen = os.getenv("WEBHOOK_LISTEN", self.webhook_listen)
+        self.webhook_port = int(os.getenv("WEBHOOK_PORT", self.webhook_port))
+        self.metrics_enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        self.bot_concurrent_updates = int(os.getenv("BOT_CONCURRENT_UPDATES", self.bot_concurrent_updates))
+        self.invite_pool_size = int(os.getenv("INVITE_POOL_SIZE", self.invite_pool_size))
+        self.invite_link_ttl = int(os.getenv("INVITE_LINK_TTL", self.invite_link_ttl))
+        self.invite_link_min_remaining = int(os.getenv("INVITE_LINK_MIN_REMAINING", self.invite_link_min_remaining))
+        self.membership_sync_window = float(os.getenv("MEMBERSHIP_SYNC_WINDOW", self.membership_sync_window))
+        self.membership_sync_max_batch = int(os.getenv("MEMBERSHIP_SYNC_MAX_BATCH", self.membership_sync_max_batch))
+        self.member_index_enabled = os.getenv("MEMBER_INDEX_ENABLED", "true").lower() == "true"
+        self.member_index_refresh_interval = float(os.getenv("MEMBER_INDEX_REFRESH_INTERVAL", self.member_index_refresh_interval))
+        self.member_index_reload_interval = float(os.getenv("MEMBER_INDEX_RELOAD_INTERVAL", self.member_index_reload_interval))
+        self.outbound_rate = float(os.getenv("OUTBOUND_RATE", self.outbound_rate))
+        self.outbound_burst = int(os.getenv("OUTBOUND_BURST", self.outbound_burst))
+        self.outbound_chat_rate = float(os.getenv("OUTBOUND_CHAT_RATE", self.outbound_chat_rate))
+        self.outbound_concurrency = int(os.getenv("OUTBOUND_CONCURRENCY", self.outbound_concurrency))
+        self.outbound_max_retries = int(os.getenv("OUTBOUND_MAX_RETRIES", self.outbound_max_retries))
+        self.database_async = os.getenv("DATABASE_ASYNC", "false").lower() == "true"
+        self.database_async_driver = os.getenv("DATABASE_ASYNC_DRIVER", self.database_async_driver)
+        self.telegram_cleaning_schedule = os.getenv("TELEGRAM_CLEANING_SCHEDULE", self.telegram_cleaning_schedule)
+        self.job_store_url = os.getenv("JOB_STORE_URL", self.job_store_url)
+        self.job_lease_seconds = int(os.getenv("JOB_LEASE_SECONDS", self.job_lease_seconds))
+        self.job_max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", self.job_max_attempts))
+        self.scheduler_poll_interval = float(os.getenv("SCHEDULER_POLL_INTERVAL", self.scheduler_poll_interval))
+        self.payment_reminder_enabled = os.getenv("PAYMENT_REMINDER_ENABLED", "false").lower() == "true"
+        self.payment_reminder_schedule = os.getenv("PAYMENT_REMINDER_SCHEDULE", self.payment_reminder_schedule)
+        days = os.getenv("PAYMENT_REMINDER_DAYS")
+        if days:
+            self.payment_reminder_days = [int(day) for day in days.split(",") if day.strip()]
+        self.payment_reminder_template = os.getenv("PAYMENT_REMINDER_TEMPLATE", self.payment_reminder_template)
+        self.payment_reminder_rate = float(os.getenv("PAYMENT_REMINDER_RATE", self.payment_reminder_rate))
+        self.payment_reminder_concurrency = int(os.getenv("PAYMENT_REMINDER_CONCURRENCY", self.payment_reminder_concurrency))
+        self.payment_reminder_batch_size = int(os.getenv("PAYMENT_REMINDER_BATCH_SIZE", self.payment_reminder_batch_size))
+        self.kick_concurrency = int(os.getenv("KICK_CONCURRENCY", self.kick_concurrency))
+        self.kick_burst = int(os.getenv("KICK_BURST", self.kick_burst))
+        self.kick_rate = float(os.getenv("KICK_RATE", self.kick_rate))
+        self.kick_batch_size = int(os.getenv("KICK_BATCH_SIZE", self.kick_batch_size))
+        self.kick_stream_results = os.getenv("KICK_STREAM_RESULTS", "false").lower() == "true"
+        self.kick_pipeline_depth = int(os.getenv("KICK_PIPELINE_DEPTH", self.kick_pipeline_depth))
+        self.kick_shards = int(os.getenv("KICK_SHARDS", self.kick_shards))
+        self.kick_mode = os.getenv("KICK_MODE", self.kick_mode).lower()
+        self.phone_cache_size = int(os.getenv("PHONE_CACHE_SIZE", self.phone_cache_size))
+        self.phone_cache_ttl = float(os.getenv("PHONE_CACHE_TTL", self.phone_cache_ttl))
+        self.phone_cache_negative_ttl = float(os.getenv("PHONE_CACHE_NEGATIVE_TTL", self.phone_cache_negative_ttl))
\ No newline at end of file
@@ -1,31 +1,49 @@
+from src.utils.startup import STARTUP
 from config import Config
-from src.db.mssql import Database
-from src.repository import MemberRepository
-from src.services import MemberService
-from src.handlers import TelegramBotHandler
-from src.workers.telegram import TelegramWorker
-from src.workers.scheduler import Scheduler
 from logs.logger import LOGGER as logger
 
 def main():
     config = Config()
     config.load_from_env()
+
+    # Imported here so that importing main stays cheap; the bot path comes first
+    from src.db.mssql import Database
+    from src.repository import MemberRepository, JobRepository, ReminderRepository
+    from src.services import MemberService, ReminderService
+    from src.handlers import TelegramBotHandler
+    from src.db.job_store import JobStoreDatabase
+    from src.workers.telegram import TelegramWorker
+    from src.workers.scheduler import Scheduler
+    STARTUP.mark("imports")
     
+    # Engines are created on first use; nothing here waits on the network
     db = Database(config)
-    db.connect()
 
     # Initialize repository 
     member_repo = MemberRepository(db)
 
+    # Handlers query through the async engine when enabled
+    async_member_repo = None
+    if config.database_async:
+        from src.db.mssql import AsyncDatabase
+        from src.repository import AsyncMemberRepository
+        async_db = AsyncDatabase(config)
+        async_db.connect()
+        async_member_repo = AsyncMemberRepository(async_db)
+
     # Initialize services
-    member_service = MemberService(config, member_repo)
+    member_service = MemberService(config, member_repo, async_member_repo)
+
+    # The durable job store also records reminder deliveries
+    job_store = JobStoreDatabase(config.job_store_url)
+    reminder_service = ReminderService(config, member_service, ReminderRepository(job_store))
 
     # Initialize Telegram bot and worker
     telegram_bot = TelegramBotHandler(config, member_service)
-    telegram_worker = TelegramWorker(config, member_service)
+    telegram_worker = TelegramWorker(config, member_service, reminder_service)
     
-    # Initialize scheduler
-    scheduler = Scheduler(telegram_worker)
+    # Initialize scheduler backed by the durable job store
+    scheduler = Scheduler(telegram_worker, JobRepository(job_store), config)
     
     logger.info("Starting application...")
     
@@ -33,11 +51,7 @@ def main():
         # Start the scheduler
         scheduler.start()
         logger.info("Scheduler started successfully")
-        
-        # Log next scheduled run
-        next_run = scheduler.get_next_run_time()
-        if next_run:
-            logger.info(f"Next kick task scheduled for: {next_run}")
+        STARTUP.mark("services")
         
         # Run the bot using synchronous approach
         logger.info("Starting Telegram bot...")
@@ -54,9 +68,11 @@ def main():
         # Stop scheduler
         logger.info("Stopping scheduler...")
         scheduler.stop()
+        job_store.close()
         
         # Close database connection
         if db:
+            logger.info(f"Database pool usage: {db.pool_status()}")
             db.close()
             logger.info("Database connection closed")
 
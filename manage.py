@@ -3,19 +3,31 @@
 Management script for Telegram bot operations.
 """
 
+import os
 import sys
+import csv
 import argparse
+from datetime import datetime, timedelta
+from sqlalchemy import select
 from config import Config
 from src.db.mssql import Database
-from src.repository import MemberRepository
-from src.services import MemberService
-from src.workers.telegram import TelegramWorker
+from src.db.indexes import IndexAdvisor
+from src.models.member import MemberORM
+from src.db.job_store import JobStoreDatabase
+from src.repository import MemberRepository, JobRepository, ReminderRepository
+from src.repository.member import membership_end_time
 from logs.logger import LOGGER as logger
 
-def kick_non_members():
+def kick_non_members(shards: int | None = None):
     """Manually trigger the kick non-members task"""
+    # Telegram-side imports are deferred so the DB-only commands start quickly
+    from src.services import MemberService
+    from src.workers.telegram import TelegramWorker
+
     config = Config()
     config.load_from_env()
+    if shards:
+        config.kick_shards = shards
     
     db = Database(config)
     db.connect()
@@ -23,7 +35,7 @@ def kick_non_members():
     try:
         # Initialize repository and services
         member_repo = MemberRepository(db)
-        member_service = MemberService(member_repo)
+        member_service = MemberService(config, member_repo)
         
         # Initialize worker and run kick task
         telegram_worker = TelegramWorker(config, member_service)
@@ -38,14 +50,249 @@ def kick_non_members():
         if db:
             db.close()
 
+def plan_kick(output_path: str, check_group: bool):
+    """Write the members the next kick would remove to a plan file, without kicking anyone"""
+    from src.services import MemberService
+
+    config = Config()
+    config.load_from_env()
+
+    db = Database(config)
+    db.connect()
+    try:
+        member_service = MemberService(config, MemberRepository(db))
+        plan = member_service.run_coroutine(member_service.plan_kick(check_group=check_group))
+        plan.save(output_path)
+        estimate = plan.estimate(config.kick_batch_size)
+        print(f"Wrote kick plan to {output_path}")
+        print(f"  members:   {estimate['members']} (kick {estimate['kick']}, already gone {estimate['clear']})")
+        print(f"  api calls: {estimate['api_calls']} (~{estimate['api_calls'] / config.kick_rate / 60:.1f} min at KICK_RATE={config.kick_rate:g})")
+        print(f"  db writes: {estimate['db_rows']} rows in {estimate['db_batches']} batches")
+    finally:
+        db.close()
+
+def apply_kick_plan(plan_path: str, restart: bool):
+    """Carry out a plan written by kick-plan, resuming where a previous attempt stopped"""
+    from src.services import MemberService, KickPlan
+
+    config = Config()
+    config.load_from_env()
+
+    # Last member Id whose batch was applied; lets an interrupted apply resume
+    progress_path = f"{plan_path}.progress"
+    after_id = 0
+    if not restart and os.path.exists(progress_path):
+        with open(progress_path) as f:
+            after_id = int(f.read().strip() or 0)
+
+    def save_progress(last_id: int) -> None:
+        with open(progress_path, "w") as f:
+            f.write(str(last_id))
+
+    def show_progress(done: int, total: int, report) -> None:
+        print(f"\r{done}/{total} ({done / total:.0%}) kicked={report.kicked} skipped={report.skipped} failed={report.failed} {report.throughput:.1f}/s", end="", flush=True)
+
+    plan = KickPlan.load(plan_path)
+    db = Database(config)
+    db.connect()
+    try:
+        member_service = MemberService(config, MemberRepository(db))
+        if after_id:
+            print(f"Resuming after member {after_id} ({plan.position(after_id)}/{len(plan)} done)")
+        report = member_service.run_coroutine(member_service.apply_kick_plan(plan, after_id, save_progress, show_progress))
+        print()
+        print(f"Kick plan applied: {report.summary()}")
+    finally:
+        db.close()
+
+def reconcile_phones(input_path: str, column: str, output_path: str):
+    """Match a CSV column of phone numbers against active members"""
+    from src.services import MemberService
+
+    config = Config()
+    config.load_from_env()
+    
+    db = Database(config)
+    db.connect()
+    
+    try:
+        member_service = MemberService(config, MemberRepository(db))
+
+        with open(input_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            fieldnames = list(reader.fieldnames or [])
+            rows = list(reader)
+        if column not in fieldnames:
+            print(f"Column '{column}' not found in {input_path}")
+            sys.exit(1)
+
+        phones, members = member_service.match_phones([row[column] for row in rows])
+
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames + ["normalized_phone", "member_id", "membership_time"])
+            writer.writeheader()
+            for row, phone, member in zip(rows, phones, members):
+                row["normalized_phone"] = phone or ""
+                row["member_id"] = member.Id if member else ""
+                row["membership_time"] = member.MembershipTime if member else ""
+                writer.writerow(row)
+
+        matched = sum(1 for member in members if member)
+        invalid = sum(1 for phone in phones if phone is None)
+        print(f"Reconciled {len(rows)} rows: {matched} matched, {invalid} invalid phone numbers. Output: {output_path}")
+        
+    except Exception as e:
+        print(f"Error reconciling phones: {e}")
+        logger.error(f"Error in phone reconciliation: {e}")
+    finally:
+        if db:
+            db.close()
+
+def show_job_runs(limit: int):
+    """Print recent scheduled job runs from the job store"""
+    config = Config()
+    config.load_from_env()
+
+    job_store = JobStoreDatabase(config.job_store_url)
+    job_store.connect()
+    try:
+        runs = JobRepository(job_store).get_runs(limit=limit)
+        if not runs:
+            print("No job runs recorded.")
+        for run in runs:
+            duration = f"{run.DurationSeconds:.1f}s" if run.DurationSeconds is not None else "-"
+            print(f"{run.Id:>5} {run.JobName} {run.RunKey} {run.Status:<9} attempts={run.Attempts} "
+                  f"checkpoint={run.Checkpoint} started={run.StartedAt} duration={duration} {run.Result or run.Error or ''}")
+    finally:
+        job_store.close()
+
+def send_payment_reminders():
+    """Send today's payment reminders now, skipping campaigns that already finished"""
+    from src.services import MemberService, ReminderService
+    from src.workers.telegram import TelegramWorker
+    from src.workers.scheduler import Scheduler, REMINDER_JOB
+
+    config = Config()
+    config.load_from_env()
+
+    db = Database(config)
+    db.connect()
+    job_store = JobStoreDatabase(config.job_store_url)
+    job_store.connect()
+    try:
+        member_service = MemberService(config, MemberRepository(db))
+        reminder_repo = ReminderRepository(job_store)
+        telegram_worker = TelegramWorker(config, member_service, ReminderService(config, member_service, reminder_repo))
+        scheduler = Scheduler(telegram_worker, JobRepository(job_store), config)
+        scheduler.payment_reminder()
+        for run in JobRepository(job_store).get_runs(REMINDER_JOB, limit=len(config.payment_reminder_days)):
+            print(f"{run.RunKey} {run.Status} {reminder_repo.counts(run.RunKey)} {run.Result or run.Error or ''}")
+    finally:
+        job_store.close()
+        db.close()
+
+def manage_indexes(create: bool, show_sql: bool):
+    """Verify, print or create the covering indexes declared on Tbl_Member"""
+    config = Config()
+    config.load_from_env()
+
+    db = Database(config)
+    db.connect()
+    try:
+        advisor = IndexAdvisor(db.engine, MemberORM.__table__)
+        for status in advisor.status():
+            print(f"{'ok     ' if status.exists else 'MISSING'} {status.name} ({', '.join(status.columns)})")
+        if show_sql:
+            for index in advisor.declared():
+                print(f"{advisor.ddl(index)};")
+        if create:
+            created = advisor.create_missing()
+            print(f"Created {len(created)} index(es): {', '.join(created) or '-'}")
+    finally:
+        db.close()
+
+def explain_queries():
+    """Capture actual plans and timings for the MemberRepository hot queries"""
+    config = Config()
+    config.load_from_env()
+
+    db = Database(config)
+    db.connect()
+    try:
+        repo = MemberRepository(db)
+        advisor = IndexAdvisor(db.engine, MemberORM.__table__)
+        with db.session_scope() as session:
+            samples = session.execute(
+                select(MemberORM.Phone, MemberORM.UserTelegramId)
+                .where(MemberORM.IsActived == True, MemberORM.UserTelegramId != None)
+                .limit(100)
+            ).all()
+        if not samples:
+            print("No linked active members to sample queries with.")
+            return
+        phone, telegram_id = samples[0]
+        cut_off = membership_end_time()
+        since = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d 00:00:00.000")
+
+        checks = {
+            "get_by_phone": lambda: repo.get_by_phone(phone),
+            "get_by_phones": lambda: repo.get_by_phones([sample.Phone for sample in samples]),
+            "get_member_by_telegram_id": lambda: repo.get_member_by_telegram_id(telegram_id),
+            "kick_page_full": lambda: next(repo.iter_member_by_membership_time(cut_off, batch_size=config.kick_batch_size), None),
+            "kick_page_incremental": lambda: next(repo.iter_member_by_membership_time(cut_off, batch_size=config.kick_batch_size, since=since), None),
+            "kick_shard_bounds": lambda: repo.get_membership_time_shard_bounds(cut_off, 4),
+        }
+        for name, call in checks.items():
+            try:
+                plans = advisor.explain(name, call)
+            except ValueError as e:
+                print(f"Cannot explain queries: {e}")
+                return
+            for plan in plans:
+                cpu = f" cpu={plan.cpu_ms:.0f}ms" if plan.cpu_ms is not None else ""
+                print(f"{plan.name}: {plan.elapsed_ms:.2f}ms{cpu} rows={plan.rows}")
+                for operator in plan.operators:
+                    print(f"    {operator}")
+                if plan.scans:
+                    print(f"    WARNING: scan instead of seek: {'; '.join(plan.scans)}")
+    finally:
+        db.close()
+
 def main():
     parser = argparse.ArgumentParser(description='Telegram Bot Management Commands')
-    parser.add_argument('command', choices=['kick'], help='Command to run')
+    parser.add_argument('command', choices=['kick', 'kick-plan', 'kick-apply', 'reconcile', 'jobs', 'remind', 'indexes', 'explain'], help='Command to run')
+    parser.add_argument('input', nargs='?', help='CSV file to reconcile (reconcile) or plan file (kick-plan, kick-apply)')
+    parser.add_argument('--column', default='phone', help='CSV column holding phone numbers (reconcile)')
+    parser.add_argument('--output', default='reconciled.csv', help='Where to write the matched CSV (reconcile)')
+    parser.add_argument('--limit', type=int, default=20, help='Number of runs to show (jobs)')
+    parser.add_argument('--shards', type=int, help='Number of kick processes, overrides KICK_SHARDS (kick)')
+    parser.add_argument('--check-group', action='store_true', help='Look every candidate up in the group first (kick-plan)')
+    parser.add_argument('--restart', action='store_true', help='Ignore saved progress and apply the whole plan (kick-apply)')
+    parser.add_argument('--create', action='store_true', help='Create missing indexes (indexes)')
+    parser.add_argument('--sql', action='store_true', help='Print the CREATE INDEX statements (indexes)')
     
     args = parser.parse_args()
     
     if args.command == 'kick':
-        kick_non_members()
+        kick_non_members(args.shards)
+    elif args.command == 'kick-plan':
+        plan_kick(args.input or 'kick-plan.txt', args.check_group)
+    elif args.command == 'kick-apply':
+        if not args.input:
+            parser.error("kick-apply requires a plan file")
+        apply_kick_plan(args.input, args.restart)
+    elif args.command == 'reconcile':
+        if not args.input:
+            parser.error("reconcile requires an input CSV file")
+        reconcile_phones(args.input, args.column, args.output)
+    elif args.command == 'jobs':
+        show_job_runs(args.limit)
+    elif args.command == 'remind':
+        send_payment_reminders()
+    elif args.command == 'indexes':
+        manage_indexes(args.create, args.sql)
+    elif args.command == 'explain':
+        explain_queries()
     else:
         print(f"Unknown command: {args.command}")
         sys.exit(1)
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+import time
+import xml.etree.ElementTree as ET
+from sqlalchemy import Engine, Index, Table, event, inspect
+from sqlalchemy.schema import CreateIndex
+from logs.logger import LOGGER as logger
+
+SHOWPLAN_NS = {"sp": "http://schemas.microsoft.com/sqlserver/2004/07/showplan"}
+ACCESS_OPS = ("Seek", "Scan", "Lookup")
+# Dialects whose actual plans IndexAdvisor.explain can read
+PLAN_DIALECTS = ("mssql", "sqlite")
+
+
+@dataclass
+class IndexStatus:
+    name: str
+    columns: list[str]
+    exists: bool
+
+
+@dataclass
+class QueryPlan:
+    '''Actual plan and timing of one statement issued by a repository method.'''
+    name: str
+    table: str
+    statement: str
+    elapsed_ms: float
+    rows: int
+    operators: list[str] = field(default_factory=list)
+    cpu_ms: float | None = None
+
+    @property
+    def scans(self) -> list[str]:
+        """Operators that read the whole table or one of its indexes end to end."""
+        return [op for op in self.operators if ("Scan" in op or op.startswith("SCAN")) and self.table in op]
+
+
+class IndexAdvisor:
+    """Checks a table's declared indexes against the database and captures query plans.
+
+    Indexes are whatever the ORM model declares in ``__table_args__``; an index
+    that only repeats the primary key is skipped, the clustered key covers it.
+    """
+
+    def __init__(self, engine: Engine, table: Table):
+        self.engine = engine
+        self.table = table
+
+    def declared(self) -> list[Index]:
+        primary_key = [column.name for column in self.table.primary_key.columns]
+        indexes = [ix for ix in self.table.indexes if [column.name for column in ix.columns] != primary_key]
+        return sorted(indexes, key=lambda ix: ix.name)
+
+    def status(self) -> list[IndexStatus]:
+        existing = {ix["name"] for ix in inspect(self.engine).get_indexes(self.table.name, schema=self._schema())}
+        return [IndexStatus(ix.name, [column.name for column in ix.columns], ix.name in existing) for ix in self.declared()]
+
+    def ddl(self, index: Index) -> str:
+        translate = self.engine.get_execution_options().get("schema_translate_map")
+        return str(CreateIndex(index).compile(
+            dialect=self.engine.dialect, schema_translate_map=translate, render_schema_translate=bool(translate)
+        ))
+
+    def create_missing(self) -> list[str]:
+        """Create every declared index that does not exist yet; returns their names."""
+        missing = {status.name for status in self.status() if not status.exists}
+        created = []
+        for index in self.declared():
+            if index.name not in missing:
+                continue
+            logger.info(f"Creating index {index.name} on {self.table.name}")
+            with self.engine.begin() as connection:
+                index.create(connection)
+            created.append(index.name)
+        return created
+
+    def _schema(self) -> str | None:
+        translate = self.engine.get_execution_options().get("schema_translate_map") or {}
+        return translate.get(self.table.schema, self.table.schema)
+
+    @contextmanager
+    def _capture(self) -> Iterator[list[tuple[str, object]]]:
+        statements: list[tuple[str, object]] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(self.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(self.engine, "before_cursor_execute", before_cursor_execute)
+
+    def explain(self, name: str, call: Callable[[], object]) -> list[QueryPlan]:
+        """Run ``call`` once to record the SQL it issues, then re-run each statement with its actual plan.
+
+        Raises ``ValueError`` before running anything if plans can't be captured on this dialect.
+        """
+        if self.engine.dialect.name not in PLAN_DIALECTS:
+            raise ValueError(f"Plan capture is not supported for {self.engine.dialect.name}")
+        with self._capture() as statements:
+            call()
+        return [self._plan(name, statement, parameters) for statement, parameters in statements if statement.lstrip().upper().startswith("SELECT")]
+
+    def _plan(self, name: str, statement: str, parameters) -> QueryPlan:
+        if self.engine.dialect.name == "mssql":
+            return self._mssql_plan(name, statement, parameters)
+        return self._sqlite_plan(name, statement, parameters)
+
+    def _mssql_plan(self, name: str, statement: str, parameters) -> QueryPlan:
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute("SET STATISTICS XML ON")
+            try:
+                started = time.perf_counter()
+                cursor.execute(statement, parameters)
+                rows = len(cursor.fetchall())
+                elapsed = time.perf_counter() - started
+                plan_xml = None
+                while cursor.nextset():
+                    row = cursor.fetchone()
+                    if row and isinstance(row[0], str) and "ShowPlanXML" in row[0][:200]:
+                        plan_xml = row[0]
+            finally:
+                try:
+                    cursor.execute("SET STATISTICS XML OFF")
+                except Exception:
+                    # Never hand a connection that still returns plans back to the pool
+                    raw.invalidate()
+        finally:
+            raw.close()
+
+        plan = QueryPlan(name, self.table.name, statement, round(elapsed * 1000, 2), rows)
+        if plan_xml:
+            root = ET.fromstring(plan_xml)
+            for rel_op in root.iter(f"{{{SHOWPLAN_NS['sp']}}}RelOp"):
+                op = rel_op.get("PhysicalOp", "")
+                if not any(kind in op for kind in ACCESS_OPS):
+                    continue
+                target = rel_op.find(".//sp:Object", SHOWPLAN_NS)
+                if target is None:
+                    plan.operators.append(op)
+                    continue
+                table = target.get("Table", "").strip("[]")
+                index = target.get("Index", "").strip("[]")
+                plan.operators.append(f"{op} {table}.{index}" if index else f"{op} {table}")
+            stats = root.find(".//sp:QueryTimeStats", SHOWPLAN_NS)
+            if stats is not None:
+                plan.cpu_ms = float(stats.get("CpuTime", 0))
+                plan.elapsed_ms = float(stats.get("ElapsedTime", plan.elapsed_ms))
+        return plan
+
+    def _sqlite_plan(self, name: str, statement: str, parameters) -> QueryPlan:
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            operators = [row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()]
+            started = time.perf_counter()
+            rows = len(cursor.execute(statement, parameters).fetchall())
+            elapsed = time.perf_counter() - started
+        finally:
+            raw.close()
+        return QueryPlan(name, self.table.name, statement, round(elapsed * 1000, 2), rows, operators)
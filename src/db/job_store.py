@@ -0,0 +1,58 @@
+from logs import LOGGER as log
+from contextlib import contextmanager
+from typing import Iterator
+import os
+import threading
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, Session
+from src.models.base import Base
+from src.models.job import JobLeaseORM, JobRunORM, JobStateORM
+from src.models.reminder import ReminderDeliveryORM
+
+class JobStoreDatabase:
+    ''' Durable store for scheduler leases, checkpoints, run history and reminder deliveries '''
+    def __init__(self, url: str):
+        self.url = url
+        self.__engine = None
+        self.session_factory = None
+        self._connect_lock = threading.Lock()
+
+    @property
+    def engine(self) -> Engine:
+        return self.__engine
+
+    def connect(self):
+        """Create the engine and the job tables if they don't exist."""
+        with self._connect_lock:
+            if self.__engine is not None:
+                return
+            url = make_url(self.url)
+            if url.get_backend_name() == "sqlite" and url.database:
+                os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+            engine = create_engine(self.url, pool_pre_ping=True)
+            Base.metadata.create_all(engine, tables=[JobLeaseORM.__table__, JobRunORM.__table__, JobStateORM.__table__, ReminderDeliveryORM.__table__])
+            self.session_factory = sessionmaker(bind=engine)
+            self.__engine = engine
+            log.info(f"Job store ready at {url.render_as_string(hide_password=True)}")
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        if self.__engine is None:
+            # The scheduler thread is the first user; startup doesn't wait for the job tables
+            self.connect()
+        session = self.session_factory()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def close(self):
+        if self.__engine is not None:
+            self.__engine.dispose()
+            self.__engine = None
+            self.session_factory = None
@@ -1,51 +1,210 @@
 from logs import LOGGER as log
 from config import Config
+from contextlib import contextmanager
+from typing import Iterator
+import threading
+import time
 from sqlalchemy import text
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from urllib.parse import quote_plus
 
 class Database:
     ''' Database class to handle database connections '''
     def __init__(self, config: Config):
-        encoded_password = quote_plus(config.database_password)
-        self.conn_str = f"mssql+pyodbc://{config.database_user}:{encoded_password}@{config.database_host}/{config.database_name}?driver=ODBC+Driver+17+for+SQL+Server"
-        self.conn = None
+        if config.database_url:
+            self.conn_str = config.database_url
+        else:
+            encoded_password = quote_plus(config.database_password)
+            self.conn_str = f"mssql+pyodbc://{config.database_user}:{encoded_password}@{config.database_host}/{config.database_name}?driver=ODBC+Driver+17+for+SQL+Server"
         self.__engine = None
         self.session = None
+        self.session_factory = None
         self.debug = config.environment == "development"
+        self._wait_lock = threading.Lock()
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._connect_lock = threading.Lock()
 
-    def connect(self):
-        """Open a new database connection."""
-        if self.__engine is None or self.session is None:
-            self.__engine = create_engine(
-                self.conn_str, 
-                pool_size=10,          # keep 10 connections in pool
-                max_overflow=20,       # allow 20 extra if needed (total 30)
-                pool_timeout=30,       # wait max 30s before giving up on getting a connection
-                pool_recycle=1800,     # recycle connections after 30 mins (avoid stale connections)
-                pool_pre_ping=True,    # check if connection is alive before using it
-                echo=self.debug             # set to True for SQL debug logs
-            )
-            Session = sessionmaker(bind=self.__engine)
-            self.session = Session()
+    @property
+    def engine(self) -> Engine:
+        self._ensure_engine()
+        return self.__engine
 
+    def connect(self):
+        """Create the pooled engine now and check that the database answers."""
+        self._ensure_engine()
         self.ping()
 
+    def _ensure_engine(self) -> None:
+        """Create the engine and session factories on first use; no connection is opened here."""
+        if self.__engine is not None:
+            return
+        with self._connect_lock:
+            if self.__engine is not None:
+                return
+            if make_url(self.conn_str).get_backend_name() == "sqlite":
+                engine = self._create_sqlite_engine()
+            else:
+                engine = create_engine(
+                    self.conn_str, 
+                    pool_size=10,          # keep 10 connections in pool
+                    max_overflow=20,       # allow 20 extra if needed (total 30)
+                    pool_timeout=30,       # wait max 30s before giving up on getting a connection
+                    pool_recycle=1800,     # recycle connections after 30 mins (avoid stale connections)
+                    pool_pre_ping=True,    # check if connection is alive before using it
+                    fast_executemany=True, # send executemany batches in one round-trip (pyodbc)
+                    echo=self.debug             # set to True for SQL debug logs
+                )
+            self.session_factory = sessionmaker(bind=engine)
+            # Thread-local session for callers that still use db.session directly
+            self.session = scoped_session(self.session_factory)
+            self.__engine = engine
+
+    def _create_sqlite_engine(self) -> Engine:
+        """SQLite engine for local runs and benchmarks; ``dbo`` tables map to the main schema."""
+        url = make_url(self.conn_str)
+        options = {"connect_args": {"check_same_thread": False}}
+        if url.database in (None, "", ":memory:"):
+            # One shared connection, otherwise every checkout sees an empty database
+            options["poolclass"] = StaticPool
+        return create_engine(
+            self.conn_str,
+            execution_options={"schema_translate_map": {"dbo": None}},
+            echo=self.debug,
+            **options,
+        )
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """Run one unit of work on its own pooled connection.
+
+        Commits when the block exits cleanly, rolls back on error and always
+        returns the connection to the pool.
+        """
+        self._ensure_engine()
+        session = self.session_factory()
+        started = time.perf_counter()
+        try:
+            session.connection()
+            self._record_checkout(time.perf_counter() - started)
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _record_checkout(self, waited: float) -> None:
+        with self._wait_lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def pool_status(self) -> dict[str, float]:
+        """Connection pool usage since startup."""
+        if self.__engine is None:
+            return {}
+        pool = self.__engine.pool
+        # Only QueuePool exposes the counters; other pool classes report 0
+        stat = lambda name: getattr(pool, name, lambda: 0)()
+        return {
+            "size": stat("size"),
+            "checked_out": stat("checkedout"),
+            "checked_in": stat("checkedin"),
+            "overflow": stat("overflow"),
+            "checkouts": self._checkouts,
+            "wait_seconds_total": self._wait_total,
+            "wait_seconds_max": self._wait_max,
+        }
+
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close every session and dispose of the connection pool."""
+        if self.session is not None:
+            self.session.remove()
+            self.session = None
+        if self.__engine is not None:
+            self.__engine.dispose()
+            self.__engine = None
+            self.session_factory = None
 
         log.info("Database connection closed")
     
     def ping(self) -> bool:
         """Check if the DB connection is alive (without reconnecting)."""
         try:
-            self.session.execute(text("SELECT 1"))
+            with self.session_scope() as session:
+                session.execute(text("SELECT 1"))
             log.info("Database connection is alive")
             return True
         except Exception as e:
             log.error(f"Database connection is not alive: {e}")
+            return False
+
+
+class AsyncDatabase:
+    ''' Async database class using SQLAlchemy asyncio with a pluggable driver '''
+    def __init__(self, config: Config):
+        if config.database_url:
+            self.conn_str = self._async_url(config.database_url, config.database_async_driver)
+        else:
+            encoded_password = quote_plus(config.database_password)
+            self.conn_str = f"mssql+{config.database_async_driver}://{config.database_user}:{encoded_password}@{config.database_host}/{config.database_name}?driver=ODBC+Driver+17+for+SQL+Server"
+        self.__engine = None
+        self.session_factory = None
+        self.debug = config.environment == "development"
+
+    @staticmethod
+    def _async_url(database_url: str, driver: str) -> str:
+        """Point ``DATABASE_URL`` at an async driver, so both engines query the same database."""
+        url = make_url(database_url)
+        backend = url.get_backend_name()
+        # SQLite (local runs and tests) goes through aiosqlite; SQL Server through DATABASE_ASYNC_DRIVER
+        url = url.set(drivername=f"{backend}+{'aiosqlite' if backend == 'sqlite' else driver}")
+        return url.render_as_string(hide_password=False)
+
+    def connect(self):
+        """Create the async engine. Connections are opened on first use inside the event loop."""
+        if self.__engine is None:
+            # Imported here so processes without DATABASE_ASYNC never load the asyncio extension
+            from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+            url = make_url(self.conn_str)
+            if url.get_backend_name() == "sqlite":
+                options = {"execution_options": {"schema_translate_map": {"dbo": None}}}
+                if url.database in (None, "", ":memory:"):
+                    options["poolclass"] = StaticPool
+            else:
+                options = {
+                    "pool_size": 10,
+                    "max_overflow": 20,
+                    "pool_timeout": 30,
+                    "pool_recycle": 1800,
+                    "pool_pre_ping": True,
+                }
+            self.__engine = create_async_engine(self.conn_str, echo=self.debug, **options)
+            # Members returned to handlers are read after the session closes
+            self.session_factory = async_sessionmaker(bind=self.__engine, expire_on_commit=False)
+
+    async def close(self):
+        """Dispose of the engine and every pooled connection."""
+        if self.__engine is not None:
+            await self.__engine.dispose()
+            self.__engine = None
+            self.session_factory = None
+
+        log.info("Async database connection closed")
+
+    async def ping(self) -> bool:
+        """Check if the DB connection is alive."""
+        try:
+            async with self.session_factory() as session:
+                await session.execute(text("SELECT 1"))
+            log.info("Async database connection is alive")
+            return True
+        except Exception as e:
+            log.error(f"Async database connection is not alive: {e}")
             return False
\ No newline at end of file
@@ -1,42 +1,145 @@
 from config import Config
 from src.services import MemberService
 from telegram import Update, KeyboardButton, ReplyKeyboardMarkup
+from telegram.constants import ChatMemberStatus
 from telegram.ext import ContextTypes
 from logs.logger import LOGGER as logger
-import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 import datetime as dt
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ChatJoinRequestHandler, ChatMemberHandler
 from src.utils import extract_phone_number
+from src.utils.http_server import HttpServer, Request, Response
+from src.handlers.webhook import TelegramWebhook, offer_inline_reply
+from src.handlers.update_processor import PerUserUpdateProcessor, LatencyStats
+from src.services.invite_pool import InviteLinkPool, expiry_note
+from src.services.membership_sync import MembershipSync
+from src.services.outbound import OutboundScheduler, INTERACTIVE
+from src.utils.metrics import REGISTRY, HANDLER_SECONDS, publish_state
+from src.utils.telegram_request import InstrumentedRequest, create_request
+from src.utils.startup import STARTUP
+import asyncio
+import functools
+import time
+import signal
 
 class TelegramBotHandler:
     def __init__(self, config: Config, member_service: MemberService):
         self.token = config.telegram_bot_token
         self.group_id = config.telegram_group_id
         self.member_service = member_service
+        self.config = config
+        self.app = None
+        self.update_processor = PerUserUpdateProcessor(config.bot_concurrent_updates)
+        self.handler_latency: dict[str, LatencyStats] = {}
+        self.invite_pool: InviteLinkPool | None = None
+        self.metrics_server: HttpServer | None = None
+        self.warm_up_task: asyncio.Task | None = None
+        self.request: InstrumentedRequest | None = None
+        self.membership_sync = MembershipSync(
+            member_service.set_joined_group_async,
+            window=config.membership_sync_window,
+            max_batch=config.membership_sync_max_batch,
+        )
+        self.outbound = OutboundScheduler(
+            rate=config.outbound_rate,
+            burst=config.outbound_burst,
+            chat_rate=config.outbound_chat_rate,
+            concurrency=config.outbound_concurrency,
+            max_retries=config.outbound_max_retries,
+        )
+
+    def _timed(self, callback):
+        """Wrap a handler callback so its latency is recorded under its name."""
+        name = callback.__name__
+        stats = self.handler_latency.setdefault(name, LatencyStats())
+
+        @functools.wraps(callback)
+        async def wrapper(update, context):
+            started = time.perf_counter()
+            try:
+                return await callback(update, context)
+            finally:
+                elapsed = time.perf_counter() - started
+                stats.observe(elapsed)
+                HANDLER_SECONDS.observe(elapsed, handler=name)
+        return wrapper
+
+    def stats(self) -> dict:
+        """Update queue depth, processor state and per-handler latency."""
+        return {
+            "update_queue_depth": self.app.update_queue.qsize() if self.app else 0,
+            "processor": self.update_processor.stats(),
+            "handlers": {name: stats.snapshot() for name, stats in self.handler_latency.items()},
+            "telegram_http": self.request.stats() if self.request else {},
+        }
+
+    def _collect_state(self):
+        """Copy queue, pool and cache state into gauges before each scrape."""
+        processor = self.update_processor.stats()
+        processor.pop("latency", None)
+        processor["update_queue_depth"] = self.app.update_queue.qsize() if self.app else 0
+        publish_state("updates", processor)
+        publish_state("phone_cache", self.member_service.phone_cache.stats())
+        publish_state("db_pool", self.member_service.repo.db.pool_status())
+        if self.invite_pool is not None:
+            publish_state("invite_pool", self.invite_pool.stats())
+        if self.request is not None:
+            publish_state("telegram_http", self.request.stats())
+        publish_state("membership_sync", self.membership_sync.stats())
+        publish_state("outbound", self.outbound.stats())
+        if self.member_service.index is not None:
+            publish_state("member_index", self.member_service.index.stats())
+
+    async def _metrics(self, request: Request) -> Response:
+        return Response(200, REGISTRY.render().encode(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    def build_application(self):
+        """Build the application with its handlers, without starting it."""
+        # The one Bot API pool for handlers, the invite pool and (once attached) the kick task
+        self.request = create_request(self.config)
+        app = (
+            ApplicationBuilder()
+            .token(self.token)
+            .base_url(self.config.telegram_api_base_url)
+            .request(self.request)
+            .get_updates_request(create_request(self.config, get_updates=True))
+            .concurrent_updates(self.update_processor)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
+        self.app = app
+        REGISTRY.add_collector(self._collect_state)
+
+        app.add_handler(CommandHandler("start", self._timed(self.start)))
+        app.add_handler(MessageHandler(filters.CONTACT, self._timed(self.handle_contact)))
+        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self._timed(self.handle_message)))
+        app.add_handler(ChatJoinRequestHandler(callback=self._timed(self.approve_join_request), chat_id=self.group_id))
+        app.add_handler(ChatMemberHandler(self._timed(self.track_chat_member_updates), ChatMemberHandler.CHAT_MEMBER, chat_id=self.group_id))
+        return app
 
     def run(self):
         """Start the Telegram bot."""
         logger.info(f"Initializing bot with token: {self.token[:10]}...")
         
-        app = ApplicationBuilder().token(self.token).build()
-
-        app.add_handler(CommandHandler("start", self.start))
-        app.add_handler(MessageHandler(filters.CONTACT, self.handle_contact))
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
-        # app.add_handler(ChatJoinRequestHandler(callback=self.approve_join_request))
-        # app.add_handler(ChatMemberHandler(self.track_chat_member_updates, ChatMemberHandler.CHAT_MEMBER))
+        app = self.build_application()
 
         logger.info("Starting Telegram bot...")
         try:
-            logger.info("Starting polling...")
-            app.run_polling(
-                drop_pending_updates=True,
-                timeout=30,
-                read_timeout=30,
-                write_timeout=30,
-                connect_timeout=30
-            )
+            if self.config.telegram_mode == "webhook":
+                logger.info(f"Starting webhook server on port {self.config.webhook_port}...")
+                asyncio.run(self._run_webhook(app))
+            else:
+                logger.info("Starting polling...")
+                app.run_polling(
+                    # chat_member updates are only sent when asked for explicitly
+                    allowed_updates=Update.ALL_TYPES,
+                    drop_pending_updates=True,
+                    timeout=30,
+                    read_timeout=30,
+                    write_timeout=30,
+                    connect_timeout=30
+                )
         except KeyboardInterrupt:
             logger.info("Bot stopped by user (Ctrl+C)")
         except Exception as e:
@@ -46,10 +149,123 @@ class TelegramBotHandler:
         finally:
             logger.info("Bot shutdown complete")
 
+    async def _run_webhook(self, app):
+        """Serve updates over HTTP until SIGINT/SIGTERM."""
+        if not self.config.telegram_webhook_url or not self.config.telegram_webhook_secret:
+            raise ValueError("TELEGRAM_WEBHOOK_URL and TELEGRAM_WEBHOOK_SECRET are required in webhook mode")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        server = HttpServer(self.config.webhook_listen, self.config.webhook_port)
+        server.route("POST", self.config.telegram_webhook_path, TelegramWebhook(app, self.config.telegram_webhook_secret).handle)
+        server.route("GET", "/healthz", self._healthz)
+        if self.config.metrics_enabled:
+            server.route("GET", "/metrics", self._metrics)
+
+        await app.initialize()
+        try:
+            # Every replica registers the same URL, so this is safe to repeat as long
+            # as pending updates are kept; dropping them would lose the whole fleet's backlog
+            await app.bot.set_webhook(
+                url=self.config.telegram_webhook_url.rstrip("/") + self.config.telegram_webhook_path,
+                secret_token=self.config.telegram_webhook_secret,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=self.config.telegram_webhook_drop_pending,
+            )
+            await self._post_init(app)
+            await app.start()
+            await server.start()
+            logger.info("Webhook server started")
+            await stop.wait()
+        finally:
+            await server.stop()
+            if app.running:
+                await app.stop()
+            await self._post_shutdown(app)
+            await app.shutdown()
+
+    async def _healthz(self, request: Request) -> Response:
+        return Response(200, b"ok")
+
+    async def _post_init(self, app):
+        if self.config.telegram_mode != "webhook" and self.config.metrics_enabled:
+            # Polling has no HTTP server of its own; serve metrics on the exposed port
+            self.metrics_server = HttpServer(self.config.webhook_listen, self.config.webhook_port)
+            self.metrics_server.route("GET", "/metrics", self._metrics)
+            self.metrics_server.route("GET", "/healthz", self._healthz)
+            await self.metrics_server.start()
+            logger.info(f"Serving /metrics on {self.config.webhook_listen}:{self.config.webhook_port}")
+        await self.outbound.start()
+        if self.config.invite_pool_size > 0:
+            self.invite_pool = InviteLinkPool(
+                app.bot,
+                self.group_id,
+                size=self.config.invite_pool_size,
+                ttl=self.config.invite_link_ttl,
+                min_remaining=self.config.invite_link_min_remaining,
+                outbound=self.outbound,
+            )
+            await self.invite_pool.start()
+        await self.membership_sync.start()
+        if self.member_service.index is not None:
+            # Loads in the background; lookups use the database until it is ready
+            await self.member_service.index.start()
+        # Scheduled kicks now run on this loop and share the warm connection pool
+        self.member_service.attach_bot(app.bot, asyncio.get_running_loop(), self.outbound)
+        # The database is connected lazily; open the first pooled connection off the startup path
+        self.warm_up_task = asyncio.create_task(asyncio.to_thread(self.member_service.warm_up), name="db-warm-up")
+        STARTUP.mark("bot_ready")
+        logger.info(f"Startup: {STARTUP.report()}")
+
+    async def _post_shutdown(self, app):
+        logger.info(f"Update processing stats: {self.stats()}")
+        REGISTRY.remove_collector(self._collect_state)
+        self.member_service.detach_bot()
+        await self.membership_sync.stop()
+        await self.outbound.stop()
+        if self.member_service.index is not None:
+            await self.member_service.index.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+            self.metrics_server = None
+        if self.invite_pool is not None:
+            await self.invite_pool.stop()
+        await self.member_service.aclose()
+
+    async def _get_invite_link(self, context: ContextTypes.DEFAULT_TYPE):
+        """Take a pre-minted single-use link, creating one inline if the pool is off."""
+        if self.invite_pool is not None:
+            return await self.invite_pool.acquire()
+        return await self.outbound.submit(functools.partial(
+            context.bot.create_chat_invite_link,
+            chat_id=self.group_id,
+            member_limit=1,        # one-time use
+            expire_date=datetime.now(dt.timezone.utc) + dt.timedelta(seconds=self.config.invite_link_ttl)
+        ))
+
+    async def _reply(self, update: Update, text: str, reply_markup=None):
+        """Reply to the sender, inside the webhook response when possible."""
+        if offer_inline_reply(
+            "sendMessage",
+            chat_id=update.effective_chat.id,
+            text=text,
+            reply_markup=reply_markup.to_dict() if reply_markup else None,
+        ):
+            return
+        await self.outbound.submit(
+            functools.partial(update.message.reply_text, text, reply_markup=reply_markup),
+            INTERACTIVE,
+            chat_id=update.effective_chat.id,
+        )
+
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         keyboard = [[KeyboardButton("Share my phone number", request_contact=True)]]
         reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True)
-        await update.message.reply_text(
+        await self._reply(
+            update,
             "Hi! Please share your phone number to join the group.",
             reply_markup=reply_markup
         )
@@ -61,43 +277,31 @@ class TelegramBotHandler:
 
         logger.info(f"Received contact from user {user_id} with phone {phone_number}")
 
-        # Run synchronous DB call in thread to avoid blocking
-        member = await asyncio.to_thread(self.member_service.get_member_by_phone, phone_number)
+        member = await self.member_service.get_member_by_phone_async(phone_number)
 
         if member:
             try:
                 if not member.HasJoinedTelegramGroup and member.MembershipTime >= datetime.now():
-                    # Create a link that expires in 1 hour and requires approval
-                    expired_at = datetime.now() + timedelta(hours=1)
+                    invite_link = await self._get_invite_link(context)
 
-                    invite_link = await context.bot.create_chat_invite_link(
-                        chat_id=self.group_id,
-                        member_limit=1,        # one-time use
-                        expire_date=None  # expires in 1 hour
-                    )
+                    await self.member_service.link_telegram_user_async(member, user_id)
 
-                    print("expired_at:", expired_at)
-                    print(f"Invite link created for user {user_id}: {invite_link.invite_link}, expires at {expired_at}")
-                    
-                    member.UserTelegramId = user_id
-                    member.HasJoinedTelegramGroup = True
-                    await asyncio.to_thread(self.member_service.update_member, member)
-
-                    await update.message.reply_text(
-                        f"✅ Approved! Here’s your one-time group link:\n{invite_link.invite_link}\n\nThis link will expire in 1 hour or after one use."
+                    await self._reply(
+                        update,
+                        f"✅ Approved! Here’s your one-time group link:\n{invite_link.invite_link}\n\n{expiry_note(invite_link)}"
                     )
                     logger.info(f"Sent invite link to user {user_id}, link: {invite_link.invite_link}")
                 elif member.HasJoinedTelegramGroup:
-                    await update.message.reply_text("ℹ️ Link already sent, or you have already joined the group.")
+                    await self._reply(update, "ℹ️ Link already sent, or you have already joined the group.")
                     logger.info(f"User {user_id} has already joined the group")
                 elif member.MembershipTime < datetime.now():
-                    await update.message.reply_text("❌ Your membership has expired. Please renew to join the group.")
+                    await self._reply(update, "❌ Your membership has expired. Please renew to join the group.")
                     logger.info(f"User {user_id} has expired membership")
             except Exception as e:
-                await update.message.reply_text("❌ Failed to create invite link. Please contact admin.")
+                await self._reply(update, "❌ Failed to create invite link. Please contact admin.")
                 logger.error(f"Error creating invite link for user {user_id}: {e}")
         else:
-            await update.message.reply_text("❌ You are not registered. Cannot add to the group.")
+            await self._reply(update, "❌ You are not registered. Cannot add to the group.")
             logger.warning(f"User {user_id} with phone {phone_number} is not registered")
 
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -113,47 +317,36 @@ class TelegramBotHandler:
         if phone_number:
             logger.info(f"Extracted phone number {phone_number} from user {user_id}")
             
-            # Run synchronous DB call in thread to avoid blocking
-            member = await asyncio.to_thread(self.member_service.get_member_by_phone, phone_number)
+            member = await self.member_service.get_member_by_phone_async(phone_number)
             
             if member:
                 try:
                     if not member.HasJoinedTelegramGroup and member.MembershipTime >= datetime.now():
-                        # Create a link that expires in 1 hour and requires approval
-                        expired_at = datetime.now() + timedelta(hours=1)
-
-                        invite_link = await context.bot.create_chat_invite_link(
-                            chat_id=self.group_id,
-                            member_limit=1,        # one-time use
-                            expire_date=None  # expires in 1 hour
-                        )
+                        invite_link = await self._get_invite_link(context)
 
-                        print("expired_at:", expired_at)
-                        print(f"Invite link created for user {user_id}: {invite_link.invite_link}, expires at {expired_at}")
-                        
-                        member.UserTelegramId = user_id
-                        member.HasJoinedTelegramGroup = True
-                        await asyncio.to_thread(self.member_service.update_member, member)
+                        await self.member_service.link_telegram_user_async(member, user_id)
 
-                        await update.message.reply_text(
-                            f"✅ Approved! Here's your one-time group link:\n{invite_link.invite_link}\n\nThis link will expire in 1 hour or after one use."
+                        await self._reply(
+                            update,
+                            f"✅ Approved! Here's your one-time group link:\n{invite_link.invite_link}\n\n{expiry_note(invite_link)}"
                         )
                         logger.info(f"Sent invite link to user {user_id}, link: {invite_link.invite_link}")
                     elif member.HasJoinedTelegramGroup:
-                        await update.message.reply_text("ℹ️ Link already sent, or you have already joined the group.")
+                        await self._reply(update, "ℹ️ Link already sent, or you have already joined the group.")
                         logger.info(f"User {user_id} has already joined the group")
                     elif member.MembershipTime < datetime.now():
-                        await update.message.reply_text("❌ Your membership has expired. Please renew to join the group.")
+                        await self._reply(update, "❌ Your membership has expired. Please renew to join the group.")
                         logger.info(f"User {user_id} has expired membership")
                 except Exception as e:
-                    await update.message.reply_text("❌ Failed to create invite link. Please contact admin.")
+                    await self._reply(update, "❌ Failed to create invite link. Please contact admin.")
                     logger.error(f"Error creating invite link for user {user_id}: {e}")
             else:
-                await update.message.reply_text("❌ Phone number not found in our records. Please make sure you're using the correct phone number.")
+                await self._reply(update, "❌ Phone number not found in our records. Please make sure you're using the correct phone number.")
                 logger.warning(f"User {user_id} with phone {phone_number} is not registered")
         else:
             # Not a phone number, provide help
-            await update.message.reply_text(
+            await self._reply(
+                update,
                 "Please send your phone number in one of these formats:\n"
                 "• +628123456789\n"
                 "• 08123456789\n"
@@ -178,37 +371,36 @@ class TelegramBotHandler:
 
         try:
             # check your member service (runs in thread pool)
-            member = await asyncio.to_thread(
-                self.member_service.get_member_by_user_telegram_id,
-                user_id
-            )
+            member = await self.member_service.get_member_by_user_telegram_id_async(user_id)
 
             if not member or member.HasJoinedTelegramGroup:
                 logger.warning(f"User {user_id} is not a registered member, declining join request")
-                await context.bot.decline_chat_join_request(
+                await self.outbound.submit(functools.partial(
+                    context.bot.decline_chat_join_request,
                     chat_id=self.group_id,
                     user_id=user_id
-                )
+                ))
                 return
             
             # Check if membership is still valid
             if member.MembershipTime < datetime.now():
                 logger.warning(f"User {user_id} has expired membership, declining join request")
-                await context.bot.decline_chat_join_request(
+                await self.outbound.submit(functools.partial(
+                    context.bot.decline_chat_join_request,
                     chat_id=self.group_id,
                     user_id=user_id
-                )
+                ))
                 return
             
             # approve request
-            await context.bot.approve_chat_join_request(
+            await self.outbound.submit(functools.partial(
+                context.bot.approve_chat_join_request,
                 chat_id=self.group_id,
                 user_id=user_id
-            )
+            ))
             
-            # Update member status
-            member.HasJoinedTelegramGroup = True
-            await asyncio.to_thread(self.member_service.update_member, member)
+            # Written with the next batch of join/leave events
+            self.membership_sync.record(user_id, True)
             
             logger.info(f"Approved join request for user {user_id}")
 
@@ -219,44 +411,23 @@ class TelegramBotHandler:
 
     async def track_chat_member_updates(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Track when users join or leave the group"""
-        try:
-            chat_member_update = update.chat_member
-            if not chat_member_update:
-                return
-                
-            user = chat_member_update.from_user
-            new_status = chat_member_update.new_chat_member.status
-            old_status = chat_member_update.old_chat_member.status
-            
-            # Check if user joined the group
-            if old_status in ['left', 'kicked'] and new_status in ['member', 'administrator', 'creator']:
-                logger.info(f"User {user.id} ({user.first_name}) joined the group")
-                
-                # Update member status in database
-                member = await asyncio.to_thread(
-                    self.member_service.get_member_by_user_telegram_id,
-                    user.id
-                )
-                
-                if member:
-                    member.HasJoinedTelegramGroup = True
-                    await asyncio.to_thread(self.member_service.update_member, member)
-                    logger.info(f"Updated HasJoinedTelegramGroup for user {user.id}")
-                    
-            # Check if user left the group
-            elif old_status in ['member', 'administrator'] and new_status in ['left', 'kicked']:
-                logger.info(f"User {user.id} ({user.first_name}) left the group")
-                
-                # Update member status in database
-                member = await asyncio.to_thread(
-                    self.member_service.get_member_by_user_telegram_id,
-                    user.id
-                )
-                
-                if member:
-                    member.HasJoinedTelegramGroup = False
-                    await asyncio.to_thread(self.member_service.update_member, member)
-                    logger.info(f"Updated HasJoinedTelegramGroup for user {user.id}")
-                    
-        except Exception as e:
-            logger.error(f"Error in track_chat_member_updates: {e}")
\ No newline at end of file
+        chat_member_update = update.chat_member
+        if not chat_member_update:
+            return
+
+        was_member = self._in_group(chat_member_update.old_chat_member)
+        is_member = self._in_group(chat_member_update.new_chat_member)
+        if was_member == is_member:
+            return
+
+        # from_user is whoever made the change (an admin for kicks); the subject is new_chat_member.user
+        user = chat_member_update.new_chat_member.user
+        logger.info(f"User {user.id} ({user.first_name}) {'joined' if is_member else 'left'} the group")
+        self.membership_sync.record(user.id, is_member)
+
+    @staticmethod
+    def _in_group(chat_member) -> bool:
+        if chat_member.status in (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.MEMBER):
+            return True
+        # Restricted users can be in the group or not
+        return chat_member.status == ChatMemberStatus.RESTRICTED and chat_member.is_member
@@ -0,0 +1,112 @@
+from typing import Any, Awaitable, Hashable
+import asyncio
+import time
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from src.utils.metrics import UPDATE_SECONDS
+
+
+class LatencyStats:
+    '''Running count/total/max of observed durations.'''
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.max,
+        }
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently while keeping each user's updates in order.
+
+    Up to ``max_concurrent_updates`` updates run at once, but two updates from
+    the same user never overlap: the second waits for the first to finish, so a
+    double-sent phone number cannot race two invite links.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._waiters: dict[Hashable, int] = {}
+        self.waiting = 0
+        self.active = 0
+        self.processed = 0
+        self.latency = LatencyStats()
+
+    @staticmethod
+    def _ordering_key(update: object) -> Hashable | None:
+        if isinstance(update, Update):
+            if update.effective_user:
+                return update.effective_user.id
+            if update.effective_chat:
+                return update.effective_chat.id
+        return None
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:  # type: ignore[misc]
+        """Wait behind the user's earlier updates first, then for a concurrency slot.
+
+        The base class takes the slot before ``do_process_update``; queuing on
+        the user's lock inside it would let one chatty user hold every slot.
+        """
+        key = self._ordering_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        self.waiting += 1
+        acquired = False
+        try:
+            async with lock:
+                self.waiting -= 1
+                acquired = True
+                await super().process_update(update, coroutine)
+        finally:
+            if not acquired:
+                self.waiting -= 1
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                # Last update for this user; drop the lock so the dict stays small
+                del self._waiters[key]
+                del self._locks[key]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        await self._run(coroutine)
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        self.active += 1
+        started = time.perf_counter()
+        try:
+            await coroutine
+        finally:
+            self.active -= 1
+            self.processed += 1
+            elapsed = time.perf_counter() - started
+            self.latency.observe(elapsed)
+            UPDATE_SECONDS.observe(elapsed)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrent_updates": self.max_concurrent_updates,
+            "active": self.active,
+            "waiting_on_user": self.waiting,
+            "processed": self.processed,
+            "latency": self.latency.snapshot(),
+        }
@@ -0,0 +1,65 @@
+from contextvars import ContextVar
+from typing import Any
+import hmac
+import json
+from telegram import Update
+from telegram.ext import Application
+from src.utils.http_server import Request, Response
+from logs.logger import LOGGER as logger
+
+
+class InlineReply:
+    '''Slot for the one Bot API call that may ride on a webhook response.'''
+    def __init__(self) -> None:
+        self.open = True
+        self.payload: dict[str, Any] | None = None
+
+
+_inline_reply: ContextVar[InlineReply | None] = ContextVar("inline_reply", default=None)
+
+
+def offer_inline_reply(method: str, **params: Any) -> bool:
+    """Answer the current webhook request with ``method`` instead of calling the API.
+
+    Returns ``False`` when there is no webhook request in flight or its slot is
+    already taken; the caller must then make the API call itself. Telegram does
+    not report the outcome of inline calls, so only use this for replies whose
+    result is not needed.
+    """
+    slot = _inline_reply.get()
+    if slot is None or not slot.open or slot.payload is not None:
+        return False
+    slot.payload = {"method": method, **{k: v for k, v in params.items() if v is not None}}
+    return True
+
+
+class TelegramWebhook:
+    '''Receives updates over HTTP and feeds them to the Application.'''
+    def __init__(self, app: Application, secret_token: str):
+        self.app = app
+        self.secret_token = secret_token
+
+    async def handle(self, request: Request) -> Response:
+        received = request.headers.get("x-telegram-bot-api-secret-token", "")
+        if not hmac.compare_digest(received.encode(), self.secret_token.encode()):
+            logger.warning("Rejected webhook request with invalid secret token")
+            return Response(403)
+
+        try:
+            update = Update.de_json(json.loads(request.body), self.app.bot)
+        except Exception as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return Response(400)
+
+        slot = InlineReply()
+        token = _inline_reply.set(slot)
+        try:
+            # Goes through the update processor, so concurrency limits still apply
+            await self.app.update_processor.process_update(update, self.app.process_update(update))
+        finally:
+            slot.open = False
+            _inline_reply.reset(token)
+
+        if slot.payload is None:
+            return Response(200)
+        return Response(200, json.dumps(slot.payload).encode(), content_type="application/json")
@@ -0,0 +1,54 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from .base import Base
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Index
+
+
+class JobLeaseORM(Base):
+    __tablename__ = 'Tbl_JobLease'
+
+    JobName = Column(String(100), primary_key=True)
+    Owner = Column(String(200), nullable=True)
+    LeaseExpiresAt = Column(DateTime, nullable=True)
+
+class JobRunORM(Base):
+    __tablename__ = 'Tbl_JobRun'
+    __table_args__ = (Index('IX_JobRun_JobName_RunKey', 'JobName', 'RunKey'),)
+
+    Id = Column(Integer, primary_key=True, autoincrement=True)
+    JobName = Column(String(100), nullable=False)
+    RunKey = Column(String(100), nullable=False)
+    Status = Column(String(20), nullable=False)
+    Owner = Column(String(200), nullable=True)
+    Attempts = Column(Integer, nullable=False, default=0)
+    Checkpoint = Column(Integer, nullable=True)
+    StartedAt = Column(DateTime, nullable=True)
+    FinishedAt = Column(DateTime, nullable=True)
+    DurationSeconds = Column(Float, nullable=True)
+    Result = Column(Text, nullable=True)
+    Error = Column(Text, nullable=True)
+
+class JobStateORM(Base):
+    __tablename__ = 'Tbl_JobState'
+
+    Name = Column(String(200), primary_key=True)
+    Value = Column(String(200), nullable=True)
+    UpdatedAt = Column(DateTime, nullable=True)
+
+class JobRun(BaseModel):
+    Id: int
+    JobName: str
+    RunKey: str
+    Status: str
+    Owner: Optional[str] = None
+    Attempts: int = 0
+    Checkpoint: Optional[int] = None
+    StartedAt: Optional[datetime] = None
+    FinishedAt: Optional[datetime] = None
+    DurationSeconds: Optional[float] = None
+    Result: Optional[str] = None
+    Error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
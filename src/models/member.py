@@ -1,13 +1,35 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from dataclasses import dataclass
 from .base import Base
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, text
 
 
 class MemberORM(Base):
     __tablename__ = 'Tbl_Member'
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        # get_by_phone / get_by_phones: seek on Phone, covering the MemberRow columns
+        Index(
+            "IX_Member_Phone_Active", "Phone", "IsMembership", "IsActived",
+            mssql_include=["UserTelegramId", "MembershipTime", "HasJoinedTelegramGroup"],
+        ),
+        # Kick scans: only rows still linked to Telegram, so kicked members drop out of the index
+        Index(
+            "IX_Member_MembershipTime_Linked", "IsActived", "MembershipTime",
+            mssql_include=["UserTelegramId", "HasJoinedTelegramGroup", "Phone"],
+            mssql_where=text("UserTelegramId IS NOT NULL"),
+            sqlite_where=text("UserTelegramId IS NOT NULL"),
+        ),
+        # get_member_by_telegram_id and join-request checks
+        Index(
+            "IX_Member_UserTelegramId", "UserTelegramId", "IsMembership", "IsActived",
+            mssql_include=["MembershipTime", "HasJoinedTelegramGroup"],
+            mssql_where=text("UserTelegramId IS NOT NULL"),
+            sqlite_where=text("UserTelegramId IS NOT NULL"),
+        ),
+        {"schema": "dbo"},
+    )
 
     Id = Column(Integer, primary_key=True, index=True)
     FirstName = Column(String, nullable=True)
@@ -43,4 +65,31 @@ class Member(BaseModel):
     UserTelegramId: Optional[int] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+
+@dataclass(slots=True)
+class MemberRow:
+    '''Compact projection of Tbl_Member for batch jobs (kick, reconciliation).
+
+    Built positionally from a ``select(*MEMBER_ROW_COLUMNS)`` row, so there is
+    no ORM identity map and no pydantic validation per row.
+    '''
+    Id: int
+    UserTelegramId: Optional[int] = None
+    MembershipTime: Optional[datetime] = None
+    HasJoinedTelegramGroup: Optional[bool] = None
+    Phone: Optional[str] = None
+
+    @classmethod
+    def from_member(cls, member: "Member") -> "MemberRow":
+        return cls(member.Id, member.UserTelegramId, member.MembershipTime, member.HasJoinedTelegramGroup, member.Phone)
+
+
+MEMBER_ROW_COLUMNS = (
+    MemberORM.Id,
+    MemberORM.UserTelegramId,
+    MemberORM.MembershipTime,
+    MemberORM.HasJoinedTelegramGroup,
+    MemberORM.Phone,
+)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from .base import Base
+
+SENDING = "sending"  # claimed; a crash here leaves it unknown whether the message went out
+SENT = "sent"
+FAILED = "failed"
+BLOCKED = "blocked"  # the user blocked the bot or never started it
+
+
+class ReminderDeliveryORM(Base):
+    '''One reminder message per member and campaign.
+
+    The (Campaign, MemberId) key is claimed before the message is sent, so a
+    retried or resumed campaign never messages the same member twice.
+    '''
+    __tablename__ = 'Tbl_ReminderDelivery'
+    __table_args__ = (Index('IX_ReminderDelivery_Campaign_Status', 'Campaign', 'Status'),)
+
+    Campaign = Column(String(100), primary_key=True)
+    MemberId = Column(Integer, primary_key=True, autoincrement=False)
+    UserTelegramId = Column(BigInteger, nullable=False)
+    Status = Column(String(20), nullable=False)
+    Error = Column(String(500), nullable=True)
+    ClaimedAt = Column(DateTime, nullable=True)
+    SentAt = Column(DateTime, nullable=True)
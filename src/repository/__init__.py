@@ -3,5 +3,8 @@
 '''
 
 from .member import MemberRepository
+from .member_async import AsyncMemberRepository
+from .job import JobRepository
+from .reminder import ReminderRepository
 
-__all__ = ['MemberRepository']
\ No newline at end of file
+__all__ = ['MemberRepository', 'AsyncMemberRepository', 'JobRepository', 'ReminderRepository']
\ No newline at end of file
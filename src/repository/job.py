@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import IntegrityError
+from src.db.job_store import JobStoreDatabase
+from src.models.job import JobLeaseORM, JobRunORM, JobStateORM, JobRun
+
+class JobRepository:
+    def __init__(self, db: JobStoreDatabase):
+        self.db: JobStoreDatabase = db
+
+    def acquire_lease(self, job_name: str, owner: str, ttl_seconds: int) -> bool:
+        """Claim ``job_name`` for ``owner`` unless another live owner holds it.
+
+        The claim is a single conditional UPDATE, so when several instances race
+        exactly one of them sees its row updated.
+        """
+        self._ensure_lease_row(job_name)
+        now = datetime.now()
+        with self.db.session_scope() as session:
+            result = session.execute(
+                update(JobLeaseORM)
+                .where(
+                    JobLeaseORM.JobName == job_name,
+                    or_(JobLeaseORM.Owner == None, JobLeaseORM.Owner == owner, JobLeaseORM.LeaseExpiresAt < now),
+                )
+                .values(Owner=owner, LeaseExpiresAt=now + timedelta(seconds=ttl_seconds))
+            )
+            return result.rowcount == 1
+
+    def renew_lease(self, job_name: str, owner: str, ttl_seconds: int) -> bool:
+        with self.db.session_scope() as session:
+            result = session.execute(
+                update(JobLeaseORM)
+                .where(JobLeaseORM.JobName == job_name, JobLeaseORM.Owner == owner)
+                .values(LeaseExpiresAt=datetime.now() + timedelta(seconds=ttl_seconds))
+            )
+            return result.rowcount == 1
+
+    def release_lease(self, job_name: str, owner: str) -> None:
+        with self.db.session_scope() as session:
+            session.execute(
+                update(JobLeaseORM)
+                .where(JobLeaseORM.JobName == job_name, JobLeaseORM.Owner == owner)
+                .values(Owner=None, LeaseExpiresAt=None)
+            )
+
+    def _ensure_lease_row(self, job_name: str) -> None:
+        with self.db.session_scope() as session:
+            if session.get(JobLeaseORM, job_name) is not None:
+                return
+        try:
+            with self.db.session_scope() as session:
+                session.add(JobLeaseORM(JobName=job_name))
+        except IntegrityError:
+            pass  # another instance created it first
+
+    def get_run(self, job_name: str, run_key: str) -> JobRun | None:
+        """Latest run recorded for ``run_key``."""
+        with self.db.session_scope() as session:
+            run = session.execute(
+                select(JobRunORM).where(JobRunORM.JobName == job_name, JobRunORM.RunKey == run_key).order_by(JobRunORM.Id.desc()).limit(1)
+            ).scalars().first()
+            return JobRun.model_validate(run) if run else None
+
+    def start_run(self, job_name: str, run_key: str, owner: str) -> JobRun:
+        """Start a run for ``run_key``, resuming an unfinished one if there is one."""
+        now = datetime.now()
+        with self.db.session_scope() as session:
+            run = session.execute(
+                select(JobRunORM)
+                .where(JobRunORM.JobName == job_name, JobRunORM.RunKey == run_key, JobRunORM.Status != "succeeded")
+                .order_by(JobRunORM.Id.desc())
+                .limit(1)
+            ).scalars().first()
+            if run is None:
+                run = JobRunORM(JobName=job_name, RunKey=run_key, Attempts=0, StartedAt=now)
+                session.add(run)
+            run.Status = "running"
+            run.Owner = owner
+            run.Attempts += 1
+            run.Error = None
+            run.FinishedAt = None
+            session.flush()
+            return JobRun.model_validate(run)
+
+    def checkpoint(self, run_id: int, last_id: int) -> None:
+        with self.db.session_scope() as session:
+            session.execute(update(JobRunORM).where(JobRunORM.Id == run_id).values(Checkpoint=last_id))
+
+    def finish_run(self, run_id: int, status: str, result: str | None = None, error: str | None = None) -> None:
+        now = datetime.now()
+        with self.db.session_scope() as session:
+            run = session.get(JobRunORM, run_id)
+            if run is None:
+                return
+            run.Status = status
+            run.FinishedAt = now
+            run.DurationSeconds = (now - run.StartedAt).total_seconds() if run.StartedAt else None
+            run.Result = result
+            run.Error = error
+
+    def get_runs(self, job_name: str | None = None, limit: int = 20) -> list[JobRun]:
+        """Most recent runs first."""
+        stmt = select(JobRunORM).order_by(JobRunORM.Id.desc()).limit(limit)
+        if job_name:
+            stmt = stmt.where(JobRunORM.JobName == job_name)
+        with self.db.session_scope() as session:
+            return [JobRun.model_validate(run) for run in session.execute(stmt).scalars()]
+
+    def get_state(self, name: str) -> str | None:
+        with self.db.session_scope() as session:
+            state = session.get(JobStateORM, name)
+            return state.Value if state else None
+
+    def set_state(self, name: str, value: str | None) -> None:
+        with self.db.session_scope() as session:
+            state = session.get(JobStateORM, name)
+            if state is None:
+                state = JobStateORM(Name=name)
+                session.add(state)
+            state.Value = value
+            state.UpdatedAt = datetime.now()
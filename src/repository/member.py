@@ -1,42 +1,318 @@
+from typing import Any, Iterator
+from datetime import datetime
+from sqlalchemy import select, update, func, or_, text, ColumnElement
 from src.db.mssql import Database
-from src.models.member import Member, MemberORM
+from src.models.member import Member, MemberORM, MemberRow, MEMBER_ROW_COLUMNS
+from src.utils.metrics import DB_QUERY_SECONDS, timed
+
+def membership_end_time() -> str:
+    """Cut-off for the daily kick: memberships that ended before today."""
+    # 2025-10-31 00:00:00.000
+    return datetime.now().strftime("%Y-%m-%d 00:00:00.000")
+
+def update_chunks(changes: list[tuple[int, dict[str, Any]]], chunk_size: int) -> Iterator[list[dict[str, Any]]]:
+    """Group ``(Id, changed fields)`` pairs by the columns they touch and split them into executemany chunks."""
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for member_id, fields in changes:
+        if not fields:
+            continue
+        groups.setdefault(tuple(sorted(fields)), []).append({"Id": member_id, **fields})
+    for rows in groups.values():
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
 
 class MemberRepository:
     def __init__(self, db: Database):
         self.db: Database = db
 
-    def get_member_by_id(self, member_id: int) -> Member:
-        return self.db.session.query(Member).filter(Member.Id == member_id).first()
-    
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_member_by_id")
+    def get_member_by_id(self, member_id: int) -> Member | None:
+        with self.db.session_scope() as session:
+            member_orm = session.query(MemberORM).filter(MemberORM.Id == member_id).first()
+            return Member.model_validate(member_orm) if member_orm else None
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_members")
     def get_members(self, limit: int = 20) -> list[Member]:
-        return self.db.session.query(Member).limit(limit).all()
-    
+        with self.db.session_scope() as session:
+            return [Member.model_validate(m) for m in session.query(MemberORM).limit(limit).all()]
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_non_members")
     def get_non_members(self, limit: int = 20, offset: int = 0) -> list[Member]:
-        non_members = self.db.session.query(MemberORM).filter(MemberORM.IsMembership == False, MemberORM.IsActived == True).order_by(MemberORM.Id).limit(limit).offset(offset).all()
-        return [Member.model_validate(m) for m in non_members]
-    
+        with self.db.session_scope() as session:
+            non_members = session.query(MemberORM).filter(MemberORM.IsMembership == False, MemberORM.IsActived == True).order_by(MemberORM.Id).limit(limit).offset(offset).all()
+            return [Member.model_validate(m) for m in non_members]
+
+    def iter_non_members(self, batch_size: int = 100, after_id: int = 0, stream: bool = False) -> Iterator[list[MemberRow]]:
+        criteria = [MemberORM.IsMembership == False, MemberORM.IsActived == True]
+        return self._iter_batches(criteria, batch_size, after_id, stream)
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_by_phone")
     def get_by_phone(self, phone: str) -> Member | None:
-        member_orm = self.db.session.query(MemberORM).filter(MemberORM.Phone == phone, MemberORM.IsMembership == True, MemberORM.IsActived == True).order_by(MemberORM.Id.desc()).first()
-        if member_orm:
-            return Member.model_validate(member_orm)
-        return None
-    
+        with self.db.session_scope() as session:
+            member_orm = session.query(MemberORM).filter(MemberORM.Phone == phone, MemberORM.IsMembership == True, MemberORM.IsActived == True).order_by(MemberORM.Id.desc()).first()
+            if member_orm:
+                return Member.model_validate(member_orm)
+            return None
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_by_phones")
+    def get_by_phones(self, phones: list[str], chunk_size: int = 1000) -> dict[str, MemberRow]:
+        """Look up many normalized phones at once.
+
+        Phones are sent in ``IN (...)`` chunks to stay under SQL Server's 2100
+        parameter limit. When several active members share a phone, the newest
+        (highest Id) wins, as in ``get_by_phone``.
+        """
+        found: dict[str, MemberRow] = {}
+        for start in range(0, len(phones), chunk_size):
+            chunk = phones[start:start + chunk_size]
+            stmt = select(*MEMBER_ROW_COLUMNS).where(MemberORM.Phone.in_(chunk), MemberORM.IsMembership == True, MemberORM.IsActived == True).order_by(MemberORM.Id.asc())
+            with self.db.session_scope() as session:
+                for row in session.execute(stmt):
+                    found[row.Phone] = MemberRow(*row)
+        return found
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_member_by_membership_time")
     def get_member_by_membership_time(self, membership_time: str, limit: int, offset: int) -> list[Member]:
-        if limit is not None and offset is not None:
-            members = self.db.session.query(MemberORM).filter(MemberORM.MembershipTime <= membership_time, MemberORM.IsActived == True).order_by(MemberORM.Id.asc()).limit(limit).offset(offset).all()
-        else:
-            members = self.db.session.query(MemberORM).filter(MemberORM.MembershipTime <= membership_time, MemberORM.IsActived == True).all()
-        return [Member.model_validate(m) for m in members]
-    
+        with self.db.session_scope() as session:
+            if limit is not None and offset is not None:
+                members = session.query(MemberORM).filter(MemberORM.MembershipTime <= membership_time, MemberORM.IsActived == True).order_by(MemberORM.Id.asc()).limit(limit).offset(offset).all()
+            else:
+                members = session.query(MemberORM).filter(MemberORM.MembershipTime <= membership_time, MemberORM.IsActived == True).all()
+            return [Member.model_validate(m) for m in members]
+
+    def iter_member_by_membership_time(self, membership_time: str, batch_size: int = 100, after_id: int = 0, stream: bool = False, until_id: int | None = None, since: str | None = None) -> Iterator[list[MemberRow]]:
+        criteria = self._expired_criteria(membership_time, since)
+        if until_id is not None:
+            criteria.append(MemberORM.Id <= until_id)
+        return self._iter_batches(criteria, batch_size, after_id, stream)
+
+    def iter_members_expiring_between(self, since: datetime, until: datetime, batch_size: int = 100, after_id: int = 0) -> Iterator[list[MemberRow]]:
+        """Active, linked members whose membership ends in ``[since, until)``, in Id-keyset pages.
+
+        Half-open and bound as datetimes, so a membership ending exactly at
+        midnight belongs to that day on every backend; the kick's inclusive
+        string cut-off (``_expired_criteria``) is not reused here.
+        """
+        criteria = [
+            MemberORM.MembershipTime >= since,
+            MemberORM.MembershipTime < until,
+            MemberORM.IsActived == True,
+            MemberORM.UserTelegramId != None,
+        ]
+        return self._iter_batches(criteria, batch_size, after_id, stream=False)
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_membership_time_shard_bounds")
+    def get_membership_time_shard_bounds(self, membership_time: str, shards: int, after_id: int = 0, since: str | None = None) -> list[int]:
+        """Split expired members after ``after_id`` into ``shards`` ranges of similar size.
+
+        Returns the last Id of each non-empty range in ascending order, computed
+        with one ``NTILE`` window query so shards stay balanced even when Ids
+        are unevenly spread.
+        """
+        tile = func.ntile(shards).over(order_by=MemberORM.Id).label("tile")
+        tiles = (
+            select(MemberORM.Id, tile)
+            .where(*self._expired_criteria(membership_time, since), MemberORM.Id > after_id)
+            .subquery()
+        )
+        stmt = select(func.max(tiles.c.Id)).group_by(tiles.c.tile).order_by(func.max(tiles.c.Id))
+        with self.db.session_scope() as session:
+            return list(session.execute(stmt).scalars())
+
+    def stream_kick_candidates(self, membership_time: str, since: str | None = None, batch_size: int = 10000) -> Iterator[list[tuple[int, int]]]:
+        """``(Id, UserTelegramId)`` of every expired, linked member, in Id order.
+
+        One statement read through a server-side cursor, ``batch_size`` rows at
+        a time; used to build a kick plan without paging.
+        """
+        stmt = (
+            select(MemberORM.Id, MemberORM.UserTelegramId)
+            .where(*self._expired_criteria(membership_time, since))
+            .order_by(MemberORM.Id.asc())
+        )
+        with self.db.session_scope() as session:
+            result = session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+            partitions = result.partitions()
+            while True:
+                with DB_QUERY_SECONDS.time(method="MemberRepository.stream_kick_candidates"):
+                    partition = next(partitions, None)
+                if partition is None:
+                    break
+                yield [tuple(row) for row in partition]
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_expired_ids")
+    def get_expired_ids(self, ids: list[int], membership_time: str) -> set[int]:
+        """The subset of ``ids`` that still match the kick criteria (renewals drop out)."""
+        if not ids:
+            return set()
+        stmt = select(MemberORM.Id).where(*self._expired_criteria(membership_time), MemberORM.Id.in_(ids))
+        with self.db.session_scope() as session:
+            return set(session.execute(stmt).scalars())
+
+    @staticmethod
+    def _expired_criteria(membership_time: str, since: str | None = None) -> list[ColumnElement[bool]]:
+        """Active members still linked to Telegram whose membership ended by ``membership_time``.
+
+        With ``since`` only memberships that ended after it are matched, which
+        is what an incremental kick run needs.
+        """
+        criteria = [
+            MemberORM.MembershipTime <= membership_time,
+            MemberORM.IsActived == True,
+            MemberORM.UserTelegramId != None,
+        ]
+        if since is not None:
+            criteria.append(MemberORM.MembershipTime > since)
+        return criteria
+
+    def _iter_batches(self, criteria: list[ColumnElement[bool]], batch_size: int, after_id: int, stream: bool) -> Iterator[list[MemberRow]]:
+        """Yield members matching ``criteria`` in Id order, ``batch_size`` at a time.
+
+        By default every page is a keyset query (``Id > last_id``) in its own
+        session, so each page costs the same and rows updated while paging are
+        neither skipped nor repeated. With ``stream`` the rows come from a single
+        server-side cursor that holds one pooled connection until exhausted.
+        Only the ``MemberRow`` columns are fetched.
+        """
+        if stream:
+            yield from self._stream_batches(criteria, batch_size, after_id)
+            return
+
+        last_id = after_id
+        while True:
+            stmt = select(*MEMBER_ROW_COLUMNS).where(*criteria, MemberORM.Id > last_id).order_by(MemberORM.Id.asc()).limit(batch_size)
+            with DB_QUERY_SECONDS.time(method="MemberRepository.iter_batches"), self.db.session_scope() as session:
+                page = [MemberRow(*row) for row in session.execute(stmt)]
+            if not page:
+                break
+            last_id = page[-1].Id
+            yield page
+
+    def _stream_batches(self, criteria: list[ColumnElement[bool]], batch_size: int, after_id: int) -> Iterator[list[MemberRow]]:
+        stmt = select(*MEMBER_ROW_COLUMNS).where(*criteria, MemberORM.Id > after_id).order_by(MemberORM.Id.asc())
+        with self.db.session_scope() as session:
+            result = session.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+            partitions = result.partitions()
+            while True:
+                with DB_QUERY_SECONDS.time(method="MemberRepository.stream_batches"):
+                    partition = next(partitions, None)
+                if partition is None:
+                    break
+                yield [MemberRow(*row) for row in partition]
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.update_member")
     def update_member(self, member: Member) -> None:
-        member_orm = self.db.session.query(MemberORM).filter(MemberORM.Id == member.Id).first()
-        if member_orm:
-            for key, value in member.model_dump().items():
-                setattr(member_orm, key, value)
-            self.db.session.commit()
+        """Write every field of ``member`` with one UPDATE by primary key, without reading the row first."""
+        fields = member.model_dump(exclude={"Id"})
+        with self.db.session_scope() as session:
+            session.execute(update(MemberORM).where(MemberORM.Id == member.Id).values(**fields))
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.update_members")
+    def update_members(self, changes: list[tuple[int, dict[str, Any]]], chunk_size: int = 500) -> int:
+        """Write ``(Id, changed fields)`` pairs with set-based UPDATEs.
+
+        Changes touching the same columns are grouped and sent as one executemany
+        per chunk (pyodbc ``fast_executemany``), so only the listed columns are
+        written and no row is read first. Returns the number of rows sent.
+        """
+        written = 0
+        with self.db.session_scope() as session:
+            for chunk in update_chunks(changes, chunk_size):
+                session.execute(update(MemberORM), chunk)
+                written += len(chunk)
+        return written
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.set_joined_by_telegram_ids")
+    def set_joined_by_telegram_ids(self, telegram_ids: list[int], joined: bool, chunk_size: int = 1000) -> list[int]:
+        """Set ``HasJoinedTelegramGroup`` for every member linked to one of ``telegram_ids``.
+
+        One UPDATE per chunk of Telegram ids; rows already holding the value are
+        not touched. Returns the Ids of the members that changed.
+
+        Where ``UPDATE ... RETURNING`` is safe the Ids come back from the UPDATE
+        itself. On SQL Server that compiles to ``OUTPUT inserted.Id``, which is
+        rejected if ``Tbl_Member`` has a trigger, and that table isn't ours; so
+        there the Ids are selected under UPDLOCK first and updated by Id in the
+        same transaction.
+        """
+        returning = self._can_return_updates()
+        changed: list[int] = []
+        with self.db.session_scope() as session:
+            for start in range(0, len(telegram_ids), chunk_size):
+                chunk = telegram_ids[start:start + chunk_size]
+                criteria = [
+                    MemberORM.UserTelegramId.in_(chunk),
+                    or_(MemberORM.HasJoinedTelegramGroup != joined, MemberORM.HasJoinedTelegramGroup == None),
+                ]
+                if returning:
+                    stmt = update(MemberORM).where(*criteria).values(HasJoinedTelegramGroup=joined).returning(MemberORM.Id)
+                    changed.extend(session.execute(stmt).scalars())
+                    continue
+                ids = list(session.execute(
+                    select(MemberORM.Id).where(*criteria).with_hint(MemberORM.__table__, "WITH (UPDLOCK, ROWLOCK)", "mssql")
+                ).scalars())
+                if ids:
+                    session.execute(update(MemberORM).where(MemberORM.Id.in_(ids)).values(HasJoinedTelegramGroup=joined))
+                    changed.extend(ids)
+        return changed
+
+    def _can_return_updates(self) -> bool:
+        """Whether UPDATE ... RETURNING can be used on this engine (never on SQL Server, see set_joined_by_telegram_ids)."""
+        dialect = self.db.engine.dialect
+        return dialect.update_returning and dialect.name != "mssql"
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_active_member_rows")
+    def get_active_member_rows(self) -> list[MemberRow]:
+        """Every member that phone and Telegram-id lookups can match, as compact rows."""
+        stmt = select(*MEMBER_ROW_COLUMNS).where(MemberORM.IsMembership == True, MemberORM.IsActived == True)
+        with self.db.session_scope() as session:
+            return [MemberRow(*row) for row in session.execute(stmt)]
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_change_tracking_version")
+    def get_change_tracking_version(self) -> tuple[int, int] | None:
+        """Current and minimum valid SQL Server change-tracking versions of ``Tbl_Member``.
+
+        ``None`` when the database is not SQL Server or change tracking is not
+        enabled for the table.
+        """
+        if self.db.engine.dialect.name != "mssql":
+            return None
+        stmt = text(
+            "SELECT CHANGE_TRACKING_CURRENT_VERSION(), "
+            "CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('dbo.Tbl_Member'))"
+        )
+        with self.db.session_scope() as session:
+            current, min_valid = session.execute(stmt).one()
+        if current is None or min_valid is None:
+            return None
+        return current, min_valid
+
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_member_changes")
+    def get_member_changes(self, since_version: int) -> tuple[list[MemberRow], list[int]]:
+        """Members changed after ``since_version``, from ``CHANGETABLE``.
+
+        Returns the changed rows that are still active and the Ids of rows that
+        were deleted or are no longer active.
+        """
+        stmt = text(
+            "SELECT ct.Id, m.UserTelegramId, m.MembershipTime, m.HasJoinedTelegramGroup, m.Phone, m.IsMembership, m.IsActived "
+            "FROM CHANGETABLE(CHANGES dbo.Tbl_Member, :since_version) AS ct "
+            "LEFT JOIN dbo.Tbl_Member AS m ON m.Id = ct.Id"
+        )
+        active: list[MemberRow] = []
+        removed: list[int] = []
+        with self.db.session_scope() as session:
+            for member_id, telegram_id, membership_time, joined, phone, is_membership, is_actived in session.execute(stmt, {"since_version": since_version}):
+                if is_membership and is_actived:
+                    active.append(MemberRow(member_id, telegram_id, membership_time, joined, phone))
+                else:
+                    removed.append(member_id)
+        return active, removed
 
+    @timed(DB_QUERY_SECONDS, method="MemberRepository.get_member_by_telegram_id")
     def get_member_by_telegram_id(self, telegram_id: int) -> Member | None:
-        member_orm = self.db.session.query(MemberORM).filter(MemberORM.UserTelegramId == telegram_id, MemberORM.IsMembership == True, MemberORM.IsActived == True).first()
-        if member_orm:
-            return Member.model_validate(member_orm)
-        return None
\ No newline at end of file
+        with self.db.session_scope() as session:
+            member_orm = session.query(MemberORM).filter(MemberORM.UserTelegramId == telegram_id, MemberORM.IsMembership == True, MemberORM.IsActived == True).first()
+            if member_orm:
+                return Member.model_validate(member_orm)
+            return None
@@ -0,0 +1,47 @@
+from typing import Any
+from sqlalchemy import select, update
+from src.db.mssql import AsyncDatabase
+from src.models.member import Member, MemberORM
+from src.repository.member import update_chunks
+from src.utils.metrics import DB_QUERY_SECONDS, timed
+
+class AsyncMemberRepository:
+    ''' Async counterpart of MemberRepository; every call runs in its own session '''
+    def __init__(self, db: AsyncDatabase):
+        self.db: AsyncDatabase = db
+
+    @timed(DB_QUERY_SECONDS, method="AsyncMemberRepository.get_by_phone")
+    async def get_by_phone(self, phone: str) -> Member | None:
+        stmt = select(MemberORM).filter(MemberORM.Phone == phone, MemberORM.IsMembership == True, MemberORM.IsActived == True).order_by(MemberORM.Id.desc()).limit(1)
+        async with self.db.session_factory() as session:
+            member_orm = (await session.execute(stmt)).scalars().first()
+        if member_orm:
+            return Member.model_validate(member_orm)
+        return None
+
+    @timed(DB_QUERY_SECONDS, method="AsyncMemberRepository.get_member_by_telegram_id")
+    async def get_member_by_telegram_id(self, telegram_id: int) -> Member | None:
+        stmt = select(MemberORM).filter(MemberORM.UserTelegramId == telegram_id, MemberORM.IsMembership == True, MemberORM.IsActived == True).limit(1)
+        async with self.db.session_factory() as session:
+            member_orm = (await session.execute(stmt)).scalars().first()
+        if member_orm:
+            return Member.model_validate(member_orm)
+        return None
+
+    @timed(DB_QUERY_SECONDS, method="AsyncMemberRepository.update_member")
+    async def update_member(self, member: Member) -> None:
+        fields = member.model_dump(exclude={"Id"})
+        async with self.db.session_factory() as session:
+            await session.execute(update(MemberORM).where(MemberORM.Id == member.Id).values(**fields))
+            await session.commit()
+
+    @timed(DB_QUERY_SECONDS, method="AsyncMemberRepository.update_members")
+    async def update_members(self, changes: list[tuple[int, dict[str, Any]]], chunk_size: int = 500) -> int:
+        """Async version of MemberRepository.update_members."""
+        written = 0
+        async with self.db.session_factory() as session:
+            for chunk in update_chunks(changes, chunk_size):
+                await session.execute(update(MemberORM), chunk)
+                written += len(chunk)
+            await session.commit()
+        return written
@@ -0,0 +1,66 @@
+from datetime import datetime
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.exc import IntegrityError
+from src.db.job_store import JobStoreDatabase
+from src.models.member import MemberRow
+from src.models.reminder import ReminderDeliveryORM, SENDING
+
+class ReminderRepository:
+    def __init__(self, db: JobStoreDatabase):
+        self.db: JobStoreDatabase = db
+
+    def claim(self, campaign: str, members: list[MemberRow], chunk_size: int = 500) -> list[MemberRow]:
+        """Record ``members`` as being sent ``campaign`` and return the ones claimed now.
+
+        Members that already have a row for the campaign (sent, failed, or
+        claimed by an attempt that crashed) are left out, so nobody gets the
+        same campaign twice.
+        """
+        claimed: list[MemberRow] = []
+        for start in range(0, len(members), chunk_size):
+            chunk = members[start:start + chunk_size]
+            try:
+                claimed.extend(self._claim_chunk(campaign, chunk))
+            except IntegrityError:
+                # Someone claimed part of the chunk between our read and insert; read again
+                claimed.extend(self._claim_chunk(campaign, chunk))
+        return claimed
+
+    def _claim_chunk(self, campaign: str, members: list[MemberRow]) -> list[MemberRow]:
+        now = datetime.now()
+        with self.db.session_scope() as session:
+            existing = set(session.execute(
+                select(ReminderDeliveryORM.MemberId).where(
+                    ReminderDeliveryORM.Campaign == campaign,
+                    ReminderDeliveryORM.MemberId.in_([member.Id for member in members]),
+                )
+            ).scalars())
+            new = [member for member in members if member.Id not in existing]
+            if new:
+                session.execute(insert(ReminderDeliveryORM), [
+                    {"Campaign": campaign, "MemberId": member.Id, "UserTelegramId": member.UserTelegramId, "Status": SENDING, "ClaimedAt": now}
+                    for member in new
+                ])
+            return new
+
+    def record(self, campaign: str, results: list[tuple[int, str, str | None]], chunk_size: int = 500) -> int:
+        """Store ``(MemberId, status, error)`` outcomes with one executemany per chunk."""
+        now = datetime.now()
+        rows = [
+            {"Campaign": campaign, "MemberId": member_id, "Status": status, "Error": error[:500] if error else None, "SentAt": now}
+            for member_id, status, error in results
+        ]
+        with self.db.session_scope() as session:
+            for start in range(0, len(rows), chunk_size):
+                session.execute(update(ReminderDeliveryORM), rows[start:start + chunk_size])
+        return len(rows)
+
+    def counts(self, campaign: str) -> dict[str, int]:
+        """Deliveries of ``campaign`` by status."""
+        stmt = (
+            select(ReminderDeliveryORM.Status, func.count())
+            .where(ReminderDeliveryORM.Campaign == campaign)
+            .group_by(ReminderDeliveryORM.Status)
+        )
+        with self.db.session_scope() as session:
+            return {status: count for status, count in session.execute(stmt)}
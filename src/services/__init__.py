@@ -2,6 +2,13 @@
 Services for external integrations and business operations.
 """
 
+from .outbound import OutboundScheduler
+from .kick import KickEngine, KickReport
+from .kick_plan import KickPlan
+from .invite_pool import InviteLinkPool
+from .membership_sync import MembershipSync
+from .membership_index import MembershipIndex
 from .membership import MemberService
+from .reminder import ReminderService, ReminderCampaign, ReminderReport
 
-__all__ = ['MemberService']
+__all__ = ['MemberService', 'KickEngine', 'KickReport', 'KickPlan', 'InviteLinkPool', 'MembershipSync', 'MembershipIndex', 'OutboundScheduler', 'ReminderService', 'ReminderCampaign', 'ReminderReport']
@@ -0,0 +1,158 @@
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import asyncio
+import functools
+from telegram import Bot, ChatInviteLink
+from telegram.error import RetryAfter
+from src.services.outbound import OutboundScheduler, INTERACTIVE, BULK
+from logs.logger import LOGGER as logger
+
+
+def expiry_note(link: ChatInviteLink) -> str:
+    """Tell the user how long ``link`` stays valid, from its actual expiry."""
+    if link.expire_date is None:
+        return "This link works for one use only."
+    minutes = max(int((link.expire_date - datetime.now(timezone.utc)).total_seconds() // 60), 1)
+    hours, minutes = divmod(minutes, 60)
+    parts = [f"{hours} hour{'s' if hours != 1 else ''}"] if hours else []
+    if minutes:
+        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    return f"This link will expire in {' '.join(parts)} or after one use."
+
+
+class InviteLinkPool:
+    """Keeps single-use invite links ready so approve replies don't wait on the API.
+
+    Links are minted in the background with ``member_limit=1`` and an expiry of
+    ``ttl`` seconds. A link is only handed out while it still has at least
+    ``min_remaining`` seconds left; older ones are revoked. When the pool is
+    empty, ``acquire`` falls back to creating a link on demand.
+
+    With an ``outbound`` scheduler, refills and revocations go through it as
+    bulk calls, so topping up the pool never delays a user's reply.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int,
+        size: int = 20,
+        ttl: int = 7200,
+        min_remaining: int = 3600,
+        refill_interval: float = 30.0,
+        outbound: OutboundScheduler | None = None,
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.outbound = outbound
+        self.size = size
+        self.ttl = timedelta(seconds=ttl)
+        self.min_remaining = timedelta(seconds=min_remaining)
+        self.refill_interval = refill_interval
+        self.links: deque[ChatInviteLink] = deque()
+        self.stale: list[ChatInviteLink] = []  # pruned, waiting to be revoked by the refill loop
+        self.created = 0
+        self.revoked = 0
+        self.served_from_pool = 0
+        self.served_on_demand = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refill_loop(), name="invite-link-pool")
+            logger.info(f"Invite link pool started (size={self.size})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Unused links would otherwise stay valid until they expire
+        self.stale.extend(self.links)
+        self.links.clear()
+        await self._revoke_stale()
+        logger.info(f"Invite link pool stopped: {self.stats()}")
+
+    async def acquire(self) -> ChatInviteLink:
+        """Return a ready single-use link, or create one if none is fresh enough."""
+        self._prune_expired()
+        self._wakeup.set()
+        if self.links:
+            self.served_from_pool += 1
+            return self.links.popleft()
+
+        self.served_on_demand += 1
+        # Someone is waiting for this one
+        return await self._create(INTERACTIVE)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "ready": len(self.links),
+            "created": self.created,
+            "revoked": self.revoked,
+            "served_from_pool": self.served_from_pool,
+            "served_on_demand": self.served_on_demand,
+        }
+
+    async def _call(self, method, priority: str, **params):
+        call = functools.partial(method, chat_id=self.chat_id, **params)
+        if self.outbound is None:
+            return await call()
+        return await self.outbound.submit(call, priority)
+
+    async def _create(self, priority: str = BULK) -> ChatInviteLink:
+        link = await self._call(
+            self.bot.create_chat_invite_link,
+            priority,
+            member_limit=1,  # one-time use
+            expire_date=datetime.now(timezone.utc) + self.ttl,
+        )
+        self.created += 1
+        return link
+
+    def _is_fresh(self, link: ChatInviteLink) -> bool:
+        return link.expire_date is None or link.expire_date - datetime.now(timezone.utc) >= self.min_remaining
+
+    def _prune_expired(self) -> None:
+        stale = [link for link in self.links if not self._is_fresh(link)]
+        if stale:
+            self.links = deque(link for link in self.links if self._is_fresh(link))
+            self.stale.extend(stale)
+
+    async def _revoke_stale(self) -> None:
+        while self.stale:
+            await self._revoke(self.stale.pop())
+
+    async def _revoke(self, link: ChatInviteLink) -> None:
+        try:
+            await self._call(self.bot.revoke_chat_invite_link, BULK, invite_link=link.invite_link)
+            self.revoked += 1
+        except Exception as e:
+            logger.warning(f"Failed to revoke invite link: {e}")
+
+    async def _refill_loop(self) -> None:
+        while True:
+            try:
+                self._prune_expired()
+                await self._revoke_stale()
+                while len(self.links) < self.size:
+                    self.links.append(await self._create())
+            except RetryAfter as e:
+                logger.warning(f"Invite link pool throttled, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error refilling invite link pool: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
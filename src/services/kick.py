@@ -0,0 +1,238 @@
+from dataclasses import dataclass, field
+from contextlib import aclosing
+from typing import AsyncGenerator, Awaitable, Callable
+import asyncio
+import functools
+import time
+from telegram import Bot
+from telegram.constants import ChatMemberStatus
+from telegram.error import RetryAfter
+from src.models.member import MemberRow
+from src.services.outbound import OutboundScheduler, BULK
+from src.utils import TokenBucket
+from src.utils.metrics import KICK_MEMBERS, KICK_LAST_DURATION, KICK_LAST_THROUGHPUT
+from logs.logger import LOGGER as logger
+
+
+@dataclass
+class KickReport:
+    '''Counters collected during one kick run.'''
+    processed: int = 0
+    kicked: int = 0
+    skipped: int = 0
+    failed: int = 0
+    api_calls: int = 0
+    throttled: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+    @property
+    def duration(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        '''Kicked members per second.'''
+        return self.kicked / self.duration if self.duration > 0 else 0.0
+
+    @classmethod
+    def merge(cls, reports: list["KickReport"]) -> "KickReport":
+        """Combine the reports of shards that ran in parallel.
+
+        Counters are summed and the run spans from the first shard's start to
+        the last shard's finish. Shards run on this host, where
+        ``time.monotonic`` is shared by every process.
+        """
+        merged = cls()
+        merged.finished_at = merged.started_at
+        if reports:
+            merged.started_at = min(r.started_at for r in reports)
+            merged.finished_at = max(r.finished_at if r.finished_at is not None else time.monotonic() for r in reports)
+        for report in reports:
+            merged.processed += report.processed
+            merged.kicked += report.kicked
+            merged.skipped += report.skipped
+            merged.failed += report.failed
+            merged.api_calls += report.api_calls
+            merged.throttled += report.throttled
+        return merged
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "processed": self.processed,
+            "kicked": self.kicked,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "api_calls": self.api_calls,
+            "throttled": self.throttled,
+            "duration": round(self.duration, 3),
+            "throughput": round(self.throughput, 3),
+        }
+
+    def publish(self, count_members: bool = False) -> None:
+        """Expose this finished run on the metrics endpoint.
+
+        Member counters are normally bumped live by ``KickEngine``; pass
+        ``count_members`` for reports whose kicks ran in another process.
+        """
+        KICK_LAST_DURATION.set(self.duration)
+        KICK_LAST_THROUGHPUT.set(self.throughput)
+        if count_members:
+            KICK_MEMBERS.inc(self.kicked, result="kicked")
+            KICK_MEMBERS.inc(self.skipped, result="skipped")
+            KICK_MEMBERS.inc(self.failed, result="failed")
+
+    def summary(self) -> str:
+        return (
+            f"processed={self.processed} kicked={self.kicked} skipped={self.skipped} failed={self.failed} "
+            f"api_calls={self.api_calls} throttled={self.throttled} "
+            f"duration={self.duration:.1f}s throughput={self.throughput:.2f}/s"
+        )
+
+
+class KickEngine:
+    '''Runs ban/unban calls concurrently under a shared token bucket.
+
+    With a ``scheduler`` the calls are also queued as bulk traffic behind the
+    bot's interactive replies.
+    '''
+    def __init__(self, bot: Bot, chat_id: int, limiter: TokenBucket, concurrency: int, max_retries: int = 5, scheduler: OutboundScheduler | None = None):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.limiter = limiter
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self.semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self.report = KickReport()
+
+    async def _call(self, method: Callable[..., Awaitable], **kwargs):
+        """Call a Bot API method, waiting on the limiter and honouring RetryAfter."""
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            self.report.api_calls += 1
+            try:
+                if self.scheduler is not None:
+                    # Retries stay here, so they keep counting against the kick limiter
+                    result = await self.scheduler.submit(functools.partial(method, **kwargs), BULK, max_retries=0)
+                else:
+                    result = await method(**kwargs)
+            except RetryAfter as e:
+                self.limiter.penalize(e.retry_after)
+                self.report.throttled += 1
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(f"Flood control hit, retrying in {e.retry_after}s (attempt {attempt})")
+                continue
+            self.limiter.reward()
+            return result
+
+    async def in_group(self, telegram_id: int) -> bool | None:
+        """Whether the user is currently in the group; ``None`` when Telegram can't tell us."""
+        async with self.semaphore:
+            try:
+                chat_member = await self._call(self.bot.get_chat_member, chat_id=self.chat_id, user_id=telegram_id)
+            except Exception as e:
+                logger.warning(f"Could not read group state of user {telegram_id}: {e}")
+                return None
+        if chat_member.status in (ChatMemberStatus.LEFT, ChatMemberStatus.BANNED):
+            return False
+        # Restricted users may already have left; is_member says which
+        return getattr(chat_member, "is_member", True)
+
+    async def kick(self, member: MemberRow) -> bool:
+        """Remove a member from the group and unban them so they can rejoin later."""
+        async with self.semaphore:
+            self.report.processed += 1
+            if member.UserTelegramId is None:
+                self.report.skipped += 1
+                KICK_MEMBERS.inc(result="skipped")
+                return False
+            try:
+                await self._call(
+                    self.bot.ban_chat_member,
+                    chat_id=self.chat_id,
+                    user_id=member.UserTelegramId,
+                    revoke_messages=False  # Don't delete their previous messages
+                )
+                await self._call(
+                    self.bot.unban_chat_member,
+                    chat_id=self.chat_id,
+                    user_id=member.UserTelegramId,
+                    only_if_banned=True
+                )
+            except Exception as e:
+                self.report.failed += 1
+                KICK_MEMBERS.inc(result="failed")
+                logger.error(f"Failed to kick user {member.Id}: {e}")
+                return False
+
+            self.report.kicked += 1
+            KICK_MEMBERS.inc(result="kicked")
+            return True
+
+    async def run(
+        self,
+        batches: AsyncGenerator[list[MemberRow], None],
+        on_batch_kicked: Callable[[list[MemberRow]], Awaitable[None]],
+        on_checkpoint: Callable[[int], Awaitable[None]] | None = None,
+        depth: int = 2,
+    ) -> KickReport:
+        """Kick every member yielded by ``batches``.
+
+        Runs as three stages joined by queues of ``depth`` batches: a fetcher
+        reads the next pages, the kicker starts each batch's calls without
+        waiting for the previous batch to finish, and a writer hands the
+        removed members of each batch, in order, to ``on_batch_kicked``. Once
+        a batch is persisted, ``on_checkpoint`` receives its last member Id,
+        so checkpoints never run ahead of what was written.
+        """
+        self.report = KickReport()
+        depth = max(depth, 1)
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        kicking: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        batch_tasks: set[asyncio.Task] = set()
+
+        async def fetch() -> None:
+            # Closed even when cancelled while waiting for room, so a streamed cursor is released
+            async with aclosing(batches):
+                async for batch in batches:
+                    if batch:
+                        await fetched.put(batch)
+            await fetched.put(None)
+
+        async def start_kicks() -> None:
+            while (batch := await fetched.get()) is not None:
+                task = asyncio.create_task(self._kick_batch(batch))
+                batch_tasks.add(task)
+                await kicking.put((batch, task))
+            await kicking.put(None)
+
+        async def persist() -> None:
+            while (item := await kicking.get()) is not None:
+                batch, task = item
+                kicked = await task
+                batch_tasks.discard(task)
+                if kicked:
+                    await on_batch_kicked(kicked)
+                if on_checkpoint is not None:
+                    await on_checkpoint(batch[-1].Id)
+                logger.info(f"Kick progress: {self.report.summary()}")
+
+        stages = [asyncio.create_task(stage()) for stage in (fetch, start_kicks, persist)]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # A failed stage stops the others; nothing past the last checkpoint is lost
+            for task in [*stages, *batch_tasks]:
+                task.cancel()
+            await asyncio.gather(*stages, *batch_tasks, return_exceptions=True)
+
+        self.report.finished_at = time.monotonic()
+        return self.report
+
+    async def _kick_batch(self, batch: list[MemberRow]) -> list[MemberRow]:
+        results = await asyncio.gather(*(self.kick(member) for member in batch))
+        return [member for member, ok in zip(batch, results) if ok]
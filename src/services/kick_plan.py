@@ -0,0 +1,126 @@
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator
+import json
+import math
+import os
+from src.models.member import MemberRow
+
+PLAN_VERSION = 1
+KICK = "k"   # ban + unban, then unlink the member
+CLEAR = "c"  # already out of the group: only unlink the member
+
+
+@dataclass
+class KickPlan:
+    """Members a kick run will remove, computed before any Bot API call is made.
+
+    Saved as one JSON header line followed by one ``action,Id,UserTelegramId``
+    line per member in Id order. In memory the members are kept in typed
+    arrays, about 17 bytes each, so a plan of a million members stays small.
+    """
+    chat_id: int
+    membership_end_time: str
+    since: str | None = None
+    checked_group: bool = False
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    ids: array = field(default_factory=lambda: array("q"))
+    telegram_ids: array = field(default_factory=lambda: array("q"))
+    actions: bytearray = field(default_factory=bytearray)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, member_id: int, telegram_id: int, action: str = KICK) -> None:
+        self.ids.append(member_id)
+        self.telegram_ids.append(telegram_id)
+        self.actions.append(ord(action))
+
+    def set_action(self, index: int, action: str) -> None:
+        self.actions[index] = ord(action)
+
+    @property
+    def kicks(self) -> int:
+        return self.actions.count(ord(KICK))
+
+    @property
+    def clears(self) -> int:
+        return self.actions.count(ord(CLEAR))
+
+    def position(self, after_id: int) -> int:
+        """Number of members at or before ``after_id``, i.e. already applied when resuming there."""
+        return bisect_right(self.ids, after_id)
+
+    def estimate(self, batch_size: int) -> dict[str, int]:
+        """Bot API calls and DB writes that applying the plan will make, before retries."""
+        return {
+            "members": len(self),
+            "kick": self.kicks,
+            "clear": self.clears,
+            "api_calls": 2 * self.kicks,
+            "db_rows": len(self),
+            "db_batches": math.ceil(len(self) / batch_size) if batch_size > 0 else 0,
+        }
+
+    def summary(self, batch_size: int) -> str:
+        estimate = self.estimate(batch_size)
+        window = f"{self.since} < MembershipTime <= {self.membership_end_time}" if self.since else f"MembershipTime <= {self.membership_end_time}"
+        group = "checked against the group" if self.checked_group else "group state not checked"
+        return (
+            f"{estimate['members']} members ({window}, {group}): kick={estimate['kick']} clear={estimate['clear']} "
+            f"api_calls={estimate['api_calls']} db_rows={estimate['db_rows']} in {estimate['db_batches']} batches"
+        )
+
+    def batches(self, batch_size: int, after_id: int = 0) -> Iterator[list[tuple[str, MemberRow]]]:
+        """``(action, member)`` pairs after ``after_id``, ``batch_size`` at a time."""
+        start = self.position(after_id)
+        for offset in range(start, len(self), batch_size):
+            end = min(offset + batch_size, len(self))
+            yield [
+                (chr(self.actions[i]), MemberRow(self.ids[i], self.telegram_ids[i], None, True, None))
+                for i in range(offset, end)
+            ]
+
+    def header(self) -> dict:
+        return {
+            "version": PLAN_VERSION,
+            "created_at": self.created_at,
+            "chat_id": self.chat_id,
+            "membership_end_time": self.membership_end_time,
+            "since": self.since,
+            "checked_group": self.checked_group,
+            "members": len(self),
+            "kick": self.kicks,
+            "clear": self.clears,
+        }
+
+    def save(self, path: str) -> None:
+        """Write the plan atomically, so a crash never leaves a half-written plan behind."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header()) + "\n")
+            for i in range(len(self)):
+                f.write(f"{chr(self.actions[i])},{self.ids[i]},{self.telegram_ids[i]}\n")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "KickPlan":
+        with open(path, encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != PLAN_VERSION:
+                raise ValueError(f"Unsupported kick plan version {header.get('version')} in {path}")
+            plan = cls(
+                chat_id=header["chat_id"],
+                membership_end_time=header["membership_end_time"],
+                since=header.get("since"),
+                checked_group=header.get("checked_group", False),
+                created_at=header["created_at"],
+            )
+            for line in f:
+                action, member_id, telegram_id = line.rstrip("\n").split(",")
+                plan.add(int(member_id), int(telegram_id), action)
+        if len(plan) != header["members"]:
+            raise ValueError(f"Kick plan {path} is truncated: {len(plan)} of {header['members']} members")
+        return plan
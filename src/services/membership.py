@@ -1,16 +1,93 @@
-from src.repository import MemberRepository
-from src.models.member import Member
+from src.repository import MemberRepository, AsyncMemberRepository
+from src.repository.member import membership_end_time
+from src.models.member import Member, MemberRow
 from logs.logger import LOGGER as logger
-from datetime import datetime
+from dataclasses import replace
+from contextlib import aclosing
+from typing import AsyncGenerator, Awaitable, Callable, TypeVar
 import asyncio
+import time
 from config import Config
 from telegram import Bot
+from src.services.kick import KickEngine, KickReport
+from src.services.kick_plan import KickPlan, CLEAR
+from src.services.membership_index import MembershipIndex
+from src.services.outbound import OutboundScheduler
+from src.utils import TokenBucket, TTLCache, MISSING, iterate_in_thread, normalize_phone_number, normalize_phone_numbers
+from src.utils.telegram_request import create_request
+
+T = TypeVar("T")
 
 class MemberService:
-    def __init__(self, config: Config, repository: MemberRepository):
+    def __init__(self, config: Config, repository: MemberRepository, async_repository: AsyncMemberRepository | None = None):
         self.repo: MemberRepository = repository
-        self.bot = Bot(token=config.telegram_bot_token)
+        self.async_repo: AsyncMemberRepository | None = async_repository
+        self._bot: Bot | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.outbound: OutboundScheduler | None = None
         self.config = config
+        self.phone_cache = TTLCache(
+            maxsize=config.phone_cache_size,
+            ttl=config.phone_cache_ttl,
+            negative_ttl=config.phone_cache_negative_ttl,
+        )
+        # Loaded and refreshed by the bot process; until then lookups go to the cache and database
+        self.index: MembershipIndex | None = None
+        if config.member_index_enabled:
+            self.index = MembershipIndex(
+                repository,
+                refresh_interval=config.member_index_refresh_interval,
+                reload_interval=config.member_index_reload_interval,
+            )
+
+    @property
+    def bot(self) -> Bot:
+        """Bot used by the kick task: the application's once attached, else one built on first use."""
+        if self._bot is None:
+            self._bot = Bot(token=self.config.telegram_bot_token, base_url=self.config.telegram_api_base_url, request=create_request(self.config))
+        return self._bot
+
+    @bot.setter
+    def bot(self, bot: Bot) -> None:
+        self._bot = bot
+
+    def attach_bot(self, bot: Bot, loop: asyncio.AbstractEventLoop, outbound: OutboundScheduler | None = None) -> None:
+        """Send Bot API calls through the running application's bot, connection pool and outbound scheduler."""
+        self._bot = bot
+        self.loop = loop
+        self.outbound = outbound
+
+    def detach_bot(self) -> None:
+        if self.loop is not None:
+            self._bot = None
+            self.loop = None
+            self.outbound = None
+
+    def _kick_engine(self) -> KickEngine:
+        limiter = TokenBucket(rate=self.config.kick_rate, burst=self.config.kick_burst)
+        return KickEngine(self.bot, self.config.telegram_group_id, limiter, self.config.kick_concurrency, scheduler=self.outbound)
+
+    def run_coroutine(self, coro: Awaitable[T]) -> T:
+        """Run ``coro`` from a worker thread and wait for its result.
+
+        With an attached application it runs on the application's loop, so bulk
+        calls reuse the pool's kept-alive connections. Otherwise (``manage.py``,
+        shard processes) it runs in a fresh loop around a bot opened for the call.
+        """
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+        async def standalone() -> T:
+            # The HTTPX client is bound to this loop; shutting it down lets the next run rebuild it
+            async with self.bot:
+                return await coro
+
+        return asyncio.run(standalone())
+
+    def warm_up(self) -> bool:
+        """Open the first database connection before the first lookup needs it."""
+        return self.repo.db.ping()
 
     def kick_non_member(self) -> None:
         # Get all non-members
@@ -27,77 +104,281 @@ class MemberService:
             logger.info(f"Kicked {len(non_members)} non-members.")
             offset += 20
 
-    def get_member_by_phone(self, phone: str):
-        phone = phone.replace(" ", "").replace("+", "").replace("-", "")
-        if phone.startswith("62"):
-            phone = "0" + phone[2:]
-        return self.repo.get_by_phone(phone)
+    def _indexed_by_phone(self, phone: str) -> MemberRow | None:
+        if self.index is None or not self.index.fresh:
+            return None
+        return self.index.get_by_phone(phone)
+
+    def _cache_member(self, phone: str, member: Member | None) -> MemberRow | None:
+        row = MemberRow.from_member(member) if member else None
+        self.phone_cache.set(phone, row, tag=row.Id if row else None)
+        # Hand out copies so callers can't change the cached row
+        return replace(row) if row else None
+
+    def get_member_by_phone(self, phone: str) -> MemberRow | None:
+        phone = normalize_phone_number(phone)
+        if phone is None:
+            return None
+        # A miss may be a member registered since the last refresh, so it still goes to the database
+        indexed = self._indexed_by_phone(phone)
+        if indexed is not None:
+            return indexed
+        cached = self.phone_cache.get(phone)
+        if cached is not MISSING:
+            return replace(cached) if cached else None
+        return self._cache_member(phone, self.repo.get_by_phone(phone))
     
+    async def get_member_by_phone_async(self, phone: str) -> MemberRow | None:
+        """Awaitable phone lookup; uses the async repository when configured."""
+        phone = normalize_phone_number(phone)
+        if phone is None:
+            return None
+        # Index hits are answered on the loop, without a thread hop
+        indexed = self._indexed_by_phone(phone)
+        if indexed is not None:
+            return indexed
+        if self.async_repo is None:
+            return await asyncio.to_thread(self.get_member_by_phone, phone)
+
+        cached = self.phone_cache.get(phone)
+        if cached is not MISSING:
+            return replace(cached) if cached else None
+        return self._cache_member(phone, await self.async_repo.get_by_phone(phone))
+
+    def match_phones(self, raw_phones: list[object], chunk_size: int = 1000) -> tuple[list[str | None], list[MemberRow | None]]:
+        """Match a column of raw phone numbers to active members.
+
+        Returns the normalized phones and the matching member (or ``None``) for
+        each input, in input order. Lookups run as chunked ``Phone IN (...)``
+        queries instead of one query per number.
+        """
+        phones, valid = normalize_phone_numbers(raw_phones)
+        unique = list({phone for phone, ok in zip(phones, valid) if ok})
+        members = self.repo.get_by_phones(unique, chunk_size=chunk_size)
+        return phones, [members.get(phone) if phone else None for phone in phones]
+
     def get_member_by_membership_time_batch(self, membership_time: str, limit: int = 20, offset: int = 0):
         return self.repo.get_member_by_membership_time(membership_time, limit, offset)
     
     def update_member(self, member: Member) -> None:
         self.repo.update_member(member)
+        self._invalidate_member(member)
+
+    async def update_member_async(self, member: Member) -> None:
+        if self.async_repo is None:
+            return await asyncio.to_thread(self.update_member, member)
+
+        await self.async_repo.update_member(member)
+        self._invalidate_member(member)
+
+    def link_telegram_user(self, member: Member | MemberRow, telegram_id: int) -> None:
+        """Link a member to the Telegram user who proved their phone, and mark them as joined."""
+        self.repo.update_members([(member.Id, {"UserTelegramId": telegram_id, "HasJoinedTelegramGroup": True})])
+        self.phone_cache.invalidate_tag(member.Id)
+        if self.index is not None:
+            self.index.update(member.Id, UserTelegramId=telegram_id, HasJoinedTelegramGroup=True)
+
+    async def link_telegram_user_async(self, member: Member | MemberRow, telegram_id: int) -> None:
+        await asyncio.to_thread(self.link_telegram_user, member, telegram_id)
+
+    def set_joined_group(self, telegram_ids: list[int], joined: bool) -> int:
+        """Record that these Telegram users joined (or left) the group; returns rows changed."""
+        changed = self.repo.set_joined_by_telegram_ids(telegram_ids, joined)
+        for member_id in changed:
+            self.phone_cache.invalidate_tag(member_id)
+        if self.index is not None:
+            self.index.update_telegram_ids(telegram_ids, HasJoinedTelegramGroup=joined)
+        return len(changed)
+
+    async def set_joined_group_async(self, telegram_ids: list[int], joined: bool) -> int:
+        return await asyncio.to_thread(self.set_joined_group, telegram_ids, joined)
 
-    def get_member_by_user_telegram_id(self, telegram_id: int):
-        return self.repo.get_member_by_telegram_id(telegram_id)
+    def _invalidate_member(self, member: Member) -> None:
+        self.phone_cache.invalidate_tag(member.Id)
+        phone = normalize_phone_number(member.Phone) if member.Phone else None
+        if phone:
+            self.phone_cache.invalidate(phone)
+        if self.index is not None:
+            self.index.update(
+                member.Id,
+                UserTelegramId=member.UserTelegramId,
+                MembershipTime=member.MembershipTime,
+                HasJoinedTelegramGroup=member.HasJoinedTelegramGroup,
+                Phone=member.Phone,
+            )
+
+    def _indexed_by_telegram_id(self, telegram_id: int) -> MemberRow | None:
+        if self.index is None or not self.index.fresh:
+            return None
+        return self.index.get_by_telegram_id(telegram_id)
+
+    def get_member_by_user_telegram_id(self, telegram_id: int) -> MemberRow | None:
+        indexed = self._indexed_by_telegram_id(telegram_id)
+        if indexed is not None:
+            return indexed
+        member = self.repo.get_member_by_telegram_id(telegram_id)
+        return MemberRow.from_member(member) if member else None
+
+    async def get_member_by_user_telegram_id_async(self, telegram_id: int) -> MemberRow | None:
+        indexed = self._indexed_by_telegram_id(telegram_id)
+        if indexed is not None:
+            return indexed
+        if self.async_repo is None:
+            return await asyncio.to_thread(self.get_member_by_user_telegram_id, telegram_id)
+        member = await self.async_repo.get_member_by_telegram_id(telegram_id)
+        return MemberRow.from_member(member) if member else None
     
-    async def kick_non_members(self):
-        """Kick non-members from the Telegram group"""
-        logger.info("Starting daily kick non-members task...")
+    async def aclose(self) -> None:
+        """Release resources bound to the bot's event loop."""
+        if self.async_repo is not None:
+            await self.async_repo.db.close()
+
+    @staticmethod
+    def membership_end_time() -> str:
+        """Cut-off for the daily kick: memberships that ended before today."""
+        return membership_end_time()
+
+    def get_kick_shard_bounds(self, shards: int, after_id: int = 0, since: str | None = None, membership_end_time: str | None = None) -> list[int]:
+        return self.repo.get_membership_time_shard_bounds(membership_end_time or self.membership_end_time(), shards, after_id, since)
+
+    def _expired_member_batches(self, membership_end_time: str, batch_size: int, after_id: int = 0, until_id: int | None = None, since: str | None = None) -> AsyncGenerator[list[MemberRow], None]:
+        """Pages of members whose membership ended before ``membership_end_time``, read on one dedicated thread."""
+        batches = self.repo.iter_member_by_membership_time(
+            membership_end_time, batch_size=batch_size, after_id=after_id, stream=self.config.kick_stream_results, until_id=until_id, since=since
+        )
+        return iterate_in_thread(batches, name="kick-fetch")
+
+    async def _persist_kicked(self, members: list[MemberRow]) -> None:
+        changes = [(member.Id, {"UserTelegramId": None, "HasJoinedTelegramGroup": False}) for member in members]
+        await asyncio.to_thread(self.repo.update_members, changes)
+        for member in members:
+            self.phone_cache.invalidate_tag(member.Id)
+            if self.index is not None:
+                self.index.update(member.Id, UserTelegramId=None, HasJoinedTelegramGroup=False)
+
+    async def kick_non_members(
+        self,
+        after_id: int = 0,
+        on_checkpoint: Callable[[int], None] | None = None,
+        until_id: int | None = None,
+        since: str | None = None,
+        membership_end_time: str | None = None,
+    ) -> KickReport:
+        """Kick non-members from the Telegram group
+
+        Resumes after member ``after_id`` and reports progress to ``on_checkpoint``
+        (called with the last persisted member Id) so an interrupted run can continue.
+        ``until_id`` bounds the Id range when the run is one shard of many.
+        ``since`` limits the run to memberships that ended after it (incremental
+        mode); ``membership_end_time`` overrides today's cut-off.
+        """
+        membership_end_time = membership_end_time or self.membership_end_time()
+        window = f"{since} < MembershipTime <= {membership_end_time}" if since else f"MembershipTime <= {membership_end_time}"
+        logger.info(f"Starting daily kick non-members task (Ids {after_id + 1}..{until_id or 'end'}, {window})...")
         
         try:
-            # Get all non-members from database
-            offset = 0
-            total_kicked = 0
-            # 2025-10-31 00:00:00.000
-            membership_end_time = datetime.now().strftime("%Y-%m-%d 00:00:00.000")
-            while True:
-                non_members = self.repo.get_member_by_membership_time(membership_end_time, limit=20, offset=offset)
-                if not non_members:
-                    break
-                
-                for member in non_members:
-                    print(f"Processing non-member: {member.FirstName} {member.LastName} (ID: {member.Id}, Telegram ID: {member.UserTelegramId})")
-                    try:
-                        # Try to kick the user from the group
-                        await self.bot.ban_chat_member(
-                            chat_id=self.config.telegram_group_id,
-                            user_id=member.UserTelegramId,
-                            revoke_messages=False  # Don't delete their previous messages
-                        )
-                        
-                        # Immediately unban them so they can rejoin if they become members
-                        await self.bot.unban_chat_member(
-                            chat_id=self.config.telegram_group_id,
-                            user_id=member.UserTelegramId,
-                            only_if_banned=True
-                        )
-
-                        member.UserTelegramId = None
-                        member.HasJoinedTelegramGroup = False
-                        await asyncio.to_thread(self.repo.update_member, member)
-                        
-                        logger.info(f"Successfully kicked non-member: {member.FirstName} {member.LastName} (ID: {member.Id})")
-                        total_kicked += 1
-                        
-                        # Add a small delay to avoid hitting rate limits
-                        await asyncio.sleep(1)
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to kick user {member.Id}: {e}")
-                    
-                    except Exception as e:
-                        logger.error(f"Unexpected error kicking user {member.Id}: {e}")
-                
-                offset += 20
-                
-                # Add delay between batches
-                await asyncio.sleep(2)
+            engine = self._kick_engine()
+
+            async def checkpoint(last_id: int) -> None:
+                await asyncio.to_thread(on_checkpoint, last_id)
+
+            report = await engine.run(
+                self._expired_member_batches(membership_end_time, self.config.kick_batch_size, after_id, until_id, since),
+                self._persist_kicked,
+                checkpoint if on_checkpoint else None,
+                depth=self.config.kick_pipeline_depth,
+            )
             
-            logger.info(f"Daily kick task completed. Total kicked: {total_kicked} non-members.")
+            logger.info(f"Daily kick task completed. {report.summary()}")
+            return report
             
         except Exception as e:
             logger.error(f"Error in kick_non_members task: {e}")
             import traceback
-            logger.error(traceback.format_exc())
\ No newline at end of file
+            logger.error(traceback.format_exc())
+            raise
+
+    async def plan_kick(self, check_group: bool = False, since: str | None = None, membership_end_time: str | None = None) -> KickPlan:
+        """Compute who the next kick would remove, without removing anyone.
+
+        The candidates come from one set-based query. With ``check_group`` each
+        one is looked up in the group (one rate-limited ``getChatMember`` call
+        per member); members who already left are only unlinked when the plan
+        is applied, which saves their ban and unban calls.
+        """
+        membership_end_time = membership_end_time or self.membership_end_time()
+        plan = KickPlan(self.config.telegram_group_id, membership_end_time, since)
+        candidates = iterate_in_thread(self.repo.stream_kick_candidates(membership_end_time, since), name="kick-plan")
+        async with aclosing(candidates):
+            async for rows in candidates:
+                for member_id, telegram_id in rows:
+                    plan.add(member_id, telegram_id)
+        logger.info(f"Kick plan computed: {len(plan)} candidates")
+
+        if check_group and len(plan):
+            engine = self._kick_engine()
+            batch_size = self.config.kick_batch_size
+            for start in range(0, len(plan), batch_size):
+                indexes = range(start, min(start + batch_size, len(plan)))
+                states = await asyncio.gather(*(engine.in_group(plan.telegram_ids[i]) for i in indexes))
+                for i, state in zip(indexes, states):
+                    if state is False:
+                        plan.set_action(i, CLEAR)
+                logger.info(f"Kick plan group check: {indexes.stop}/{len(plan)} members, {plan.clears} already gone")
+            plan.checked_group = True
+
+        logger.info(f"Kick plan: {plan.summary(self.config.kick_batch_size)}")
+        return plan
+
+    async def apply_kick_plan(
+        self,
+        plan: KickPlan,
+        after_id: int = 0,
+        on_checkpoint: Callable[[int], None] | None = None,
+        on_progress: Callable[[int, int, KickReport], None] | None = None,
+    ) -> KickReport:
+        """Carry out a plan made by ``plan_kick``.
+
+        Each batch is re-checked against the database first, so members who
+        renewed after the plan was made are skipped. The rest are kicked
+        concurrently under the kick rate limit and unlinked in one write per
+        batch; ``on_checkpoint`` then receives the batch's last member Id and
+        ``on_progress`` the number of plan members done so far.
+        """
+        if plan.chat_id != self.config.telegram_group_id:
+            raise ValueError(f"Kick plan is for chat {plan.chat_id}, not {self.config.telegram_group_id}")
+
+        engine = self._kick_engine()
+        report = engine.report
+        done, total = plan.position(after_id), len(plan)
+        logger.info(f"Applying kick plan from {plan.created_at}: {plan.summary(self.config.kick_batch_size)}, resuming after Id {after_id}")
+
+        for batch in plan.batches(self.config.kick_batch_size, after_id):
+            still_expired = await asyncio.to_thread(self.repo.get_expired_ids, [member.Id for _, member in batch], plan.membership_end_time)
+            kicks, removed = [], []
+            for action, member in batch:
+                if member.Id not in still_expired:
+                    # Renewed or unlinked since the plan was made
+                    report.processed += 1
+                    report.skipped += 1
+                elif action == CLEAR:
+                    report.processed += 1
+                    removed.append(member)
+                else:
+                    kicks.append(member)
+
+            results = await asyncio.gather(*(engine.kick(member) for member in kicks))
+            removed.extend(member for member, ok in zip(kicks, results) if ok)
+            if removed:
+                await self._persist_kicked(removed)
+            if on_checkpoint is not None:
+                await asyncio.to_thread(on_checkpoint, batch[-1][1].Id)
+
+            done += len(batch)
+            logger.info(f"Kick plan progress: {done}/{total} ({done / total:.0%}) {report.summary()}")
+            if on_progress is not None:
+                on_progress(done, total, report)
+
+        report.finished_at = time.monotonic()
+        logger.info(f"Kick plan applied. {report.summary()}")
+        return report
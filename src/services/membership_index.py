@@ -0,0 +1,202 @@
+from dataclasses import replace
+import asyncio
+import threading
+import time
+from src.models.member import MemberRow
+from src.repository import MemberRepository
+from logs.logger import LOGGER as logger
+
+
+class MembershipIndex:
+    """Active members (``IsMembership`` and ``IsActived``) held in memory.
+
+    Rows are keyed by Id, stored phone and ``UserTelegramId``; when several
+    active members share a phone or Telegram id the highest Id wins, as in the
+    repository lookups. The database stays the source of truth: the index is
+    loaded once, then refreshed from SQL Server change tracking every
+    ``refresh_interval`` seconds (in full when the saved version has been
+    cleaned up). The bot's own writes are applied straight away through
+    ``update``.
+
+    Other replicas and the scheduler write to the table too, so the index is
+    only ``fresh`` while delta refreshes keep succeeding. Without change
+    tracking it stays empty and is never served; every ``reload_interval``
+    seconds it checks whether tracking has been turned on.
+    """
+
+    def __init__(self, repository: MemberRepository, refresh_interval: float = 10.0, reload_interval: float = 300.0, max_staleness: float | None = None):
+        self.repo = repository
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        # A couple of missed refreshes are tolerated before lookups go back to the database
+        self.max_staleness = max_staleness if max_staleness is not None else 3 * refresh_interval
+        self.loaded = False
+        self.version: int | None = None
+        self.full_loads = 0
+        self.delta_refreshes = 0
+        self.delta_rows = 0
+        self.last_refresh_seconds = 0.0
+        self._by_id: dict[int, MemberRow] = {}
+        self._by_phone: dict[str, MemberRow] = {}
+        self._by_telegram_id: dict[int, MemberRow] = {}
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(), name="membership-index")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info(f"Membership index stopped: {self.stats()}")
+
+    @property
+    def fresh(self) -> bool:
+        """Whether lookups may be answered from memory: change tracking is on and a refresh succeeded lately."""
+        return self.loaded and self.version is not None and time.monotonic() - self._refreshed_at <= self.max_staleness
+
+    def get_by_phone(self, phone: str) -> MemberRow | None:
+        """Copy of the member with this (normalized) phone, or ``None``."""
+        row = self._by_phone.get(phone)
+        return replace(row) if row else None
+
+    def get_by_telegram_id(self, telegram_id: int) -> MemberRow | None:
+        row = self._by_telegram_id.get(telegram_id)
+        return replace(row) if row else None
+
+    def update(self, member_id: int, **fields) -> None:
+        """Apply a write the bot just made to the database."""
+        with self._lock:
+            row = self._by_id.get(member_id)
+            if row is not None:
+                self._put(replace(row, **fields))
+
+    def update_telegram_ids(self, telegram_ids: list[int], **fields) -> None:
+        with self._lock:
+            for telegram_id in telegram_ids:
+                row = self._by_telegram_id.get(telegram_id)
+                if row is not None:
+                    self._put(replace(row, **fields))
+
+    def load(self) -> None:
+        """Replace the index with every active member; remembers the change-tracking version first."""
+        started = time.perf_counter()
+        versions = self.repo.get_change_tracking_version()
+        if versions is None:
+            # Writes by other processes would never show up; leave lookups to the database
+            if not self.loaded:
+                logger.warning("Change tracking is off for Tbl_Member; the membership index stays empty")
+            with self._lock:
+                self._by_id, self._by_phone, self._by_telegram_id = {}, {}, {}
+                self.version = None
+                self.loaded = True
+            self._loaded_at = time.monotonic()
+            return
+        rows = self.repo.get_active_member_rows()
+        by_id, by_phone, by_telegram_id = {}, {}, {}
+        for row in sorted(rows, key=lambda row: row.Id):
+            by_id[row.Id] = row
+            if row.Phone:
+                by_phone[row.Phone] = row
+            if row.UserTelegramId is not None:
+                by_telegram_id[row.UserTelegramId] = row
+        with self._lock:
+            self._by_id, self._by_phone, self._by_telegram_id = by_id, by_phone, by_telegram_id
+            self.version = versions[0]
+            self.loaded = True
+        self._loaded_at = self._refreshed_at = time.monotonic()
+        self.full_loads += 1
+        self.last_refresh_seconds = time.perf_counter() - started
+        logger.info(f"Membership index loaded {len(by_id)} members in {self.last_refresh_seconds:.2f}s (change tracking version {self.version})")
+
+    def refresh(self) -> None:
+        """Apply changes since the last load or refresh, falling back to a full reload."""
+        if not self.loaded:
+            self.load()
+            return
+
+        if self.version is None:
+            # No change tracking yet: look again on the slow schedule
+            if time.monotonic() - self._loaded_at >= self.reload_interval:
+                self.load()
+            return
+
+        versions = self.repo.get_change_tracking_version()
+        if versions is None or self.version < versions[1]:
+            # Tracking was turned off, or our version was cleaned up
+            self.load()
+            return
+
+        started = time.perf_counter()
+        current, _ = versions
+        active, removed = self.repo.get_member_changes(self.version)
+        with self._lock:
+            for member_id in removed:
+                self._drop(member_id)
+            for row in active:
+                self._put(row)
+            self.version = current
+        self._refreshed_at = time.monotonic()
+        self.delta_refreshes += 1
+        self.delta_rows += len(active) + len(removed)
+        self.last_refresh_seconds = time.perf_counter() - started
+        if active or removed:
+            logger.info(f"Membership index applied {len(active)} changes and {len(removed)} removals (version {current})")
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "fresh": int(self.fresh),
+            "members": len(self._by_id),
+            "phones": len(self._by_phone),
+            "telegram_ids": len(self._by_telegram_id),
+            "full_loads": self.full_loads,
+            "delta_refreshes": self.delta_refreshes,
+            "delta_rows": self.delta_rows,
+            "last_refresh_seconds": self.last_refresh_seconds,
+        }
+
+    def _put(self, row: MemberRow) -> None:
+        self._drop(row.Id)
+        self._by_id[row.Id] = row
+        if row.Phone and (row.Phone not in self._by_phone or self._by_phone[row.Phone].Id <= row.Id):
+            self._by_phone[row.Phone] = row
+        if row.UserTelegramId is not None and (row.UserTelegramId not in self._by_telegram_id or self._by_telegram_id[row.UserTelegramId].Id <= row.Id):
+            self._by_telegram_id[row.UserTelegramId] = row
+
+    def _drop(self, member_id: int) -> None:
+        row = self._by_id.pop(member_id, None)
+        if row is None:
+            return
+        if row.Phone and self._by_phone.get(row.Phone) is row:
+            del self._by_phone[row.Phone]
+            self._promote(lambda other: other.Phone == row.Phone, self._by_phone, row.Phone)
+        if row.UserTelegramId is not None and self._by_telegram_id.get(row.UserTelegramId) is row:
+            del self._by_telegram_id[row.UserTelegramId]
+            self._promote(lambda other: other.UserTelegramId == row.UserTelegramId, self._by_telegram_id, row.UserTelegramId)
+
+    def _promote(self, matches, index: dict, key) -> None:
+        # Rare: another active member shares the key of the one that went away
+        candidates = [other for other in self._by_id.values() if matches(other)]
+        if candidates:
+            index[key] = max(candidates, key=lambda other: other.Id)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Membership index refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,104 @@
+from typing import Awaitable, Callable
+import asyncio
+import time
+from logs.logger import LOGGER as logger
+
+# Writes ``HasJoinedTelegramGroup`` for a list of Telegram ids; returns the rows changed
+WriteJoined = Callable[[list[int], bool], Awaitable[int]]
+
+
+class MembershipSync:
+    """Coalesces group join/leave events and writes them to the database in batches.
+
+    ``record`` only updates an in-memory map of Telegram id to latest state, so
+    a user who joins, leaves and rejoins within one ``window`` costs a single
+    write. Pending events are flushed every ``window`` seconds, or sooner once
+    ``max_batch`` users are waiting, as one set-based UPDATE per state.
+    """
+
+    def __init__(self, write: WriteJoined, window: float = 2.0, max_batch: int = 500):
+        self.write = write
+        self.window = window
+        self.max_batch = max_batch
+        self.pending: dict[int, bool] = {}
+        self.events = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(), name="membership-sync")
+            logger.info(f"Membership sync started (window={self.window}s, max_batch={self.max_batch})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Don't lose events that arrived during the last window
+        await self.flush()
+        logger.info(f"Membership sync stopped: {self.stats()}")
+
+    def record(self, telegram_id: int, joined: bool) -> None:
+        """Queue the latest group state of a user; an earlier pending state is replaced."""
+        self.events += 1
+        if telegram_id in self.pending:
+            self.coalesced += 1
+        self.pending[telegram_id] = joined
+        if len(self.pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """Write every pending state now; returns the number of rows changed."""
+        if not self.pending:
+            return 0
+        batch, self.pending = self.pending, {}
+        started = time.perf_counter()
+        written = 0
+        try:
+            for joined in (True, False):
+                telegram_ids = [telegram_id for telegram_id, state in batch.items() if state is joined]
+                if telegram_ids:
+                    written += await self.write(telegram_ids, joined)
+        except Exception as e:
+            self.failed_flushes += 1
+            # Put the batch back for the next flush, behind anything newer for the same users
+            for telegram_id, joined in batch.items():
+                self.pending.setdefault(telegram_id, joined)
+            logger.error(f"Membership sync flush of {len(batch)} users failed, will retry: {e}")
+            return 0
+
+        self.flushes += 1
+        self.rows_written += written
+        self.last_flush_seconds = time.perf_counter() - started
+        logger.info(f"Membership sync wrote {written} changes for {len(batch)} users in {self.last_flush_seconds * 1000:.1f}ms")
+        return written
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "pending": len(self.pending),
+            "events": self.events,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.window)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,244 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, TypeVar
+import asyncio
+import time
+from telegram.error import RetryAfter
+from src.utils import TokenBucket
+from src.utils.metrics import OUTBOUND_QUEUE_DEPTH, OUTBOUND_WAIT_SECONDS
+from logs.logger import LOGGER as logger
+
+T = TypeVar("T")
+
+INTERACTIVE = "interactive"  # replies and join decisions a user is waiting for
+BULK = "bulk"                # kicks, reminders and other background sweeps
+PRIORITIES = (INTERACTIVE, BULK)
+
+
+@dataclass
+class _Job:
+    call: Callable[[], Awaitable]
+    priority: str
+    chat_id: int | None
+    max_retries: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class OutboundScheduler:
+    """Sends every Bot API call of the process under one set of budgets.
+
+    Calls wait in one queue per priority class and are started in strict
+    priority order, so a user's reply never queues behind a kick sweep. Every
+    call spends a token from the global bucket (``rate``/s); calls that post
+    into a chat are also spaced ``1 / chat_rate`` seconds apart per chat. A
+    ``RetryAfter`` pauses that chat; for calls without a chat it pauses their
+    class and the classes below it, so a bulk 429 never holds back replies.
+    Either way the call is queued again at the front of its class.
+    """
+
+    def __init__(self, rate: float = 30.0, burst: int = 30, chat_rate: float = 1.0, concurrency: int = 32, max_retries: int = 3, drain_timeout: float = 10.0):
+        self.limiter = TokenBucket(rate=rate, burst=burst)
+        self.chat_interval = 1.0 / chat_rate if chat_rate > 0 else 0.0
+        self.max_retries = max_retries
+        self.drain_timeout = drain_timeout
+        self.queues: dict[str, deque[_Job]] = {priority: deque() for priority in PRIORITIES}
+        self.sent = dict.fromkeys(PRIORITIES, 0)
+        self.failed = dict.fromkeys(PRIORITIES, 0)
+        self.throttled = dict.fromkeys(PRIORITIES, 0)
+        self.in_flight = 0
+        self._chat_ready: dict[int, float] = {}
+        self._paused_until = dict.fromkeys(PRIORITIES, 0.0)
+        self._running: set[asyncio.Task] = set()
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch_loop(), name="outbound-scheduler")
+            logger.info(f"Outbound scheduler started (rate={self.limiter.target_rate}/s, chat_interval={self.chat_interval}s)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._running:
+            # Calls already sent are left to finish; their callers are waiting on them
+            _, pending = await asyncio.wait(set(self._running), timeout=self.drain_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        dropped = 0
+        for priority, queue in self.queues.items():
+            while queue:
+                queue.popleft().future.cancel()
+                dropped += 1
+            OUTBOUND_QUEUE_DEPTH.set(0, priority=priority)
+        logger.info(f"Outbound scheduler stopped ({dropped} calls dropped): {self.stats()}")
+
+    async def submit(self, call: Callable[[], Awaitable[T]], priority: str = INTERACTIVE, chat_id: int | None = None, max_retries: int | None = None) -> T:
+        """Run ``call`` once the budgets allow it and return its result.
+
+        ``chat_id`` is the chat the call posts into, if any. Before ``start``
+        (``manage.py``, tests) the call runs straight away.
+        """
+        if self._task is None:
+            return await call()
+
+        job = _Job(call, priority, chat_id, self.max_retries if max_retries is None else max_retries, asyncio.get_running_loop().create_future())
+        if self._can_start_now(job):
+            # Nothing to overtake and the budgets allow it: skip the dispatcher round trip
+            await self._semaphore.acquire()
+            self._claim(job, time.monotonic())
+            await self._run(job)
+        else:
+            self._enqueue(job)
+        return await job.future
+
+    def stats(self) -> dict[str, float]:
+        now = time.monotonic()
+        stats: dict[str, float] = {"in_flight": self.in_flight, "chats_waiting": len(self._chat_ready)}
+        for priority in PRIORITIES:
+            stats[f"{priority}_queued"] = len(self.queues[priority])
+            stats[f"{priority}_sent"] = self.sent[priority]
+            stats[f"{priority}_failed"] = self.failed[priority]
+            stats[f"{priority}_throttled"] = self.throttled[priority]
+            stats[f"{priority}_paused_seconds"] = max(0.0, self._paused_until[priority] - now)
+        return stats
+
+    def _can_start_now(self, job: _Job) -> bool:
+        rank = PRIORITIES.index(job.priority)
+        if any(self.queues[priority] for priority in PRIORITIES[:rank + 1]) or self._semaphore.locked():
+            return False
+        if self._paused_until[job.priority] > time.monotonic():
+            return False
+        if job.chat_id is not None and self._chat_ready.get(job.chat_id, 0.0) > time.monotonic():
+            return False
+        return self.limiter.try_acquire()
+
+    def _claim(self, job: _Job, now: float) -> None:
+        """Spend the job's per-chat slot; its global token is already taken."""
+        if job.chat_id is not None and self.chat_interval:
+            self._chat_ready[job.chat_id] = now + self.chat_interval
+            if len(self._chat_ready) > 10000:
+                self._chat_ready = {chat: ready for chat, ready in self._chat_ready.items() if ready > now}
+
+    def _enqueue(self, job: _Job, front: bool = False) -> None:
+        queue = self.queues[job.priority]
+        if front:
+            queue.appendleft(job)
+        else:
+            queue.append(job)
+        OUTBOUND_QUEUE_DEPTH.set(len(queue), priority=job.priority)
+        self._wakeup.set()
+
+    def _next_job(self, now: float) -> tuple[_Job | None, float | None]:
+        """Pop the first job whose chat may be posted to; else the seconds until one may."""
+        wait = None
+        for priority in PRIORITIES:
+            queue = self.queues[priority]
+            paused = self._paused_until[priority] - now
+            if paused > 0:
+                if queue:
+                    wait = paused if wait is None else min(wait, paused)
+                continue
+            for i, job in enumerate(queue):
+                if job.future.done():
+                    # The caller gave up (cancelled) while the call was queued
+                    del queue[i]
+                    OUTBOUND_QUEUE_DEPTH.set(len(queue), priority=priority)
+                    return self._next_job(now)
+                ready = self._chat_ready.get(job.chat_id, 0.0) if job.chat_id is not None else 0.0
+                if ready <= now:
+                    del queue[i]
+                    OUTBOUND_QUEUE_DEPTH.set(len(queue), priority=priority)
+                    return job, None
+                wait = ready - now if wait is None else min(wait, ready - now)
+        return None, wait
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._semaphore.acquire()
+            try:
+                job = await self._take()
+            except BaseException:
+                self._semaphore.release()
+                raise
+            task = asyncio.create_task(self._run(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _take(self) -> _Job:
+        """Wait for a global token and a sendable job, choosing the job only once both are there."""
+        while True:
+            delay = self.limiter.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            now = time.monotonic()
+            job, wait = self._next_job(now)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if not self.limiter.try_acquire():
+                self._enqueue(job, front=True)
+                continue
+            self._claim(job, now)
+            return job
+
+    async def _run(self, job: _Job) -> None:
+        OUTBOUND_WAIT_SECONDS.observe(time.monotonic() - job.enqueued_at, priority=job.priority)
+        self.in_flight += 1
+        try:
+            result = await job.call()
+        except RetryAfter as e:
+            self.throttled[job.priority] += 1
+            until = time.monotonic() + e.retry_after
+            if job.chat_id is not None:
+                self._chat_ready[job.chat_id] = max(self._chat_ready.get(job.chat_id, 0.0), until)
+            else:
+                for priority in PRIORITIES[PRIORITIES.index(job.priority):]:
+                    self._paused_until[priority] = max(self._paused_until[priority], until)
+            if job.attempts < job.max_retries and not job.future.done():
+                job.attempts += 1
+                logger.warning(f"Flood control hit on a {job.priority} call, retrying in {e.retry_after}s (attempt {job.attempts})")
+                self._enqueue(job, front=True)
+                return
+            self._finish(job, exception=e)
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            self._finish(job, exception=e)
+        else:
+            self.limiter.reward()
+            self._finish(job, result=result)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def _finish(self, job: _Job, result=None, exception: BaseException | None = None) -> None:
+        if exception is not None:
+            self.failed[job.priority] += 1
+        else:
+            self.sent[job.priority] += 1
+        if job.future.done():
+            return
+        if exception is not None:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(result)
@@ -0,0 +1,205 @@
+from dataclasses import dataclass, field
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from typing import Callable
+import asyncio
+import functools
+import time
+from telegram.error import Forbidden, RetryAfter
+from config import Config
+from src.models.member import MemberRow
+from src.models.reminder import SENT, FAILED, BLOCKED
+from src.repository import ReminderRepository
+from src.services.membership import MemberService
+from src.services.outbound import BULK
+from src.utils import TokenBucket, iterate_in_thread
+from src.utils.metrics import REMINDER_MESSAGES
+from logs.logger import LOGGER as logger
+
+
+@dataclass(frozen=True)
+class ReminderCampaign:
+    '''Reminders for memberships that end in ``[since, until)``, one day, sent ``days_before`` it.'''
+    name: str
+    since: datetime
+    until: datetime
+    days_before: int
+
+    @classmethod
+    def for_day(cls, day: datetime, days_before: list[int]) -> list["ReminderCampaign"]:
+        """The campaigns due on ``day``; the name only depends on the expiry day and offset, so reruns reuse it."""
+        start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        campaigns = []
+        for days in sorted(set(days_before), reverse=True):
+            expiry_day = start + timedelta(days=days)
+            campaigns.append(cls(
+                name=f"payment-reminder:{expiry_day:%Y-%m-%d}:{days}d",
+                since=expiry_day,
+                until=expiry_day + timedelta(days=1),
+                days_before=days,
+            ))
+        return campaigns
+
+
+@dataclass
+class ReminderReport:
+    '''Counters collected during one campaign run.'''
+    selected: int = 0
+    sent: int = 0
+    blocked: int = 0
+    failed: int = 0
+    skipped: int = 0
+    throttled: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+    @property
+    def duration(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        '''Reminders sent per second.'''
+        return self.sent / self.duration if self.duration > 0 else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "selected": self.selected,
+            "sent": self.sent,
+            "blocked": self.blocked,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "throttled": self.throttled,
+            "duration": round(self.duration, 3),
+            "throughput": round(self.throughput, 3),
+        }
+
+    def summary(self) -> str:
+        return (
+            f"selected={self.selected} sent={self.sent} blocked={self.blocked} failed={self.failed} "
+            f"skipped={self.skipped} throttled={self.throttled} "
+            f"duration={self.duration:.1f}s throughput={self.throughput:.2f}/s"
+        )
+
+
+class ReminderService:
+    """Sends payment reminders to members whose membership is about to end.
+
+    Recipients are read in Id-keyset pages while the previous page is being
+    sent. Each page is claimed in the delivery table before any message goes
+    out and its outcomes are written back in one batch, so a crashed or
+    retried campaign resumes without messaging anyone twice.
+    """
+
+    def __init__(self, config: Config, member_service: MemberService, repository: ReminderRepository):
+        self.member_service = member_service
+        self.repo = repository
+        # Environment values can't hold newlines; allow "\n" in the template
+        self.template = config.payment_reminder_template.replace("\\n", "\n")
+        self.rate = config.payment_reminder_rate
+        self.concurrency = config.payment_reminder_concurrency
+        self.batch_size = config.payment_reminder_batch_size
+        self.max_retries = 5
+
+    def render(self, member: MemberRow, days_before: int) -> str:
+        expires_on = member.MembershipTime.strftime("%d %b %Y") if member.MembershipTime else ""
+        return self.template.format(days_left=days_before, expires_on=expires_on)
+
+    async def send_campaign(
+        self,
+        campaign: ReminderCampaign,
+        after_id: int = 0,
+        on_checkpoint: Callable[[int], None] | None = None,
+    ) -> ReminderReport:
+        """Remind every linked, active member of ``campaign`` after member ``after_id``.
+
+        ``on_checkpoint`` receives the last member Id of each page once its
+        outcomes are stored.
+        """
+        # A bad placeholder should fail before anyone is claimed
+        self.render(MemberRow(0, 0, datetime.now()), campaign.days_before)
+        logger.info(f"Starting {campaign.name} ({campaign.since} <= MembershipTime < {campaign.until}, after Id {after_id})")
+
+        report = ReminderReport()
+        limiter = TokenBucket(rate=self.rate, burst=max(1, int(self.rate)))
+        semaphore = asyncio.Semaphore(max(self.concurrency, 1))
+        pages = iterate_in_thread(
+            self.member_service.repo.iter_members_expiring_between(
+                campaign.since, campaign.until, batch_size=self.batch_size, after_id=after_id
+            ),
+            name="reminder-fetch",
+        )
+        # One page is read ahead while the previous one is being sent
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+        async def fetch() -> None:
+            async with aclosing(pages):
+                async for page in pages:
+                    await fetched.put(page)
+            await fetched.put(None)
+
+        async def send() -> None:
+            while (page := await fetched.get()) is not None:
+                report.selected += len(page)
+
+                claimed = await asyncio.to_thread(self.repo.claim, campaign.name, page)
+                report.skipped += len(page) - len(claimed)
+                results = await asyncio.gather(*(
+                    self._send(member, self.render(member, campaign.days_before), limiter, semaphore, report)
+                    for member in claimed
+                ))
+                if results:
+                    await asyncio.to_thread(self.repo.record, campaign.name, results)
+                for _, status, _ in results:
+                    if status == SENT:
+                        report.sent += 1
+                    elif status == BLOCKED:
+                        report.blocked += 1
+                    else:
+                        report.failed += 1
+                    REMINDER_MESSAGES.inc(result=status)
+                if on_checkpoint is not None:
+                    await asyncio.to_thread(on_checkpoint, page[-1].Id)
+                logger.info(f"{campaign.name} progress: {report.summary()}")
+
+        stages = [asyncio.create_task(fetch()), asyncio.create_task(send())]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # A failed send or claim stops the fetcher, which closes the page reader
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+        report.finished_at = time.monotonic()
+        logger.info(f"{campaign.name} completed. {report.summary()}")
+        return report
+
+    async def _send(self, member: MemberRow, text: str, limiter: TokenBucket, semaphore: asyncio.Semaphore, report: ReminderReport) -> tuple[int, str, str | None]:
+        """Send one reminder; returns ``(MemberId, status, error)`` for the delivery table."""
+        call = functools.partial(self.member_service.bot.send_message, chat_id=member.UserTelegramId, text=text)
+        async with semaphore:
+            attempt = 0
+            while True:
+                await limiter.acquire()
+                try:
+                    outbound = self.member_service.outbound
+                    if outbound is not None:
+                        await outbound.submit(call, BULK, chat_id=member.UserTelegramId, max_retries=0)
+                    else:
+                        await call()
+                except RetryAfter as e:
+                    limiter.penalize(e.retry_after)
+                    report.throttled += 1
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        return member.Id, FAILED, str(e)
+                    continue
+                except Forbidden as e:
+                    return member.Id, BLOCKED, str(e)
+                except Exception as e:
+                    logger.warning(f"Failed to send a payment reminder to member {member.Id}: {e}")
+                    return member.Id, FAILED, str(e)
+                limiter.reward()
+                return member.Id, SENT, None
@@ -2,8 +2,17 @@
 Utility functions and helpers.
 """
 
-from .phone_number import extract_phone_number
+from .phone_number import extract_phone_number, normalize_phone_number, normalize_phone_numbers
+from .rate_limiter import TokenBucket
+from .cache import TTLCache, MISSING
+from .thread_iter import iterate_in_thread
 
 __all__ = [
     "extract_phone_number",
+    "normalize_phone_number",
+    "normalize_phone_numbers",
+    "TokenBucket",
+    "TTLCache",
+    "MISSING",
+    "iterate_in_thread",
 ]
@@ -1,28 +1,56 @@
+from typing import Iterable
 import re
 
-def extract_phone_number(text: str) -> str:
-    """Extract and normalize phone number from text"""
-    
-    # Remove all non-digit characters except +
-    cleaned = re.sub(r'[^\d+]', '', text)
-    
-    # Check if it looks like a phone number (at least 10 digits)
-    if len(re.sub(r'[^\d]', '', cleaned)) < 10:
+_NON_DIGITS = re.compile(r'\D+')
+_MIN_DIGITS = 10
+
+
+def normalize_phone_number(text: str) -> str | None:
+    """Normalize a phone number to the local ``0...`` form stored in Tbl_Member.Phone.
+
+    Every non-digit is dropped, leading zeros and the Indonesian ``62`` country
+    code are replaced by a single ``0``. Returns ``None`` when fewer than 10
+    digits remain.
+    """
+    digits = _NON_DIGITS.sub('', text)
+    if len(digits) < _MIN_DIGITS:
         return None
-        
-    # Remove + and any leading zeros for processing
-    phone = cleaned.replace('+', '').lstrip('0')
-    
-    # Handle Indonesian phone numbers
+
+    # Remove any leading zeros (local 0 or international 00) for processing
+    phone = digits.lstrip('0')
+
+    # Handle Indonesian phone numbers: +62 / 62 becomes 0, anything else
+    # is assumed to be a local number missing its 0 prefix
     if phone.startswith('62'):
-        # Convert +62 to 0
         phone = '0' + phone[2:]
-    elif len(phone) >= 10 and not phone.startswith('0'):
-        # If it's a long number without country code, assume it's Indonesian
-        # and add 0 prefix
+    else:
         phone = '0' + phone
-    elif not phone.startswith('0') and len(phone) < 15:
-        # For shorter numbers, assume local format and add 0
-        phone = '0' + phone
-        
-    return phone if len(phone) >= 10 else None
\ No newline at end of file
+
+    return phone if len(phone) >= _MIN_DIGITS else None
+
+
+def extract_phone_number(text: str) -> str:
+    """Extract and normalize phone number from text"""
+    return normalize_phone_number(text)
+
+
+def normalize_phone_numbers(values: Iterable[object]) -> tuple[list[str | None], list[bool]]:
+    """Normalize a column of raw phone numbers in one pass.
+
+    Returns the normalized phones (``None`` where invalid) and a validity mask
+    of the same length, so one implementation serves both the bot and bulk
+    imports. Empty cells, NaN and numeric cells are accepted.
+    """
+    normalized: list[str | None] = []
+    mask: list[bool] = []
+    for value in values:
+        phone = None
+        if isinstance(value, str):
+            phone = normalize_phone_number(value)
+        elif isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+            # Spreadsheet exports often turn phone columns into numbers
+            phone = normalize_phone_number(str(int(value)))
+
+        normalized.append(phone)
+        mask.append(phone is not None)
+    return normalized, mask
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket that adapts its rate to Telegram flood control.
+
+    Tokens refill at ``rate`` per second up to ``burst``. When Telegram answers
+    with ``RetryAfter`` the bucket is paused for that long and the rate is
+    halved; every successful call then nudges it back towards the target.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 1.0, recovery: float = 1.05):
+        self.target_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self.min_rate = min(float(min_rate), self.target_rate)
+        self.recovery = recovery
+        self.tokens = float(self.burst)
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until ``tokens`` can be spent without exceeding the current rate."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Spend ``tokens`` if they are available right now, without waiting."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return False
+        self._refill(now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` could be spent, assuming nobody else spends first."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+    def penalize(self, retry_after: float) -> None:
+        """Back off after a ``RetryAfter`` response from Telegram."""
+        now = time.monotonic()
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, now + retry_after)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self._updated = now
+
+    def reward(self) -> None:
+        """Recover towards the target rate after a successful call."""
+        if self.rate < self.target_rate:
+            self.rate = min(self.target_rate, self.rate * self.recovery)
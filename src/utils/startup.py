@@ -0,0 +1,46 @@
+import os
+import time
+from src.utils.metrics import STARTUP_SECONDS
+
+
+def _process_started_at() -> float:
+    """Wall-clock time the process was created, so interpreter start-up counts too."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name; starttime is field 22 overall, in clock ticks since boot
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        # Not Linux: fall back to the first import of this module
+        return time.time()
+
+
+class StartupTimer:
+    '''Seconds from process start to each named startup phase.'''
+
+    def __init__(self, started_at: float | None = None):
+        self.started_at = started_at if started_at is not None else _process_started_at()
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str) -> float:
+        elapsed = max(0.0, time.time() - self.started_at)
+        self.phases.append((phase, elapsed))
+        STARTUP_SECONDS.set(elapsed, phase=phase)
+        return elapsed
+
+    def elapsed(self) -> float:
+        return self.phases[-1][1] if self.phases else 0.0
+
+    def report(self) -> str:
+        """One line with the time at each phase and how long the phase itself took."""
+        parts = []
+        previous = 0.0
+        for phase, elapsed in self.phases:
+            parts.append(f"{phase} {elapsed:.2f}s (+{elapsed - previous:.2f}s)")
+            previous = elapsed
+        return ", ".join(parts) or "no phases recorded"
+
+
+STARTUP = StartupTimer()
@@ -0,0 +1,109 @@
+from typing import Optional, Tuple
+import importlib.util
+import time
+import httpx
+from telegram.request import HTTPXRequest, RequestData
+from config import Config
+from src.utils.metrics import TELEGRAM_API_SECONDS, TELEGRAM_API_ERRORS, TELEGRAM_API_RETRY_AFTER
+from logs.logger import LOGGER as logger
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """``HTTPXRequest`` that records latency, errors and 429s per Bot API method.
+
+    It also counts how often a call found every pooled connection busy and how
+    many calls needed a new TCP connection instead of reusing a kept-alive one.
+    """
+
+    def __init__(self, connection_pool_size: int = 1, keepalive_expiry: float | None = None, **kwargs):
+        httpx_kwargs = dict(kwargs.pop("httpx_kwargs", None) or {})
+        hooks = dict(httpx_kwargs.get("event_hooks") or {})
+        hooks["request"] = [*hooks.get("request", []), self._attach_trace]
+        httpx_kwargs["event_hooks"] = hooks
+        if keepalive_expiry is not None:
+            httpx_kwargs["limits"] = httpx.Limits(
+                max_connections=connection_pool_size,
+                max_keepalive_connections=connection_pool_size,
+                keepalive_expiry=keepalive_expiry,
+            )
+        super().__init__(connection_pool_size=connection_pool_size, httpx_kwargs=httpx_kwargs, **kwargs)
+        self.pool_size = connection_pool_size
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.queued = 0
+        self.connections_opened = 0
+
+    async def _attach_trace(self, request: httpx.Request) -> None:
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        *args,
+        **kwargs,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        self.requests += 1
+        if self.in_flight >= self.pool_size:
+            # Every connection is busy; this call waits up to the pool timeout
+            self.queued += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+        except Exception as e:
+            TELEGRAM_API_ERRORS.inc(method=api_method, error=type(e).__name__)
+            raise
+        finally:
+            self.in_flight -= 1
+            TELEGRAM_API_SECONDS.observe(time.perf_counter() - started, method=api_method)
+
+        if code == 429:
+            TELEGRAM_API_RETRY_AFTER.inc(method=api_method)
+        if code >= 400:
+            TELEGRAM_API_ERRORS.inc(method=api_method, error=str(code))
+        return code, payload
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pool_size": self.pool_size,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(0, self.requests - self.connections_opened),
+        }
+
+
+def create_request(config: Config, get_updates: bool = False) -> InstrumentedRequest:
+    """Bot API request pool built from the ``TELEGRAM_*`` settings.
+
+    ``get_updates`` builds the single-connection pool for long polling; its
+    read timeout is passed per call by ``run_polling``.
+    """
+    http_version = "1.1"
+    if config.telegram_http2:
+        if importlib.util.find_spec("h2") is not None:
+            http_version = "2"
+        else:
+            logger.warning("TELEGRAM_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+
+    return InstrumentedRequest(
+        connection_pool_size=1 if get_updates else config.telegram_pool_size,
+        keepalive_expiry=config.telegram_keepalive_expiry,
+        http_version=http_version,
+        connect_timeout=config.telegram_connect_timeout,
+        read_timeout=config.telegram_read_timeout,
+        write_timeout=config.telegram_write_timeout,
+        pool_timeout=config.telegram_pool_timeout,
+        media_write_timeout=config.telegram_media_write_timeout,
+    )
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, Iterator, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+async def iterate_in_thread(iterator: Iterator[T], name: str = "db-stream") -> AsyncGenerator[T, None]:
+    """Step a blocking iterator from one dedicated thread.
+
+    A streamed result holds one connection and cursor, so it is always
+    advanced, and finally closed, by the same thread, never by whichever
+    default-pool thread is free. The iterator is closed when the consumer
+    finishes, fails or is cancelled, which returns the connection to the pool.
+    Close the generator (``contextlib.aclosing``) if you may stop early.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+    try:
+        while True:
+            item = await loop.run_in_executor(executor, next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            # Queued behind a next() that may still be running; shielded so a second cancel can't skip it
+            await asyncio.shield(loop.run_in_executor(executor, close))
+        executor.shutdown(wait=False)
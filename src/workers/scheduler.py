@@ -1,54 +1,214 @@
-import schedule
-import time
+import json
+import os
+import socket
 import threading
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+from config import Config
 from logs.logger import LOGGER as logger
+from src.models.job import JobRun
+from src.repository.job import JobRepository
+from src.services.reminder import ReminderCampaign
 from src.workers.telegram import TelegramWorker
-import os
+
+KICK_JOB = "kick_non_members"
+KICK_HIGH_WATER = f"{KICK_JOB}.membership_high_water"
+REMINDER_JOB = "payment_reminder"
+
+
+class LeaseLost(Exception):
+    """The job lease expired or was taken over while a run was in progress."""
+
 
 class Scheduler:
-    def __init__(self, telegram_worker: TelegramWorker):
+    """Runs the daily kick job, and optionally the payment reminders, from a durable job store.
+
+    Each due run is claimed through a lease, so only one instance executes it,
+    and checkpoints the last processed member Id so a restart resumes where the
+    previous attempt stopped. Run history lives in the job store.
+
+    In incremental mode the store also keeps the membership cut-off of the last
+    run that finished without failures; the next run only looks at memberships
+    that ended after it.
+
+    Payment reminders run once a day as one job run per campaign; the run
+    checkpoint lets a retry skip members whose outcome is already stored.
+    """
+
+    def __init__(self, telegram_worker: TelegramWorker, job_repo: JobRepository, config: Config):
         self.telegram_worker = telegram_worker
+        self.job_repo = job_repo
+        self.kick_time = config.telegram_cleaning_schedule
+        self.lease_seconds = config.job_lease_seconds
+        self.max_attempts = config.job_max_attempts
+        self.poll_interval = config.scheduler_poll_interval
+        self.incremental = config.kick_mode == "incremental"
+        self.reminders_enabled = config.payment_reminder_enabled
+        self.reminder_time = config.payment_reminder_schedule
+        self.reminder_days = config.payment_reminder_days
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
         self.is_running = False
         self.scheduler_thread = None
+        self._stop = threading.Event()
+        self._hour = 0
+        self._minute = 1
+        self._reminder_hour = 9
+        self._reminder_minute = 0
 
     def setup_schedule(self):
         """Setup the daily schedule for kicking non-members"""
-        # Schedule the task to run every day at 9:00 AM
-        kick_time = os.getenv("TELEGRAM_CLEANING_SCHEDULE", "00:01")
-        schedule.every().day.at(kick_time).do(self._run_kick_task)
-        
-        # You can also add other schedules:
-        # schedule.every().hour.do(self._run_kick_task)  # Run every hour
-        # schedule.every().monday.at("10:00").do(self._run_kick_task)  # Run every Monday at 10 AM
-        
-        logger.info(f"Scheduled daily kick task at {kick_time}")
-
-    def _run_kick_task(self):
-        """Internal method to run the kick task with logging"""
-        logger.info(f"Running scheduled kick task at {datetime.now()}")
+        self._hour, self._minute = (int(part) for part in self.kick_time.split(":"))
+        logger.info(f"Scheduled daily kick task at {self.kick_time}")
+        if self.reminders_enabled:
+            self._reminder_hour, self._reminder_minute = (int(part) for part in self.reminder_time.split(":"))
+            logger.info(f"Scheduled payment reminders at {self.reminder_time}, {self.reminder_days} day(s) before memberships end")
+
+    def _scheduled_at(self, day: datetime) -> datetime:
+        return day.replace(hour=self._hour, minute=self._minute, second=0, microsecond=0)
+
+    def _is_pending(self, run_key: str, job_name: str = KICK_JOB) -> bool:
+        run = self.job_repo.get_run(job_name, run_key)
+        if run is None:
+            return True
+        if run.Status == "succeeded":
+            return False
+        return run.Attempts < self.max_attempts
+
+    def _tick(self):
+        now = datetime.now()
+        scheduled_at = self._scheduled_at(now)
+        run_key = scheduled_at.strftime("%Y-%m-%d")
+        if now >= scheduled_at and self._is_pending(run_key):
+            # Derive the cut-off from the run's day so retries see the same window
+            self._run_kick_task(run_key, scheduled_at.strftime("%Y-%m-%d 00:00:00.000"))
+
+        # Reminders keep their own time, which may be before the kick
+        if self.reminders_enabled and now >= now.replace(hour=self._reminder_hour, minute=self._reminder_minute, second=0, microsecond=0):
+            self.payment_reminder(now)
+
+    def _run_leased(self, job_name: str, run_key: str, work: Callable[[JobRun, Callable[[int], None]], None]) -> bool:
+        """Claim ``job_name``, then start (or resume) ``run_key`` and hand it to ``work``.
+
+        ``work`` receives the run and a checkpoint callback. Once the lease is
+        lost the callback raises ``LeaseLost`` instead of writing, which stops
+        the run between batches; the run row is then left to the new owner.
+        Any other failure in ``work`` is recorded on the run. Returns False if
+        another instance holds the job.
+        """
+        if not self.job_repo.acquire_lease(job_name, self.owner, self.lease_seconds):
+            logger.info(f"Run {run_key} of {job_name} is claimed by another instance, skipping")
+            return False
+
+        renewing = threading.Event()
+        lost = threading.Event()
+        renewer = threading.Thread(target=self._renew_lease, args=(renewing, job_name, lost), daemon=True)
+        renewer.start()
+        run = None
+
+        def checkpoint(last_id: int) -> None:
+            if lost.is_set():
+                raise LeaseLost(f"Lost the {job_name} job lease before checkpointing member {last_id}")
+            self.job_repo.checkpoint(run.Id, last_id)
+
         try:
-            self.telegram_worker.run_kick_task()
-            logger.info("Scheduled kick task completed successfully")
+            run = self.job_repo.start_run(job_name, run_key, self.owner)
+            work(run, checkpoint)
+        except LeaseLost as e:
+            logger.warning(f"Stopped {job_name} run {run_key}: {e}")
         except Exception as e:
-            logger.error(f"Error in scheduled kick task: {e}")
+            logger.error(f"Error in scheduled {job_name} run {run_key}: {e}")
+            if run is not None:
+                self.job_repo.finish_run(run.Id, "failed", error=str(e))
+        finally:
+            renewing.set()
+            renewer.join(timeout=5)
+            self.job_repo.release_lease(job_name, self.owner)
+        return True
+
+    def _run_kick_task(self, run_key: str, membership_end_time: str) -> bool:
+        """Claim, run and record one kick run. Returns False if another instance holds it."""
+        def work(run: JobRun, checkpoint: Callable[[int], None]) -> None:
+            after_id = run.Checkpoint or 0
+            since = self.job_repo.get_state(KICK_HIGH_WATER) if self.incremental else None
+            logger.info(
+                f"Running kick task {run_key} (run {run.Id}, attempt {run.Attempts}, after Id {after_id}, "
+                f"memberships ended {f'after {since} and ' if since else ''}by {membership_end_time})"
+            )
+
+            report = self.telegram_worker.run_kick_task(
+                after_id=after_id,
+                on_checkpoint=checkpoint,
+                since=since,
+                membership_end_time=membership_end_time,
+            )
+            self.job_repo.finish_run(run.Id, "succeeded", result=json.dumps(report.as_dict()))
+            if report.failed == 0 and after_id == 0 and (since is None or membership_end_time > since):
+                # Only a clean pass over the whole window moves the mark; otherwise the
+                # next run re-reads it, and members already kicked are filtered out
+                self.job_repo.set_state(KICK_HIGH_WATER, membership_end_time)
+            logger.info("Scheduled kick task completed successfully")
+
+        return self._run_leased(KICK_JOB, run_key, work)
+
+    def _run_reminder_campaign(self, campaign: ReminderCampaign) -> bool:
+        """Claim, run and record one payment-reminder campaign."""
+        def work(run: JobRun, checkpoint: Callable[[int], None]) -> None:
+            after_id = run.Checkpoint or 0
+            logger.info(f"Running {campaign.name} (run {run.Id}, attempt {run.Attempts}, after Id {after_id})")
+            report = self.telegram_worker.run_payment_reminders(
+                campaign,
+                after_id=after_id,
+                on_checkpoint=checkpoint,
+            )
+            self.job_repo.finish_run(run.Id, "succeeded", result=json.dumps(report.as_dict()))
+
+        return self._run_leased(REMINDER_JOB, campaign.name, work)
+
+    def _renew_lease(self, done: threading.Event, job_name: str = KICK_JOB, lost: threading.Event | None = None):
+        """Renew the lease until ``done``; set ``lost`` once another instance may hold it."""
+        renewed_at = time.monotonic()
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if self.job_repo.renew_lease(job_name, self.owner, self.lease_seconds):
+                    renewed_at = time.monotonic()
+                    continue
+                logger.warning(f"Lost the {job_name} job lease to another instance; stopping at the next checkpoint")
+            except Exception as e:
+                logger.error(f"Failed to renew {job_name} job lease: {e}")
+                if time.monotonic() - renewed_at < self.lease_seconds:
+                    continue
+                logger.warning(f"The {job_name} job lease has expired; stopping at the next checkpoint")
+            if lost is not None:
+                lost.set()
+            return
 
     def start(self):
         """Start the scheduler in a separate thread"""
         if self.is_running:
             logger.warning("Scheduler is already running")
             return
-        
+
         self.setup_schedule()
         self.is_running = True
-        
+        self._stop.clear()
+
         def run_scheduler():
             logger.info("Scheduler started")
-            while self.is_running:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+            try:
+                # Reads the job store, so it is logged from here rather than on the startup path
+                logger.info(f"Next kick task scheduled for: {self.get_next_run_time()}")
+            except Exception as e:
+                logger.error(f"Could not read the next kick run: {e}")
+            while True:
+                try:
+                    self._tick()
+                except Exception as e:
+                    logger.error(f"Scheduler tick failed: {e}")
+                if self._stop.wait(self.poll_interval):
+                    break
             logger.info("Scheduler stopped")
-        
+
         self.scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
         self.scheduler_thread.start()
         logger.info("Scheduler thread started")
@@ -57,29 +217,38 @@ class Scheduler:
         """Stop the scheduler"""
         if not self.is_running:
             return
-        
+
         self.is_running = False
-        schedule.clear()
-        
+        self._stop.set()
+
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             self.scheduler_thread.join(timeout=5)
-        
+
         logger.info("Scheduler stopped")
 
     def run_now(self):
         """Manually trigger the kick task immediately"""
         logger.info("Manually triggering kick task")
-        self._run_kick_task()
+        self._run_kick_task(f"manual-{datetime.now():%Y%m%d%H%M%S}", self.telegram_worker.member_service.membership_end_time())
 
     def get_next_run_time(self):
         """Get the next scheduled run time"""
-        jobs = schedule.jobs
-        if jobs:
-            return min(job.next_run for job in jobs)
-        return None
-    
-    def payment_reminder(self):
-        """Send payment reminders to users"""
-        logger.info("Sending payment reminders")
-        # Implement the logic to send payment reminders
-        pass
+        now = datetime.now()
+        scheduled_at = self._scheduled_at(now)
+        if now < scheduled_at:
+            return scheduled_at
+        if self._is_pending(scheduled_at.strftime("%Y-%m-%d")):
+            # Today's run is due but has not completed yet
+            return now
+        return scheduled_at + timedelta(days=1)
+
+    def get_run_history(self, limit: int = 20):
+        """Recent kick runs, newest first"""
+        return self.job_repo.get_runs(KICK_JOB, limit)
+
+    def payment_reminder(self, day: datetime | None = None):
+        """Send payment reminders to users: every campaign due on ``day`` that hasn't finished yet"""
+        for campaign in ReminderCampaign.for_day(day or datetime.now(), self.reminder_days):
+            if self._is_pending(campaign.name, REMINDER_JOB):
+                logger.info(f"Sending payment reminders: {campaign.name}")
+                self._run_reminder_campaign(campaign)
@@ -1,17 +1,115 @@
-import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Callable
 from config import Config
-from src.services import MemberService
+from src.db.mssql import Database
+from src.repository import MemberRepository
+from src.services import MemberService, KickReport, ReminderService, ReminderCampaign, ReminderReport
 from logs.logger import LOGGER as logger
 
 
+def _run_kick_shard(after_id: int, until_id: int, shard_count: int, since: str | None = None, membership_end_time: str | None = None) -> KickReport:
+    """Kick one Id range in a child process with its own DB pool and rate budget."""
+    config = Config()
+    config.load_from_env()
+    # Each shard gets an equal slice of the global Telegram budget
+    config.kick_rate = config.kick_rate / shard_count
+    config.kick_burst = max(1, config.kick_burst // shard_count)
+
+    db = Database(config)
+    db.connect()
+    try:
+        member_service = MemberService(config, MemberRepository(db))
+        return member_service.run_coroutine(member_service.kick_non_members(
+            after_id, until_id=until_id, since=since, membership_end_time=membership_end_time
+        ))
+    finally:
+        db.close()
+
+
 class TelegramWorker:
-    def __init__(self, config: Config, member_service: MemberService):
+    def __init__(self, config: Config, member_service: MemberService, reminder_service: ReminderService | None = None):
         self.group_id = config.telegram_group_id
         self.member_service = member_service
+        self.reminder_service = reminder_service
+        self.kick_shards = config.kick_shards
 
-    def run_kick_task(self):
+    def run_kick_task(
+        self,
+        after_id: int = 0,
+        on_checkpoint: Callable[[int], None] | None = None,
+        since: str | None = None,
+        membership_end_time: str | None = None,
+    ) -> KickReport:
         """Synchronous wrapper for the async kick task"""
         try:
-            asyncio.run(self.member_service.kick_non_members())
+            if self.kick_shards > 1:
+                return self.run_kick_task_sharded(self.kick_shards, after_id, on_checkpoint, since, membership_end_time)
+            report = self.member_service.run_coroutine(self.member_service.kick_non_members(
+                after_id, on_checkpoint, since=since, membership_end_time=membership_end_time
+            ))
+            report.publish()
+            return report
         except Exception as e:
             logger.error(f"Error running kick task: {e}")
+            raise
+
+    def run_kick_task_sharded(
+        self,
+        shards: int,
+        after_id: int = 0,
+        on_checkpoint: Callable[[int], None] | None = None,
+        since: str | None = None,
+        membership_end_time: str | None = None,
+    ) -> KickReport:
+        """Split the expired members into ``shards`` Id ranges and kick them in a process pool.
+
+        Shard reports are merged into one. ``on_checkpoint`` receives the end of
+        the longest run of leading shards that all succeeded, so a retry skips them.
+        """
+        membership_end_time = membership_end_time or self.member_service.membership_end_time()
+        bounds = self.member_service.get_kick_shard_bounds(shards, after_id, since, membership_end_time)
+        if not bounds:
+            logger.info("No expired members to kick")
+            return KickReport.merge([])
+
+        ranges = list(zip([after_id] + bounds[:-1], bounds))
+        logger.info(f"Running kick task in {len(ranges)} shards: {ranges}")
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(ranges), mp_context=context) as pool:
+            futures = [pool.submit(_run_kick_shard, lo, hi, len(ranges), since, membership_end_time) for lo, hi in ranges]
+            wait(futures)
+
+        reports, errors = [], []
+        completed_until = None
+        for (lo, hi), future in zip(ranges, futures):
+            error = future.exception()
+            if error is not None:
+                errors.append(error)
+                logger.error(f"Kick shard {lo + 1}..{hi} failed: {error}")
+                continue
+            reports.append(future.result())
+            if len(errors) == 0:
+                completed_until = hi
+
+        if on_checkpoint is not None and completed_until is not None:
+            on_checkpoint(completed_until)
+
+        report = KickReport.merge(reports)
+        report.publish(count_members=True)
+        logger.info(f"Sharded kick task finished. {report.summary()}")
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(ranges)} kick shards failed: {errors[0]}")
+        return report
+
+    def run_payment_reminders(
+        self,
+        campaign: ReminderCampaign,
+        after_id: int = 0,
+        on_checkpoint: Callable[[int], None] | None = None,
+    ) -> ReminderReport:
+        """Synchronous wrapper for one payment-reminder campaign"""
+        if self.reminder_service is None:
+            raise RuntimeError("Payment reminders need a ReminderService")
+        return self.member_service.run_coroutine(self.reminder_service.send_campaign(campaign, after_id, on_checkpoint))
@@ -0,0 +1,20 @@
+"""
+Shared fixtures: a seeded SQLite member database.
+"""
+import pytest
+
+from benchmarks.seed import seed_members
+from config import Config
+from src.db.mssql import Database
+
+
+@pytest.fixture
+def member_db(tmp_path):
+    """``Database`` on a SQLite file holding 200 synthetic members (see benchmarks.seed)."""
+    config = Config()
+    config.database_url = f"sqlite:///{tmp_path / 'members.sqlite3'}"
+    db = Database(config)
+    db.connect()
+    seed_members(db.engine, 200)
+    yield db
+    db.close()
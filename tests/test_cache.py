@@ -0,0 +1,57 @@
+"""
+Test file for the TTL/LRU lookup cache.
+"""
+import time
+
+from src.utils.cache import TTLCache, MISSING
+
+
+class TestTTLCache:
+    """Test cases for TTLCache."""
+
+    def test_hit_and_miss_counters(self):
+        """Lookups should be counted as hits or misses."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        assert cache.get("0812") is MISSING
+        cache.set("0812", "member")
+        assert cache.get("0812") == "member"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_negative_results_are_cached(self):
+        """A cached None is a hit, not a miss."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("0812", None)
+        assert cache.get("0812") is None
+
+    def test_negative_ttl_expires_first(self):
+        """Negative entries honour their shorter TTL."""
+        cache = TTLCache(maxsize=10, ttl=60, negative_ttl=0.01)
+        cache.set("missing", None)
+        cache.set("found", "member")
+        time.sleep(0.02)
+        assert cache.get("missing") is MISSING
+        assert cache.get("found") == "member"
+        assert cache.stats()["expirations"] == 1
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when full."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_tag(self):
+        """All keys tagged with a member Id are dropped together."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("0812", "member", tag=7)
+        cache.set("62812", "member", tag=7)
+        cache.set("0813", "other", tag=8)
+        cache.invalidate_tag(7)
+        assert cache.get("0812") is MISSING
+        assert cache.get("62812") is MISSING
+        assert cache.get("0813") == "other"
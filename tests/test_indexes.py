@@ -0,0 +1,82 @@
+"""
+Test file for the index advisor.
+"""
+import pytest
+
+from src.db.indexes import IndexAdvisor
+from src.models.member import MemberORM
+from src.repository import MemberRepository
+
+
+class FakeCursor:
+    """Records statements; the query under test fails."""
+
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement)
+        if statement.startswith("SELECT"):
+            raise RuntimeError("query timeout")
+
+
+class FakeRawConnection:
+    def __init__(self):
+        self.executed = []
+        self.closed = False
+        self.invalidated = False
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+    def close(self):
+        self.closed = True
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+class TestIndexAdvisor:
+    """Test cases for IndexAdvisor."""
+
+    def test_status_and_create_missing(self, member_db):
+        """A dropped declared index shows as missing and is created again."""
+        advisor = IndexAdvisor(member_db.engine, MemberORM.__table__)
+        names = [index.name for index in advisor.declared()]
+        assert "IX_Member_Phone_Active" in names
+        assert all(status.exists for status in advisor.status())
+
+        with member_db.engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX IX_Member_Phone_Active")
+        assert [status.name for status in advisor.status() if not status.exists] == ["IX_Member_Phone_Active"]
+        assert advisor.create_missing() == ["IX_Member_Phone_Active"]
+        assert all(status.exists for status in advisor.status())
+
+    def test_explain_reports_index_use(self, member_db):
+        """Plans are captured for the statements a repository call issues."""
+        advisor = IndexAdvisor(member_db.engine, MemberORM.__table__)
+        repo = MemberRepository(member_db)
+        plans = advisor.explain("get_by_phone", lambda: repo.get_by_phone("081200000007"))
+        assert len(plans) == 1
+        assert plans[0].rows == 1
+        assert any("IX_Member_Phone_Active" in operator for operator in plans[0].operators)
+        assert plans[0].scans == []
+
+    def test_mssql_plan_capture_is_switched_off_on_error(self):
+        """A failing statement still turns STATISTICS XML off before the connection goes back."""
+        raw = FakeRawConnection()
+        engine = type("FakeEngine", (), {"raw_connection": lambda self: raw})()
+        advisor = IndexAdvisor(engine, MemberORM.__table__)
+        with pytest.raises(RuntimeError):
+            advisor._mssql_plan("get_by_phone", "SELECT 1", ())
+        assert raw.executed == ["SET STATISTICS XML ON", "SELECT 1", "SET STATISTICS XML OFF"]
+        assert raw.closed and not raw.invalidated
+
+    def test_unsupported_dialect_is_reported_before_running(self):
+        """Other dialects get a ValueError, and the repository call is never made."""
+        engine = type("FakeEngine", (), {"dialect": type("Dialect", (), {"name": "postgresql"})()})()
+        advisor = IndexAdvisor(engine, MemberORM.__table__)
+        calls = []
+        with pytest.raises(ValueError, match="postgresql"):
+            advisor.explain("get_by_phone", lambda: calls.append(1))
+        assert calls == []
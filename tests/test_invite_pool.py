@@ -0,0 +1,83 @@
+"""
+Test file for the pre-minted invite link pool.
+"""
+import asyncio
+import types
+from datetime import datetime, timedelta, timezone
+
+from src.services.invite_pool import InviteLinkPool, expiry_note
+from src.services.outbound import INTERACTIVE, BULK
+
+
+class FakeBot:
+    """Mints numbered links and records revocations."""
+
+    def __init__(self):
+        self.minted = 0
+        self.revoked = []
+
+    async def create_chat_invite_link(self, chat_id, member_limit, expire_date):
+        self.minted += 1
+        return types.SimpleNamespace(invite_link=f"https://t.me/+link{self.minted}", expire_date=expire_date)
+
+    async def revoke_chat_invite_link(self, chat_id, invite_link):
+        self.revoked.append(invite_link)
+
+
+class FakeOutbound:
+    """Runs calls straight away, remembering their priority."""
+
+    def __init__(self):
+        self.priorities = []
+
+    async def submit(self, call, priority, chat_id=None, max_retries=None):
+        self.priorities.append(priority)
+        return await call()
+
+
+class TestInviteLinkPool:
+    """Test cases for InviteLinkPool."""
+
+    def test_refill_take_and_expire(self):
+        """The pool fills in the background, hands links out, and revokes ones too close to expiry."""
+        bot, outbound = FakeBot(), FakeOutbound()
+
+        async def scenario():
+            pool = InviteLinkPool(bot, -100, size=3, ttl=7200, min_remaining=3600, refill_interval=60, outbound=outbound)
+            await pool.start()
+            await asyncio.sleep(0.05)
+            assert len(pool.links) == 3
+
+            assert (await pool.acquire()).invite_link == "https://t.me/+link1"
+            await asyncio.sleep(0.05)
+            assert len(pool.links) == 3
+
+            # The oldest ready link now has less than min_remaining left
+            pool.links[0].expire_date = datetime.now(timezone.utc) + timedelta(minutes=30)
+            assert (await pool.acquire()).invite_link == "https://t.me/+link3"
+            await asyncio.sleep(0.05)
+            await pool.stop()
+            return pool
+
+        pool = asyncio.run(scenario())
+        assert bot.revoked[0] == "https://t.me/+link2"
+        assert pool.stats()["served_from_pool"] == 2
+        assert set(outbound.priorities) == {BULK}
+        # Stopping revokes the links nobody took
+        assert len(bot.revoked) == 1 + 3
+
+    def test_empty_pool_creates_an_interactive_link(self):
+        """Without ready links, the user's link is created on demand at interactive priority."""
+        bot, outbound = FakeBot(), FakeOutbound()
+        pool = InviteLinkPool(bot, -100, size=3, outbound=outbound)
+        link = asyncio.run(pool.acquire())
+        assert link.invite_link == "https://t.me/+link1"
+        assert outbound.priorities == [INTERACTIVE]
+
+    def test_expiry_note_follows_the_link(self):
+        """The reply states the time the handed-out link actually has left."""
+        now = datetime.now(timezone.utc)
+        link = types.SimpleNamespace(expire_date=now + timedelta(hours=1, minutes=40, seconds=30))
+        assert expiry_note(link) == "This link will expire in 1 hour 40 minutes or after one use."
+        link.expire_date = now + timedelta(hours=2, seconds=30)
+        assert expiry_note(link) == "This link will expire in 2 hours or after one use."
@@ -0,0 +1,123 @@
+"""
+Test file for the pipelined kick engine.
+"""
+import asyncio
+import threading
+
+from src.models.member import MemberRow
+from src.services.kick import KickEngine, KickReport
+from src.utils import TokenBucket, iterate_in_thread
+
+
+class FakeBot:
+    """Ban/unban that take a little while; ``slow`` users take longer."""
+
+    def __init__(self, slow=()):
+        self.slow = set(slow)
+
+    async def ban_chat_member(self, chat_id, user_id, revoke_messages):
+        await asyncio.sleep(0.05 if user_id in self.slow else 0.001)
+
+    async def unban_chat_member(self, chat_id, user_id, only_if_banned):
+        await asyncio.sleep(0.001)
+
+
+def batches_of(ids, size):
+    async def batches():
+        for start in range(0, len(ids), size):
+            yield [MemberRow(member_id, 5000 + member_id) for member_id in ids[start:start + size]]
+    return batches()
+
+
+class TestKickEngine:
+    """Test cases for KickEngine.run."""
+
+    def test_writes_and_checkpoints_stay_in_order(self):
+        """A slow first batch doesn't let later batches be written or checkpointed before it."""
+        written, checkpoints = [], []
+
+        async def persist(members):
+            written.append([member.Id for member in members])
+
+        async def checkpoint(last_id):
+            checkpoints.append(last_id)
+
+        async def scenario():
+            engine = KickEngine(FakeBot(slow={5001}), -100, TokenBucket(rate=10000, burst=10000), concurrency=8)
+            return await engine.run(batches_of(list(range(1, 10)), 3), persist, checkpoint, depth=2)
+
+        report = asyncio.run(scenario())
+        assert written == [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+        assert checkpoints == [3, 6, 9]
+        assert report.kicked == 9
+
+    def test_failed_write_stops_the_run(self):
+        """When persisting fails, no later checkpoint is recorded and the error surfaces."""
+        checkpoints = []
+
+        async def persist(members):
+            if members[0].Id == 4:
+                raise RuntimeError("database unavailable")
+
+        async def checkpoint(last_id):
+            checkpoints.append(last_id)
+
+        async def scenario():
+            engine = KickEngine(FakeBot(), -100, TokenBucket(rate=10000, burst=10000), concurrency=8)
+            await engine.run(batches_of(list(range(1, 10)), 3), persist, checkpoint)
+
+        try:
+            asyncio.run(scenario())
+        except RuntimeError as e:
+            assert "database unavailable" in str(e)
+        else:
+            raise AssertionError("the run should fail")
+        assert checkpoints == [3]
+
+    def test_cancelled_run_closes_the_stream(self):
+        """Cancelling mid-run closes the page stream, on the thread that read it."""
+        threads, closed = set(), []
+
+        def pages():
+            try:
+                for start in range(1, 100, 3):
+                    threads.add(threading.get_ident())
+                    yield [MemberRow(member_id, 5000 + member_id) for member_id in range(start, start + 3)]
+            finally:
+                threads.add(threading.get_ident())
+                closed.append(True)
+
+        async def scenario():
+            first_write = asyncio.Event()
+
+            async def persist(members):
+                first_write.set()
+
+            engine = KickEngine(FakeBot(), -100, TokenBucket(rate=10000, burst=10000), concurrency=8)
+            run = asyncio.create_task(engine.run(iterate_in_thread(pages()), persist, depth=1))
+            await first_write.wait()
+            run.cancel()
+            try:
+                await run
+            except asyncio.CancelledError:
+                pass
+            # Closed by the run itself, not by the loop's shutdown of leftover generators
+            return list(closed)
+
+        assert asyncio.run(scenario()) == [True]
+        assert len(threads) == 1 and threading.get_ident() not in threads
+
+
+class TestKickReport:
+    """Test cases for KickReport.merge."""
+
+    def test_merge_spans_the_shards(self):
+        """Counters add up and the merged run lasts from the first start to the last finish."""
+        reports = [
+            KickReport(kicked=3, failed=1, started_at=100.0, finished_at=104.0),
+            KickReport(kicked=5, started_at=101.0, finished_at=106.0),
+        ]
+        merged = KickReport.merge(reports)
+        assert (merged.kicked, merged.failed) == (8, 1)
+        assert (merged.started_at, merged.finished_at, merged.duration) == (100.0, 106.0, 6.0)
+        assert KickReport.merge([]).duration == 0.0
@@ -0,0 +1,32 @@
+"""
+Test file for kick plans.
+"""
+from src.services.kick_plan import KickPlan, KICK, CLEAR
+
+
+class TestKickPlan:
+    """Test cases for KickPlan."""
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """A saved plan loads back with the same members, actions and estimate."""
+        plan = KickPlan(chat_id=-100, membership_end_time="2025-10-31 00:00:00.000")
+        plan.add(3, 5003)
+        plan.add(7, 5007, CLEAR)
+        path = tmp_path / "plan.txt"
+        plan.save(str(path))
+
+        loaded = KickPlan.load(str(path))
+        assert list(loaded.ids) == [3, 7]
+        assert loaded.estimate(batch_size=100) == {
+            "members": 2, "kick": 1, "clear": 1, "api_calls": 2, "db_rows": 2, "db_batches": 1,
+        }
+
+    def test_batches_resume_after_id(self):
+        """Batches start after the checkpointed Id."""
+        plan = KickPlan(chat_id=-100, membership_end_time="2025-10-31 00:00:00.000")
+        for member_id in (1, 2, 5, 9):
+            plan.add(member_id, 5000 + member_id)
+        batches = list(plan.batches(batch_size=2, after_id=2))
+        assert [[member.Id for _, member in batch] for batch in batches] == [[5, 9]]
+        assert batches[0][0][0] == KICK
+        assert plan.position(2) == 2
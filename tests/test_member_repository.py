@@ -0,0 +1,107 @@
+"""
+Test file for the set-based MemberRepository paths, on the SQLite engine.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+
+from benchmarks.seed import is_expired, is_linked, member_phone
+from config import Config
+from src.db.mssql import AsyncDatabase
+from src.models.member import MemberORM
+from src.repository import MemberRepository, AsyncMemberRepository
+from src.services import MemberService
+
+
+class TestMemberRepository:
+    """Test cases for MemberRepository."""
+
+    def test_update_members_writes_every_row(self, member_db):
+        """Changes are grouped by column set and chunked, and every listed row is written."""
+        repo = MemberRepository(member_db)
+        changes = [(member_id, {"UserTelegramId": None, "HasJoinedTelegramGroup": False}) for member_id in (2, 4, 6, 8, 10)]
+        changes += [(member_id, {"FirstName": f"Renamed{member_id}"}) for member_id in (1, 3, 5)]
+        changes.append((7, {}))
+        assert repo.update_members(changes, chunk_size=2) == 8
+
+        for member_id in (2, 4, 6, 8, 10):
+            member = repo.get_member_by_id(member_id)
+            assert (member.UserTelegramId, member.HasJoinedTelegramGroup) == (None, False)
+        assert [repo.get_member_by_id(member_id).FirstName for member_id in (1, 3, 5, 7)] == ["Renamed1", "Renamed3", "Renamed5", "Member7"]
+        # Untouched columns keep their values
+        assert repo.get_member_by_id(2).FirstName == "Member2"
+        assert repo.get_member_by_id(12).UserTelegramId is not None
+
+    def test_shard_bounds_cover_every_expired_member_once(self, member_db):
+        """The NTILE bounds split the expired members into ranges with no gap and no overlap."""
+        repo = MemberRepository(member_db)
+        cut_off = MemberService.membership_end_time()
+        expected = [member_id for member_id in range(1, 201) if is_expired(member_id) and is_linked(member_id)]
+
+        for shards, after_id in ((4, 0), (3, 50), (50, 0)):
+            bounds = repo.get_membership_time_shard_bounds(cut_off, shards, after_id=after_id)
+            assert bounds == sorted(bounds) and len(bounds) == min(shards, len([i for i in expected if i > after_id]))
+            seen = []
+            for lo, hi in zip([after_id] + bounds[:-1], bounds):
+                shard = [member.Id for page in repo.iter_member_by_membership_time(cut_off, after_id=lo, until_id=hi) for member in page]
+                assert shard and shard[-1] == hi
+                seen.extend(shard)
+            assert seen == [member_id for member_id in expected if member_id > after_id]
+
+    def test_get_by_phones_across_chunk_boundaries(self, member_db):
+        """Every phone is found whichever chunk it lands in; the newest member wins a shared phone."""
+        with member_db.engine.begin() as connection:
+            connection.execute(insert(MemberORM.__table__), [{"Id": 500, "Phone": member_phone(3), "IsMembership": True, "IsActived": True}])
+        repo = MemberRepository(member_db)
+        phones = [member_phone(member_id) for member_id in range(1, 8)] + ["089900000000"]
+
+        for chunk_size in (1, 2, 3, 7, 8, 1000):
+            found = repo.get_by_phones(phones, chunk_size=chunk_size)
+            assert sorted(found) == phones[:7]
+            assert found[member_phone(3)].Id == 500
+            assert found[member_phone(7)].Id == 7
+
+    def test_set_joined_returns_only_changed_members(self, member_db):
+        """The UPDATE ... RETURNING reports the members whose flag actually changed."""
+        repo = MemberRepository(member_db)
+        telegram_ids = [5000000000 + member_id for member_id in (2, 4, 6)] + [42]
+        assert sorted(repo.set_joined_by_telegram_ids(telegram_ids, False, chunk_size=2)) == [2, 4, 6]
+        assert repo.set_joined_by_telegram_ids(telegram_ids, False) == []
+        assert repo.get_member_by_id(4).HasJoinedTelegramGroup is False
+        assert repo.set_joined_by_telegram_ids(telegram_ids[:1], True) == [2]
+
+    def test_set_joined_without_returning(self, member_db, monkeypatch):
+        """Where RETURNING can't be used (SQL Server), the changed Ids are selected first with the same result."""
+        repo = MemberRepository(member_db)
+        monkeypatch.setattr(repo, "_can_return_updates", lambda: False)
+        telegram_ids = [5000000000 + member_id for member_id in (2, 4, 6)] + [42]
+        assert sorted(repo.set_joined_by_telegram_ids(telegram_ids, False, chunk_size=2)) == [2, 4, 6]
+        assert repo.set_joined_by_telegram_ids(telegram_ids, False) == []
+        assert repo.get_member_by_id(6).HasJoinedTelegramGroup is False
+
+
+class TestAsyncMemberRepository:
+    """Test cases for AsyncMemberRepository, on the same SQLite file through aiosqlite."""
+
+    def test_update_members_writes_every_row(self, member_db):
+        """The async engine follows DATABASE_URL, and its grouped updates land in the same rows."""
+        pytest.importorskip("aiosqlite")
+        config = Config()
+        config.database_url = member_db.conn_str
+        changes = [(member_id, {"FirstName": f"Async{member_id}"}) for member_id in (1, 2, 3)]
+        changes += [(4, {"UserTelegramId": None, "HasJoinedTelegramGroup": False}), (5, {})]
+
+        async def scenario():
+            db = AsyncDatabase(config)
+            db.connect()
+            try:
+                return await AsyncMemberRepository(db).update_members(changes, chunk_size=2)
+            finally:
+                await db.close()
+
+        assert asyncio.run(scenario()) == 4
+        repo = MemberRepository(member_db)
+        assert [repo.get_member_by_id(member_id).FirstName for member_id in (1, 2, 3, 5)] == ["Async1", "Async2", "Async3", "Member5"]
+        member = repo.get_member_by_id(4)
+        assert (member.UserTelegramId, member.HasJoinedTelegramGroup) == (None, False)
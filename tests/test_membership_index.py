@@ -0,0 +1,99 @@
+"""
+Test file for the in-memory membership index.
+"""
+from datetime import datetime
+
+from config import Config
+from src.models.member import Member, MemberRow
+from src.services.membership import MemberService
+from src.services.membership_index import MembershipIndex
+
+
+class FakeRepository:
+    """Active rows plus a change-tracking feed, as MemberRepository returns them."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.versions = (1, 0)
+        self.changes = ([], [])
+
+    def get_change_tracking_version(self):
+        return self.versions
+
+    def get_active_member_rows(self):
+        return list(self.rows)
+
+    def get_member_changes(self, since_version):
+        return self.changes
+
+    def get_by_phone(self, phone):
+        return Member(Id=9, Phone=phone, MembershipTime=datetime(2031, 1, 1), HasJoinedTelegramGroup=False)
+
+
+def row(member_id, telegram_id=None, phone=None):
+    return MemberRow(member_id, telegram_id, datetime(2030, 1, 1), False, phone)
+
+
+class TestMembershipIndex:
+    """Test cases for MembershipIndex."""
+
+    def test_newest_member_wins_a_shared_phone(self):
+        """As in get_by_phone, the highest Id wins; removing it promotes the next one."""
+        repo = FakeRepository([row(3, phone="628111"), row(1, phone="628111"), row(2, 77, "628222")])
+        index = MembershipIndex(repo)
+        index.load()
+        assert index.get_by_phone("628111").Id == 3
+        assert index.get_by_telegram_id(77).Id == 2
+
+        repo.versions = (2, 0)
+        repo.changes = ([], [3])
+        index.refresh()
+        assert index.get_by_phone("628111").Id == 1
+        assert index.version == 2
+
+    def test_lookups_return_copies_and_writes_apply(self):
+        """Callers can't mutate the index; the bot's own writes are visible at once."""
+        index = MembershipIndex(FakeRepository([row(1, phone="628111")]))
+        index.load()
+        index.get_by_phone("628111").HasJoinedTelegramGroup = True
+        assert index.get_by_phone("628111").HasJoinedTelegramGroup is False
+
+        index.update(1, UserTelegramId=55, HasJoinedTelegramGroup=True)
+        assert index.get_by_telegram_id(55).HasJoinedTelegramGroup is True
+
+    def test_expired_version_reloads(self):
+        """A version older than the minimum valid one forces a full reload."""
+        repo = FakeRepository([row(1, phone="628111")])
+        index = MembershipIndex(repo)
+        index.load()
+        repo.rows = [row(2, phone="628222")]
+        repo.versions = (9, 5)
+        index.refresh()
+        assert index.full_loads == 2
+        assert index.get_by_phone("628111") is None
+        assert index.get_by_phone("628222").Id == 2
+
+    def test_index_is_only_served_while_fresh(self):
+        """Without change tracking, or once refreshes stop succeeding, lookups go to the database."""
+        repo = FakeRepository([row(1, phone="08123456789")])
+        repo.versions = None
+        index = MembershipIndex(repo, refresh_interval=10)
+        index.load()
+        assert not index.fresh and len(index) == 0
+
+        repo.versions = (1, 0)
+        index.load()
+        assert index.fresh
+        index._refreshed_at -= 31
+        assert not index.fresh
+
+        config = Config()
+        service = MemberService(config, repo)
+        service.index = index
+        # The stale index still holds member 1; the database answer wins, as a MemberRow
+        member = service.get_member_by_phone("08123456789")
+        assert isinstance(member, MemberRow)
+        assert (member.Id, member.MembershipTime) == (9, datetime(2031, 1, 1))
+        index.refresh()
+        assert index.fresh
+        assert service.get_member_by_phone("08123456789").Id == 1
@@ -0,0 +1,54 @@
+"""
+Test file for the membership event pipeline.
+"""
+import asyncio
+
+from src.services.membership_sync import MembershipSync
+
+
+class TestMembershipSync:
+    """Test cases for MembershipSync."""
+
+    def test_events_are_coalesced_per_user(self):
+        """Only the latest state of each user is written, one call per state."""
+        writes = []
+
+        async def write(telegram_ids, joined):
+            writes.append((sorted(telegram_ids), joined))
+            return len(telegram_ids)
+
+        async def scenario():
+            sync = MembershipSync(write, window=60)
+            sync.record(1, True)
+            sync.record(1, False)
+            sync.record(1, True)
+            sync.record(2, False)
+            return sync, await sync.flush()
+
+        sync, written = asyncio.run(scenario())
+        assert written == 2
+        assert writes == [([1], True), ([2], False)]
+        assert sync.stats()["coalesced"] == 2
+
+    def test_failed_flush_keeps_newer_events(self):
+        """A failed batch is retried, but never overwrites a state recorded after it."""
+        calls = []
+
+        async def write(telegram_ids, joined):
+            calls.append((sorted(telegram_ids), joined))
+            if len(calls) == 1:
+                raise RuntimeError("database unavailable")
+            return len(telegram_ids)
+
+        async def scenario():
+            sync = MembershipSync(write, window=60)
+            sync.record(1, True)
+            assert await sync.flush() == 0
+            sync.record(1, False)
+            await sync.flush()
+            return sync
+
+        sync = asyncio.run(scenario())
+        assert calls[-1] == ([1], False)
+        assert sync.stats()["failed_flushes"] == 1
+        assert sync.stats()["pending"] == 0
@@ -0,0 +1,94 @@
+"""
+Test file for the metrics registry.
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.utils.metrics import Registry, timed, _Metric
+from src.utils.startup import StartupTimer
+
+
+class TestRegistry:
+    """Test cases for Registry rendering."""
+
+    def test_counter_and_gauge_render(self):
+        """Counters and gauges render one line per label set."""
+        registry = Registry()
+        calls = registry.counter("calls_total", "Calls.", ("method",))
+        depth = registry.gauge("queue_depth", "Depth.")
+        calls.inc(method="getMe")
+        calls.inc(2, method="getMe")
+        depth.set(5)
+        text = registry.render()
+        assert "# TYPE calls_total counter" in text
+        assert 'calls_total{method="getMe"} 3' in text
+        assert "queue_depth 5" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket counts include every smaller bucket and end with +Inf."""
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+
+    def test_label_names_are_checked(self):
+        """Unknown or missing labels are rejected."""
+        registry = Registry()
+        calls = registry.counter("calls_total", "Calls.", ("method",))
+        with pytest.raises(ValueError):
+            calls.inc(handler="start")
+
+    def test_metric_without_samples_cannot_be_built(self):
+        """A metric type that doesn't implement samples fails when created, not when scraped."""
+        class Incomplete(_Metric):
+            kind = "gauge"
+
+        with pytest.raises(TypeError):
+            Incomplete("incomplete", "Missing samples.")
+
+    def test_collectors_run_before_render(self):
+        """Collectors refresh gauges on every scrape."""
+        registry = Registry()
+        size = registry.gauge("pool_size", "Size.")
+        registry.add_collector(lambda: size.set(7))
+        assert "pool_size 7" in registry.render()
+
+    def test_timed_decorator_handles_coroutines(self):
+        """timed records sync and async calls alike."""
+        registry = Registry()
+        latency = registry.histogram("call_seconds", "Calls.", ("method",))
+
+        @timed(latency, method="sync")
+        def sync_call():
+            return 1
+
+        @timed(latency, method="async")
+        async def async_call():
+            return 2
+
+        assert sync_call() == 1
+        assert asyncio.run(async_call()) == 2
+        assert latency.count(method="sync") == 1
+        assert latency.count(method="async") == 1
+
+
+class TestStartupTimer:
+    """Test cases for the startup-time report."""
+
+    def test_report_lists_phases_with_deltas(self):
+        """Each phase shows its time since process start and its own duration."""
+        timer = StartupTimer(started_at=time.time() - 1.0)
+        timer.mark("imports")
+        timer.mark("bot_ready")
+        report = timer.report()
+        assert report.startswith("imports 1.0")
+        assert "bot_ready" in report
+        assert timer.elapsed() >= 1.0
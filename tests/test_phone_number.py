@@ -0,0 +1,38 @@
+"""
+Test file for phone number normalization.
+"""
+from src.utils.phone_number import extract_phone_number, normalize_phone_number, normalize_phone_numbers
+
+
+class TestNormalizePhoneNumber:
+    """Test cases for normalize_phone_number."""
+
+    def test_indonesian_formats_agree(self):
+        """Every accepted input format maps to the same stored phone."""
+        for raw in ["+628123456789", "628123456789", "08123456789", "0812-3456-789", "+62 812 3456 789", "8123456789"]:
+            assert normalize_phone_number(raw) == "08123456789"
+
+    def test_too_short_is_rejected(self):
+        """Fewer than 10 digits is not a phone number."""
+        assert normalize_phone_number("0812345") is None
+        assert normalize_phone_number("hello") is None
+
+    def test_extract_uses_same_rules(self):
+        """The bot's text parser and the normalizer never disagree."""
+        assert extract_phone_number("my number is +62 812-3456-789") == normalize_phone_number("+628123456789")
+
+
+class TestNormalizePhoneNumbers:
+    """Test cases for the batch normalizer."""
+
+    def test_returns_values_and_mask(self):
+        """Invalid cells become None with a False mask entry."""
+        phones, mask = normalize_phone_numbers(["+628123456789", "", None, float("nan"), "12"])
+        assert phones == ["08123456789", None, None, None, None]
+        assert mask == [True, False, False, False, False]
+
+    def test_numeric_cells(self):
+        """Numbers read from spreadsheets are normalized like strings."""
+        phones, mask = normalize_phone_numbers([628123456789, 628123456789.0])
+        assert phones == ["08123456789", "08123456789"]
+        assert mask == [True, True]
@@ -0,0 +1,62 @@
+"""
+Test file for the Telegram rate limiter.
+"""
+import asyncio
+import time
+
+from src.utils.rate_limiter import TokenBucket
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket."""
+
+    def test_burst_is_served_immediately(self):
+        """Calls up to the burst size should not wait."""
+        async def run():
+            bucket = TokenBucket(rate=1, burst=5)
+            started = time.monotonic()
+            for _ in range(5):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        assert asyncio.run(run()) < 0.1
+
+    def test_rate_is_enforced_after_burst(self):
+        """Once the burst is spent, calls are spaced by the rate."""
+        async def run():
+            bucket = TokenBucket(rate=50, burst=1)
+            started = time.monotonic()
+            for _ in range(6):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        assert asyncio.run(run()) >= 0.09
+
+    def test_penalize_pauses_and_halves_rate(self):
+        """RetryAfter should pause the bucket and halve the rate."""
+        async def run():
+            bucket = TokenBucket(rate=40, burst=10)
+            bucket.penalize(0.1)
+            started = time.monotonic()
+            await bucket.acquire()
+            return bucket, time.monotonic() - started
+
+        bucket, waited = asyncio.run(run())
+        assert waited >= 0.1
+        assert bucket.rate == 20
+        assert bucket.throttled == 1
+
+    def test_reward_recovers_to_target(self):
+        """Successful calls bring the rate back up, never above the target."""
+        bucket = TokenBucket(rate=10, burst=1, recovery=2)
+        bucket.penalize(0)
+        bucket.reward()
+        bucket.reward()
+        assert bucket.rate == 10
+
+    def test_try_acquire_does_not_wait(self):
+        """try_acquire spends available tokens and refuses once they run out."""
+        bucket = TokenBucket(rate=1, burst=2)
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
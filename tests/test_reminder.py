@@ -0,0 +1,124 @@
+"""
+Test file for payment-reminder campaigns.
+"""
+import asyncio
+import types
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from telegram.error import Forbidden
+
+from config import Config
+from src.db.job_store import JobStoreDatabase
+from src.models.member import MemberORM, MemberRow
+from src.repository import MemberRepository
+from src.repository.reminder import ReminderRepository
+from src.services.reminder import ReminderService, ReminderCampaign
+
+
+class FakeMemberService:
+    """Pages of members and a bot that records who was messaged."""
+
+    def __init__(self, members, blocked=()):
+        self.members = members
+        self.blocked = set(blocked)
+        self.messaged = []
+        self.closed = False
+        self.outbound = None
+        self.repo = types.SimpleNamespace(iter_members_expiring_between=self.pages)
+        self.bot = types.SimpleNamespace(send_message=self.send_message)
+
+    def pages(self, since, until, batch_size, after_id):
+        members = [member for member in self.members if member.Id > after_id and since <= member.MembershipTime < until]
+        try:
+            for start in range(0, len(members), batch_size):
+                yield members[start:start + batch_size]
+        finally:
+            self.closed = True
+
+    async def send_message(self, chat_id, text):
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        self.messaged.append(chat_id)
+
+
+class TestReminderService:
+    """Test cases for ReminderService."""
+
+    def test_campaign_never_messages_a_member_twice(self, tmp_path):
+        """A rerun of the same campaign only reaches members it has no outcome for."""
+        config = Config()
+        config.payment_reminder_batch_size = 2
+        config.payment_reminder_rate = 1000
+        job_store = JobStoreDatabase(f"sqlite:///{tmp_path / 'jobs.sqlite3'}")
+        repo = ReminderRepository(job_store)
+        members = [MemberRow(member_id, 5000 + member_id, datetime(2030, 1, 4)) for member_id in range(1, 6)]
+        campaign = ReminderCampaign.for_day(datetime(2030, 1, 1), [3])[0]
+
+        service = FakeMemberService(members[:3], blocked={5002})
+        report = asyncio.run(ReminderService(config, service, repo).send_campaign(campaign))
+        assert (report.sent, report.blocked) == (2, 1)
+        assert "04 Jan 2030" in ReminderService(config, service, repo).render(members[0], 3)
+
+        service = FakeMemberService(members)
+        report = asyncio.run(ReminderService(config, service, repo).send_campaign(campaign))
+        assert service.messaged == [5004, 5005]
+        assert report.skipped == 3
+        assert repo.counts(campaign.name) == {"sent": 4, "blocked": 1}
+        job_store.close()
+
+    def test_failed_claim_closes_the_page_reader(self, tmp_path):
+        """When claiming fails the error surfaces and the member pages are closed, not left open."""
+        config = Config()
+        config.payment_reminder_batch_size = 2
+        job_store = JobStoreDatabase(f"sqlite:///{tmp_path / 'jobs.sqlite3'}")
+        repo = ReminderRepository(job_store)
+        members = [MemberRow(member_id, 5000 + member_id, datetime(2030, 1, 4)) for member_id in range(1, 8)]
+        service = FakeMemberService(members)
+        campaign = ReminderCampaign.for_day(datetime(2030, 1, 1), [3])[0]
+
+        def claim(campaign_name, page):
+            raise RuntimeError("job store unavailable")
+
+        repo.claim = claim
+
+        async def scenario():
+            try:
+                await ReminderService(config, service, repo).send_campaign(campaign)
+            except RuntimeError as e:
+                # Checked while the failed run's frames are still alive
+                return str(e), service.closed
+            raise AssertionError("the campaign should fail")
+
+        assert asyncio.run(scenario()) == ("job store unavailable", True)
+        assert service.messaged == []
+        job_store.close()
+
+    def test_campaign_window(self):
+        """Each offset covers the memberships ending on one day."""
+        campaigns = ReminderCampaign.for_day(datetime(2030, 1, 1, 9, 30), [1, 7])
+        assert [campaign.name for campaign in campaigns] == ["payment-reminder:2030-01-08:7d", "payment-reminder:2030-01-02:1d"]
+        assert (campaigns[1].since, campaigns[1].until) == (datetime(2030, 1, 2), datetime(2030, 1, 3))
+
+    def test_campaign_selects_memberships_ending_that_day(self, member_db):
+        """Memberships ending at midnight belong to the day that midnight starts, not the one before."""
+        expiry_day = datetime(2030, 1, 4)
+        ends = {
+            1001: expiry_day - timedelta(microseconds=1000),
+            1002: expiry_day,
+            1003: expiry_day + timedelta(hours=23, minutes=59, seconds=59),
+            1004: expiry_day + timedelta(days=1),
+        }
+        with member_db.engine.begin() as connection:
+            connection.execute(insert(MemberORM.__table__), [
+                {"Id": member_id, "IsMembership": True, "IsActived": True, "UserTelegramId": 7000 + member_id, "MembershipTime": ends_at}
+                for member_id, ends_at in ends.items()
+            ])
+        repo = MemberRepository(member_db)
+
+        def selected(campaign):
+            return [member.Id for page in repo.iter_members_expiring_between(campaign.since, campaign.until) for member in page]
+
+        assert selected(ReminderCampaign.for_day(datetime(2030, 1, 1, 9, 0), [3])[0]) == [1002, 1003]
+        assert selected(ReminderCampaign.for_day(datetime(2030, 1, 2), [3])[0]) == [1004]
+        assert selected(ReminderCampaign.for_day(datetime(2029, 12, 31), [3])[0]) == [1001]
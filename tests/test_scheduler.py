@@ -0,0 +1,157 @@
+"""
+Test file for the leased, checkpointed scheduler runs.
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+from config import Config
+from src.db.job_store import JobStoreDatabase
+from src.repository.job import JobRepository
+from src.services.kick import KickReport
+from src.workers import scheduler as scheduler_module
+from src.workers.scheduler import Scheduler, LeaseLost, KICK_JOB, KICK_HIGH_WATER
+
+DAY = "2030-01-01"
+CUT_OFF = "2030-01-01 00:00:00.000"
+
+
+class FakeWorker:
+    """Stands in for TelegramWorker; ``step`` decides what each kick run does."""
+
+    def __init__(self, step):
+        self.step = step
+        self.calls = []
+
+    def run_kick_task(self, after_id=0, on_checkpoint=None, since=None, membership_end_time=None):
+        self.calls.append({"after_id": after_id, "since": since})
+        return self.step(len(self.calls), on_checkpoint)
+
+
+@pytest.fixture
+def job_repo(tmp_path):
+    db = JobStoreDatabase(f"sqlite:///{tmp_path / 'jobs.sqlite3'}")
+    yield JobRepository(db)
+    db.close()
+
+
+def make_scheduler(job_repo, step, **settings):
+    config = Config()
+    for name, value in settings.items():
+        setattr(config, name, value)
+    return Scheduler(FakeWorker(step), job_repo, config)
+
+
+class TestScheduler:
+    """Test cases for Scheduler kick runs."""
+
+    def test_lease_is_exclusive_until_it_expires(self, job_repo):
+        """A held lease turns other instances away; an expired one can be taken over."""
+        assert job_repo.acquire_lease(KICK_JOB, "a", 60)
+        assert not job_repo.acquire_lease(KICK_JOB, "b", 60)
+        scheduler = make_scheduler(job_repo, lambda call, checkpoint: KickReport())
+        assert scheduler._run_kick_task(DAY, CUT_OFF) is False
+        assert scheduler.telegram_worker.calls == []
+
+        assert job_repo.acquire_lease(KICK_JOB, "a", -1)
+        assert job_repo.acquire_lease(KICK_JOB, "b", 60)
+
+    def test_failed_run_resumes_from_checkpoint_until_max_attempts(self, job_repo):
+        """Retries continue after the last checkpoint; after max attempts the run is no longer pending."""
+        def step(call, checkpoint):
+            checkpoint(call * 100)
+            raise RuntimeError("telegram unavailable")
+
+        scheduler = make_scheduler(job_repo, step, job_max_attempts=2)
+        scheduler._run_kick_task(DAY, CUT_OFF)
+        assert scheduler._is_pending(DAY)
+        scheduler._run_kick_task(DAY, CUT_OFF)
+        assert [call["after_id"] for call in scheduler.telegram_worker.calls] == [0, 100]
+
+        run = job_repo.get_run(KICK_JOB, DAY)
+        assert (run.Status, run.Attempts, run.Checkpoint) == ("failed", 2, 200)
+        assert not scheduler._is_pending(DAY)
+
+    def test_lost_lease_stops_before_the_next_checkpoint(self, job_repo):
+        """Once another instance takes the lease, no further checkpoint is written and the run is left to it."""
+        stopped = []
+
+        def step(call, checkpoint):
+            checkpoint(10)
+            job_repo.release_lease(KICK_JOB, scheduler.owner)
+            job_repo.acquire_lease(KICK_JOB, "other", 60)
+            time.sleep(0.6)
+            try:
+                checkpoint(20)
+            except LeaseLost:
+                stopped.append(True)
+                raise
+            return KickReport()
+
+        scheduler = make_scheduler(job_repo, step, job_lease_seconds=1)
+        assert scheduler._run_kick_task(DAY, CUT_OFF)
+        assert stopped == [True]
+        run = job_repo.get_run(KICK_JOB, DAY)
+        assert (run.Status, run.Checkpoint) == ("running", 10)
+
+    def test_reminders_before_the_kick_time_are_not_held(self, job_repo, monkeypatch):
+        """With reminders at 09:00 and the kick at 10:00, a 09:30 tick sends reminders and doesn't kick."""
+        class Clock(datetime):
+            current = datetime(2030, 1, 1, 9, 30)
+
+            @classmethod
+            def now(cls, tz=None):
+                return cls.current
+
+        monkeypatch.setattr(scheduler_module, "datetime", Clock)
+        scheduler = make_scheduler(
+            job_repo, lambda call, checkpoint: KickReport(),
+            telegram_cleaning_schedule="10:00", payment_reminder_enabled=True, payment_reminder_schedule="09:00",
+        )
+        scheduler.setup_schedule()
+        reminded, kicked = [], []
+        monkeypatch.setattr(scheduler, "payment_reminder", reminded.append)
+        monkeypatch.setattr(scheduler, "_run_kick_task", lambda run_key, cut_off: kicked.append(run_key))
+
+        scheduler._tick()
+        assert (reminded, kicked) == ([Clock.current], [])
+
+        Clock.current = datetime(2030, 1, 1, 10, 0)
+        scheduler._tick()
+        assert kicked == [DAY]
+
+
+class TestIncrementalKick:
+    """Test cases for the incremental-mode membership high-water mark."""
+
+    def test_clean_run_moves_the_mark(self, job_repo):
+        """A run over the whole window with no failures moves the mark to its cut-off."""
+        job_repo.set_state(KICK_HIGH_WATER, "2029-12-31 00:00:00.000")
+        scheduler = make_scheduler(job_repo, lambda call, checkpoint: KickReport(kicked=5), kick_mode="incremental")
+        scheduler._run_kick_task(DAY, CUT_OFF)
+        assert scheduler.telegram_worker.calls[0]["since"] == "2029-12-31 00:00:00.000"
+        assert job_repo.get_state(KICK_HIGH_WATER) == CUT_OFF
+
+    def test_failed_kick_keeps_the_mark(self, job_repo):
+        """If any member could not be kicked, the next run reads the same window again."""
+        job_repo.set_state(KICK_HIGH_WATER, "2029-12-31 00:00:00.000")
+        scheduler = make_scheduler(job_repo, lambda call, checkpoint: KickReport(kicked=4, failed=1), kick_mode="incremental")
+        scheduler._run_kick_task(DAY, CUT_OFF)
+        assert job_repo.get_run(KICK_JOB, DAY).Status == "succeeded"
+        assert job_repo.get_state(KICK_HIGH_WATER) == "2029-12-31 00:00:00.000"
+
+    def test_resumed_run_keeps_the_mark(self, job_repo):
+        """A run that resumed from a checkpoint did not see the start of the window, so the mark stays."""
+        def step(call, checkpoint):
+            if call == 1:
+                checkpoint(100)
+                raise RuntimeError("telegram unavailable")
+            return KickReport(kicked=5)
+
+        scheduler = make_scheduler(job_repo, step, kick_mode="incremental")
+        scheduler._run_kick_task(DAY, CUT_OFF)
+        scheduler._run_kick_task(DAY, CUT_OFF)
+        assert scheduler.telegram_worker.calls[1] == {"after_id": 100, "since": None}
+        assert job_repo.get_run(KICK_JOB, DAY).Status == "succeeded"
+        assert job_repo.get_state(KICK_HIGH_WATER) is None
@@ -0,0 +1,25 @@
+"""
+Test file for the shared Bot API request pool.
+"""
+import importlib.util
+
+from config import Config
+from src.utils.telegram_request import create_request
+
+
+class TestCreateRequest:
+    """Test cases for building the pool from settings."""
+
+    def test_pool_size_from_config(self):
+        """API calls share the configured pool; long polling gets one connection."""
+        config = Config()
+        config.telegram_pool_size = 32
+        assert create_request(config).stats()["pool_size"] == 32
+        assert create_request(config, get_updates=True).stats()["pool_size"] == 1
+
+    def test_http2_falls_back_without_h2(self):
+        """TELEGRAM_HTTP2 only switches protocols when h2 is installed."""
+        config = Config()
+        config.telegram_http2 = True
+        expected = "2" if importlib.util.find_spec("h2") else "1.1"
+        assert create_request(config).http_version == expected
@@ -0,0 +1,85 @@
+"""
+Test file for the per-user concurrent update processor.
+"""
+import asyncio
+
+from telegram import Update
+
+from src.handlers.update_processor import PerUserUpdateProcessor
+
+
+def make_update(update_id: int, user_id: int) -> Update:
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "user"},
+            "text": "08123456789",
+        },
+    }, None)
+
+
+class TestPerUserUpdateProcessor:
+    """Test cases for PerUserUpdateProcessor."""
+
+    def test_same_user_updates_run_in_order(self):
+        """Updates from one user never overlap and keep their order."""
+        events = []
+
+        async def handle(update_id):
+            events.append(("start", update_id))
+            await asyncio.sleep(0.01)
+            events.append(("end", update_id))
+
+        async def run():
+            processor = PerUserUpdateProcessor(8)
+            await asyncio.gather(*(
+                processor.process_update(make_update(i, 7), handle(i)) for i in range(3)
+            ))
+            return processor
+
+        processor = asyncio.run(run())
+        assert events == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+        assert processor.stats()["processed"] == 3
+        assert processor._locks == {}
+
+    def test_different_users_run_concurrently(self):
+        """Updates from different users overlap up to the concurrency cap."""
+        running = 0
+        peak = 0
+
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        async def run():
+            processor = PerUserUpdateProcessor(3)
+            await asyncio.gather(*(
+                processor.process_update(make_update(i, i), handle()) for i in range(6)
+            ))
+
+        asyncio.run(run())
+        assert peak == 3
+
+    def test_busy_user_does_not_hold_every_slot(self):
+        """A second user's update finishes while the first user's queue is still draining."""
+        finished = []
+
+        async def handle(user_id, update_id):
+            await asyncio.sleep(0.05)
+            finished.append((user_id, update_id))
+
+        async def run():
+            processor = PerUserUpdateProcessor(4)
+            first_user = [processor.process_update(make_update(i, 1), handle(1, i)) for i in range(6)]
+            await asyncio.sleep(0)
+            await asyncio.gather(*first_user, processor.process_update(make_update(100, 2), handle(2, 100)))
+
+        asyncio.run(run())
+        assert finished.index((2, 100)) <= 1
+        assert [update_id for user_id, update_id in finished if user_id == 1] == list(range(6))
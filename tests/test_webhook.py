@@ -0,0 +1,64 @@
+"""
+Test file for the webhook update endpoint.
+"""
+import asyncio
+import json
+import types
+
+from src.handlers.update_processor import PerUserUpdateProcessor
+from src.handlers.webhook import TelegramWebhook, offer_inline_reply
+from src.utils.http_server import Request
+
+SECRET = "s3cret"
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 7, "type": "private"},
+        "from": {"id": 7, "is_bot": False, "first_name": "user"},
+        "text": "08123456789",
+    },
+}
+
+
+class FakeApp:
+    """Just enough of an Application for TelegramWebhook; handlers reply inline."""
+
+    def __init__(self):
+        self.bot = None
+        self.update_processor = PerUserUpdateProcessor(4)
+        self.processed = []
+        self.inline_accepted = []
+
+    async def process_update(self, update):
+        self.processed.append(update.update_id)
+        self.inline_accepted.append(offer_inline_reply("sendMessage", chat_id=update.effective_chat.id, text="hi"))
+        # Only one call fits in the response
+        self.inline_accepted.append(offer_inline_reply("sendMessage", chat_id=update.effective_chat.id, text="again"))
+
+
+def post(webhook, headers):
+    return asyncio.run(webhook.handle(Request("POST", "/telegram/webhook", headers, json.dumps(UPDATE).encode())))
+
+
+class TestTelegramWebhook:
+    """Test cases for TelegramWebhook.handle."""
+
+    def test_rejects_missing_or_wrong_secret(self):
+        """Requests without the right secret token never reach the handlers."""
+        app = FakeApp()
+        webhook = TelegramWebhook(app, SECRET)
+        assert post(webhook, {}).status == 403
+        assert post(webhook, {"x-telegram-bot-api-secret-token": "wrong"}).status == 403
+        assert app.processed == []
+
+    def test_reply_rides_on_the_response(self):
+        """The first reply offered while handling the update becomes the response body."""
+        app = FakeApp()
+        response = post(TelegramWebhook(app, SECRET), {"x-telegram-bot-api-secret-token": SECRET})
+        assert response.status == 200
+        assert json.loads(response.body) == {"method": "sendMessage", "chat_id": 7, "text": "hi"}
+        assert app.inline_accepted == [True, False]
+        # Outside a webhook request there is no slot to fill
+        assert offer_inline_reply("sendMessage", chat_id=7, text="hi") is False